@@ -1,15 +1,26 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 import os
 import sys
 
 # Adiciona o diretório src ao path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from database import FilaManager
+from database import FilaManager, FilaCheiaError
+from storage import COLUNAS_FILA, criar_storage
+from rollup import RollupDiario
+from previsao import PrevisaoFila, formatar_eta
+from components import render_mapa_horarios, render_projecao_backlog, render_timeline_chart
+from importador import importar_historico
 from notifications import EmailNotifier, SMSNotifier
 from reports import ReportGenerator
+from jobs import GerenciadorJobs
+from agendador_relatorios import AgendadorRelatorios
+from exportacao import FORMATOS, ExportadorDados
+from analitico import CONSULTAS_SALVAS, criar_motor_analitico
+from report_engine import FiltroRelatorio, periodo_relatorio
+from sla import CalendarioUteis
 from styles_mavi_updated import apply_custom_styling, get_custom_components
 from config.config import app_config, email_config, sms_config
 from auth import require_login, show_user_info, has_permission, AuthManager
@@ -28,7 +39,38 @@ apply_custom_styling()
 @st.cache_resource
 def init_components():
     """Inicializa os componentes do sistema"""
-    fila_manager = FilaManager(app_config.fila_file)
+    storage = criar_storage(
+        app_config.storage_backend,
+        app_config.fila_file,
+        lista_espera_file=app_config.lista_espera_file,
+        sqlite_file=app_config.sqlite_file
+    )
+    calendario = CalendarioUteis.de_texto(
+        app_config.sla_expediente,
+        app_config.sla_dias_semana,
+        app_config.sla_feriados_empresa,
+        app_config.sla_pontos_facultativos
+    )
+    rollup = RollupDiario(storage, app_config.rollup_file, calendario=calendario)
+    analitico = criar_motor_analitico(
+        storage,
+        app_config.analitico_dir,
+        limite_linhas=app_config.analitico_limite_linhas,
+        timeout_segundos=app_config.analitico_timeout_segundos,
+        calendario=calendario
+    ) if app_config.analitico_ativo else None
+    fila_manager = FilaManager(
+        app_config.fila_file,
+        max_fila_size=app_config.max_fila_size,
+        limites_por_prioridade=app_config.limites_por_prioridade,
+        modo_overflow=app_config.modo_overflow,
+        lista_espera_file=app_config.lista_espera_file,
+        envelhecimento_horas=app_config.envelhecimento_horas,
+        storage=storage,
+        janela_duplicidade_segundos=app_config.janela_duplicidade_segundos,
+        rollup=rollup,
+        previsao=PrevisaoFila(storage, semanas=app_config.previsao_semanas)
+    )
     email_notifier = EmailNotifier(
         email_config.smtp_server,
         email_config.smtp_port,
@@ -42,9 +84,21 @@ def init_components():
     )
     report_generator = ReportGenerator(
         app_config.fila_file,
-        app_config.relatorios_dir
+        app_config.relatorios_dir,
+        storage=storage,
+        rollup=rollup,
+        cache_itens=app_config.report_cache_itens,
+        report_workers=app_config.report_workers,
+        max_artefatos_por_tipo=app_config.relatorios_max_por_tipo,
+        max_bytes_artefatos=app_config.relatorios_max_mb * 1024 * 1024,
+        min_linhas_paralelo=app_config.report_min_linhas_paralelo,
+        analitico=analitico,
+        calendario=calendario
     )
-    return fila_manager, email_notifier, sms_notifier, report_generator
+    jobs = GerenciadorJobs(max_simultaneos=app_config.report_jobs_simultaneos)
+    agendador = AgendadorRelatorios(report_generator, app_config.horarios_relatorios)
+    exportador = ExportadorDados(storage, app_config.exportacoes_dir)
+    return fila_manager, email_notifier, sms_notifier, report_generator, jobs, agendador, exportador, analitico
 
 def main():
     """Função principal do aplicativo"""
@@ -54,7 +108,7 @@ def main():
         return
     
     # Inicializa componentes
-    fila_manager, email_notifier, sms_notifier, report_generator = init_components()
+    fila_manager, email_notifier, sms_notifier, report_generator, jobs, agendador, exportador, analitico = init_components()
     
     # Header customizado
     components = get_custom_components()
@@ -111,9 +165,9 @@ def main():
     elif page == "📊 Dashboard":
         page_dashboard(fila_manager)
     elif page == "📈 Relatórios":
-        page_relatorios(report_generator)
+        page_relatorios(report_generator, jobs, agendador)
     elif page == "⚙️ Administração":
-        page_administracao(fila_manager, email_notifier)
+        page_administracao(fila_manager, email_notifier, exportador, analitico)
 
 def page_nova_solicitacao(fila_manager, email_notifier, sms_notifier):
     """Página para criar nova solicitação em formato de funil"""
@@ -121,6 +175,17 @@ def page_nova_solicitacao(fila_manager, email_notifier, sms_notifier):
     
     st.subheader("📝 Nova Solicitação de Suporte")
     st.write("Preencha os dados abaixo para criar sua solicitação:")
+    
+    # Situação da fila (controle de admissão)
+    situacao_fila = fila_manager.obter_situacao_fila()
+    prioridades_cheias = [p for p in ["Normal", "Alta", "Urgente"] if fila_manager.fila_cheia(p)]
+    if prioridades_cheias:
+        if situacao_fila['modo_overflow'] == 'rejeitar':
+            st.error(f"🚫 Fila cheia para a(s) prioridade(s): {', '.join(prioridades_cheias)}. Novas solicitações nessas prioridades estão temporariamente bloqueadas.")
+        elif situacao_fila['modo_overflow'] == 'espera':
+            st.warning(f"⏳ Fila cheia para a(s) prioridade(s): {', '.join(prioridades_cheias)}. Novas solicitações entrarão na lista de espera.")
+        else:
+            st.warning(f"⚠️ Fila cheia para a(s) prioridade(s): {', '.join(prioridades_cheias)}. Solicitações iguais a um ticket pendente serão mescladas a ele.")
 
     # Inicializa o estado do funil
     if 'form_step' not in st.session_state:
@@ -221,13 +286,31 @@ def page_nova_solicitacao(fila_manager, email_notifier, sms_notifier):
                 value=st.session_state.get('aceita_termos', False)
             )
 
+            fila_cheia = st.session_state.prioridade in prioridades_cheias
+            bloqueado = fila_cheia and situacao_fila['modo_overflow'] == 'rejeitar'
+            if bloqueado:
+                st.markdown("""
+                <div style="
+                    background: #f8d7da;
+                    border: 1px solid #f5c6cb;
+                    color: #721c24;
+                    padding: 15px;
+                    border-radius: 8px;
+                    text-align: center;
+                ">
+                    <h4 style="margin: 0;">🚫 Fila cheia</h4>
+                    <p style="margin: 5px 0 0 0;"><strong>A fila atingiu o limite para a prioridade {}.</strong></p>
+                    <small>Tente novamente mais tarde ou procure o suporte em caso de urgência.</small>
+                </div>
+                """.format(st.session_state.prioridade), unsafe_allow_html=True)
+            
             col_prev, col_submit = st.columns(2)
             with col_prev:
                 if st.form_submit_button("Anterior"): # type: ignore
                     st.session_state.form_step = 1
                     st.rerun()
             with col_submit:
-                submitted = st.form_submit_button("🚀 Enviar Solicitação")
+                submitted = st.form_submit_button("🚀 Enviar Solicitação", disabled=bloqueado)
 
                 if submitted:
                     if not st.session_state.aceita_termos:
@@ -245,9 +328,29 @@ def page_nova_solicitacao(fila_manager, email_notifier, sms_notifier):
                             'prioridade': st.session_state.prioridade
                         }
                         
+                        # Reenvio da mesma solicitação (duplo clique, página recarregada)
+                        ticket_existente = fila_manager.buscar_duplicata(dados_solicitacao)
+                        if ticket_existente:
+                            st.info(f"ℹ️ Esta solicitação já foi registrada no ticket #{ticket_existente}. Nenhum ticket novo foi criado.")
+                            posicao_existente = fila_manager.obter_posicao_fila(ticket_existente)
+                            if posicao_existente > 0:
+                                eta_existente = fila_manager.obter_previsao_conclusao(ticket_existente)
+                                st.caption(f"Sua solicitação está na posição {posicao_existente} da fila · "
+                                           f"previsão de conclusão: {formatar_eta(eta_existente)}")
+                            st.stop()
+                        
                         # Adiciona à fila
-                        ticket_id = fila_manager.adicionar_solicitacao(dados_solicitacao)
+                        try:
+                            ticket_id = fila_manager.adicionar_solicitacao(dados_solicitacao)
+                        except FilaCheiaError as e:
+                            st.error(f"🚫 {str(e)}. Tente novamente mais tarde.")
+                            st.stop()
+                        
+                        if fila_manager.em_espera(ticket_id):
+                            st.warning(f"⏳ A fila está cheia. O ticket #{ticket_id} entrou na lista de espera na posição {fila_manager.obter_posicao_espera(ticket_id)} e será liberado assim que houver vaga.")
+                        
                         posicao_fila = fila_manager.obter_posicao_fila(ticket_id)
+                        eta = fila_manager.obter_previsao_conclusao(ticket_id)
                         
                         # Exibe sucesso com destaque
                         st.balloons()
@@ -271,31 +374,36 @@ def page_nova_solicitacao(fila_manager, email_notifier, sms_notifier):
                         """.format(ticket_id), unsafe_allow_html=True)
                         
                         # Métricas do ticket
-                        col1, col2, col3 = st.columns(3)
+                        col1, col2, col3, col4 = st.columns(4)
                         with col1:
                             st.metric("🎫 Ticket", f"#{ticket_id}")
                         with col2:
                             st.metric("📍 Posição na Fila", posicao_fila)
                         with col3:
                             st.metric("⏱️ Status", "Pendente")
+                        with col4:
+                            st.metric("🕒 Previsão", eta.strftime('%d/%m %H:%M') if eta else "Sem previsão",
+                                      help="Estimativa pela posição na fila e pelo ritmo de atendimento "
+                                           "das últimas semanas no mesmo dia da semana e horário")
                         
                         # Progress bar
                         progress_value = min(posicao_fila / app_config.max_fila_size, 1.0)
                         st.progress(1 - progress_value)
-                        st.caption(f"Sua solicitação está na posição {posicao_fila} da fila")
+                        st.caption(f"Sua solicitação está na posição {posicao_fila} da fila · "
+                                   f"previsão de conclusão: {formatar_eta(eta)}")
                         
                         # Envio de notificações
                         with st.spinner("📧 Enviando notificações..."):
                             # Email
                             email_enviado = email_notifier.enviar_confirmacao_ticket(
-                                st.session_state.email, ticket_id, posicao_fila
+                                st.session_state.email, ticket_id, posicao_fila, eta
                             )
                             
                             # SMS (se telefone fornecido)
                             sms_enviado = False
                             if st.session_state.telefone:
                                 sms_enviado = sms_notifier.enviar_sms_ticket(
-                                    st.session_state.telefone, ticket_id, posicao_fila
+                                    st.session_state.telefone, ticket_id, posicao_fila, eta
                                 )
                         
                         # Status das notificações com ícones e cores
@@ -430,6 +538,41 @@ def page_dashboard(fila_manager):
             help="Tickets finalizados"
         )
     
+    # Solicitantes do mês (contagem aproximada com HyperLogLog, lida do rollup)
+    inicio_mes = date.today().replace(day=1)
+    agregados_mes = fila_manager.rollup.agregados(inicio=inicio_mes)
+    solicitantes = agregados_mes.metricas_solicitantes('geral').get('', {})
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric(
+            "👥 Solicitantes Únicos (mês)",
+            f"~{solicitantes['unicos']}" if solicitantes else 0,
+            help="Pessoas distintas (por e-mail) que abriram tickets desde o dia 1º; valor aproximado"
+        )
+    
+    with col2:
+        st.metric(
+            "🔁 Taxa de Recorrência (mês)",
+            f"{solicitantes['recorrencia']:.0%}" if solicitantes else "-",
+            help="Fração dos pedidos do mês feita por quem já tinha pedido antes no mês"
+        )
+    
+    with col3:
+        st.metric(
+            "💻 Dispositivos Distintos (mês)",
+            sum(1 for quantidade in agregados_mes.dispositivos.values() if quantidade > 0),
+            help="Tipos de dispositivo solicitados desde o dia 1º"
+        )
+    
+    por_squad = agregados_mes.metricas_solicitantes('squad_leader')
+    if por_squad:
+        with st.expander("👥 Solicitantes únicos por squad leader (mês)"):
+            tabela = pd.DataFrame.from_dict(por_squad, orient='index')
+            tabela.index.name = 'Squad Leader'
+            tabela.columns = ['Solicitantes (aprox.)', 'Pedidos', 'Recorrência']
+            st.dataframe(tabela, use_container_width=True)
+    
     # Gráficos
     col1, col2 = st.columns(2)
     
@@ -455,11 +598,47 @@ def page_dashboard(fila_manager):
         else:
             st.info("Nenhum dispositivo solicitado ainda.")
     
+    # Timeline dos últimos 30 dias (lida do rollup diário)
+    timeline = fila_manager.rollup.serie_diaria(inicio=date.today() - timedelta(days=30))
+    fig_timeline = render_timeline_chart(timeline)
+    if fig_timeline is not None:
+        st.plotly_chart(fig_timeline, use_container_width=True)
+    
+    # Chegadas e conclusões por dia da semana e hora (histograma mantido no rollup)
+    st.subheader("🗓️ Carga por Dia da Semana e Hora")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        evento_mapa = st.radio("Evento", ["chegada", "conclusao"], horizontal=True,
+                               format_func=lambda evento: {'chegada': 'Chegadas', 'conclusao': 'Conclusões'}[evento])
+    with col2:
+        dias_mapa = st.selectbox("Período", [30, 90, 365, None],
+                                 format_func=lambda dias: f"Últimos {dias} dias" if dias else "Todo o histórico")
+    with col3:
+        prioridades_mapa = st.multiselect("Prioridade", ["Normal", "Alta", "Urgente"], key="prioridades_mapa")
+    mapa = fila_manager.rollup.mapa_horarios(
+        inicio=date.today() - timedelta(days=dias_mapa - 1) if dias_mapa else None,
+        evento=evento_mapa,
+        prioridades=prioridades_mapa
+    )
+    fig_mapa = render_mapa_horarios(mapa, "Chegadas por Horário" if evento_mapa == 'chegada' else "Conclusões por Horário")
+    if fig_mapa is not None:
+        st.plotly_chart(fig_mapa, use_container_width=True)
+    else:
+        st.info("Nenhum ticket no período selecionado.")
+    
+    # Projeção da fila para os próximos 7 dias (taxas por dia da semana e hora)
+    fig_projecao = render_projecao_backlog(fila_manager.projetar_backlog())
+    if fig_projecao is not None:
+        st.plotly_chart(fig_projecao, use_container_width=True)
+        st.caption("Pendentes esperados com as chegadas e atendimentos médios das últimas "
+                   f"{app_config.previsao_semanas} semanas em cada dia da semana e horário")
+    
     # Tabela de tickets recentes
     st.subheader("🕒 Tickets Recentes")
-    df_completo = fila_manager.obter_dados_completos()
+    # Só os 10 mais recentes, lidos dos últimos dias (o resto do dashboard vem do rollup)
+    df_recentes = fila_manager.obter_recentes(10)
     
-    if not df_completo.empty:
+    if not df_recentes.empty:
         # Controles de visualização
         col_controls1, col_controls2 = st.columns([3, 1])
         
@@ -531,9 +710,6 @@ def page_dashboard(fila_manager):
                     st.session_state.selected_columns = ['id', 'nome', 'dispositivos', 'status', 'prioridade', 'data_criacao']
                     st.rerun()
         
-        # Mostra os 10 mais recentes
-        df_recentes = df_completo.sort_values('data_criacao', ascending=False).head(10)
-        
         # Seleciona colunas para exibição baseado na seleção do usuário
         if 'selected_columns' in st.session_state and st.session_state.selected_columns:
             colunas_exibicao = [col for col in st.session_state.selected_columns if col in df_recentes.columns]
@@ -568,44 +744,194 @@ def page_dashboard(fila_manager):
     else:
         st.info("Nenhum ticket registrado ainda.")
 
-def page_relatorios(report_generator):
+def page_relatorios(report_generator, jobs, agendador):
     """Página de relatórios"""
     st.subheader("📈 Relatórios e Análises")
     
+    # Recorte aplicado aos dados gerais, aos gráficos e ao relatório completo
+    periodos = {
+        'todo_historico': 'Todo o histórico',
+        'ultimos_30_dias': 'Últimos 30 dias',
+        'mes_atual': 'Mês atual',
+        'ano_atual': 'Ano atual',
+        'personalizado': 'Personalizado'
+    }
+    with st.expander("🔎 Filtros dos relatórios"):
+        col_periodo, col_status, col_prioridade, col_squad = st.columns(4)
+        with col_periodo:
+            periodo = st.selectbox("Período de criação", list(periodos), format_func=periodos.get)
+            if periodo == 'personalizado':
+                datas = list(st.date_input("Datas", value=[], key="periodo_relatorio")) + [None, None]
+                inicio, fim = datas[0], datas[1] or datas[0]
+            else:
+                inicio, fim = periodo_relatorio(periodo)
+        with col_status:
+            status_relatorio = st.multiselect("Status", ["Pendente", "Em andamento", "Concluída"],
+                                              key="status_relatorio")
+        with col_prioridade:
+            prioridades_relatorio = st.multiselect("Prioridade", ["Normal", "Alta", "Urgente"],
+                                                   key="prioridades_relatorio")
+        with col_squad:
+            squad_relatorio = st.selectbox("Squad Leader", ["Todos"] + report_generator.rollup.squad_leaders(),
+                                           key="squad_relatorio")
+        comparar = st.checkbox("Comparar com o mesmo período do ano anterior", disabled=inicio is None)
+    
+    filtro = FiltroRelatorio(
+        inicio=inicio,
+        fim=fim,
+        squad_leader=None if squad_relatorio == "Todos" else squad_relatorio,
+        status=status_relatorio,
+        prioridades=prioridades_relatorio
+    )
+    if filtro == FiltroRelatorio():
+        filtro = None
+    else:
+        st.caption(f"🔎 {filtro.descricao()}")
+    
     col1, col2 = st.columns([2, 1])
     
     with col2:
+        # Relatórios padrão pré-calculados pelo agendador (cli.py agendar)
+        st.subheader("🗓️ Relatórios Prontos")
+        precomputados = agendador.indice()
+        if precomputados:
+            nome_padrao = st.selectbox(
+                "Relatório",
+                list(precomputados),
+                format_func=lambda nome: precomputados[nome]['titulo']
+            )
+            entrada = precomputados[nome_padrao]
+            gerado_em = datetime.fromisoformat(entrada['gerado_em'])
+            st.caption(f"Gerado em {gerado_em.strftime('%d/%m/%Y às %H:%M')}")
+            
+            if os.path.exists(entrada['relatorio_html']):
+                with open(entrada['relatorio_html'], 'rb') as f:
+                    st.download_button(
+                        "📄 Baixar Relatório Pronto",
+                        f.read(),
+                        file_name=f"relatorio_mavi_{nome_padrao.replace(':', '_')}_{gerado_em.strftime('%Y%m%d')}.html",
+                        mime="text/html",
+                        use_container_width=True
+                    )
+            
+            # Só oferece regenerar quando os dados mudaram desde o pré-cálculo
+            if agendador.desatualizado(entrada):
+                st.warning("⚠️ Os dados mudaram desde que este relatório foi gerado.")
+                if st.button("🔄 Regenerar agora", use_container_width=True):
+                    st.session_state.job_relatorio = jobs.submeter(
+                        'precomputado',
+                        lambda progresso: agendador.precomputar([nome_padrao], progresso=progresso)[nome_padrao],
+                        {'relatorio': nome_padrao, 'versao': report_generator.storage.revisao()}
+                    )
+        else:
+            st.caption("Nenhum relatório pré-calculado ainda (execute `python cli.py agendar`).")
+        
         st.subheader("🔧 Gerar Relatórios")
         
+        # O relatório completo roda em segundo plano; a sessão guarda apenas o ID do job
         if st.button("📊 Gerar Relatório Completo", use_container_width=True):
-            with st.spinner("Gerando relatório..."):
-                try:
-                    resultado = report_generator.gerar_relatorio_completo()
-                    
-                    st.success("✅ Relatório gerado com sucesso!")
-                    
-                    # Links para download
-                    if os.path.exists(resultado['relatorio_html']):
-                        with open(resultado['relatorio_html'], 'rb') as f:
-                            st.download_button(
-                                "📄 Baixar Relatório HTML",
-                                f.read(),
-                                file_name=f"relatorio_mavi_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html",
-                                mime="text/html"
-                            )
-                    
-                    # Exibe gráficos se existirem
-                    for nome, caminho in resultado['graficos'].items():
-                        if caminho and os.path.exists(caminho):
-                            st.markdown(f"**{nome.title()}:** [Visualizar]({caminho})")
+            st.session_state.job_relatorio = jobs.submeter(
+                'completo',
+                lambda progresso: report_generator.gerar_relatorio_completo(progresso=progresso, filtro=filtro),
+                {'versao': report_generator.storage.revisao(), 'filtro': filtro.parametros() if filtro else None}
+            )
+        
+        job = jobs.obter(st.session_state.get('job_relatorio', ''))
+        if job is not None:
+            if job.ativo:
+                st.info(f"⏳ Relatório #{job.id}: {job.etapa or job.status}")
+                st.progress(job.progresso)
+                st.button("🔄 Atualizar andamento", use_container_width=True)
+            elif job.status == 'Erro':
+                st.error(f"❌ Erro ao gerar relatório: {job.erro}")
+            else:
+                resultado = job.resultado
+                st.success(f"✅ Relatório #{job.id} gerado com sucesso!")
                 
-                except Exception as e:
-                    st.error(f"❌ Erro ao gerar relatório: {str(e)}")
+                # Links para download
+                if os.path.exists(resultado['relatorio_html']):
+                    with open(resultado['relatorio_html'], 'rb') as f:
+                        st.download_button(
+                            "📄 Baixar Relatório HTML",
+                            f.read(),
+                            file_name=f"relatorio_mavi_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html",
+                            mime="text/html"
+                        )
+                
+                # Exibe gráficos se existirem
+                for nome, caminho in resultado['graficos'].items():
+                    if caminho and os.path.exists(caminho):
+                        st.markdown(f"**{nome.title()}:** [Visualizar]({caminho})")
+        
+        # Um relatório por squad leader, gerados juntos a partir de uma única leitura dos dados
+        if st.button("👥 Relatórios por Squad Leader", use_container_width=True):
+            st.session_state.job_lote_squads = jobs.submeter(
+                'lote_squads',
+                lambda progresso: report_generator.gerar_relatorios_por_squad(progresso=progresso, filtro=filtro),
+                {'versao': report_generator.storage.revisao(), 'filtro': filtro.parametros() if filtro else None}
+            )
+        
+        job_lote = jobs.obter(st.session_state.get('job_lote_squads', ''))
+        if job_lote is not None:
+            if job_lote.ativo:
+                st.info(f"⏳ Lote #{job_lote.id}: {job_lote.etapa or job_lote.status}")
+                st.progress(job_lote.progresso)
+            elif job_lote.status == 'Erro':
+                st.error(f"❌ Erro ao gerar relatórios por squad leader: {job_lote.erro}")
+            elif not job_lote.resultado['relatorios']:
+                st.info("Nenhum ticket com squad leader no recorte selecionado.")
+            else:
+                manifesto = job_lote.resultado
+                st.success(f"✅ {len(manifesto['relatorios'])} relatórios gerados em `{manifesto['diretorio']}`")
+                item_squad = st.selectbox(
+                    "Relatório do squad leader",
+                    manifesto['relatorios'],
+                    format_func=lambda item: f"{item['squad_leader']} ({item['total_tickets']} tickets)"
+                )
+                if os.path.exists(item_squad['arquivo']):
+                    with open(item_squad['arquivo'], 'rb') as f:
+                        st.download_button(
+                            "📄 Baixar Relatório do Squad",
+                            f.read(),
+                            file_name=f"relatorio_mavi_{os.path.basename(item_squad['arquivo'])}",
+                            mime="text/html",
+                            use_container_width=True
+                        )
+                st.markdown(f"[Índice dos relatórios]({manifesto['indice']})")
+        
+        jobs_recentes = jobs.listar()
+        if jobs_recentes:
+            with st.expander("🗂️ Jobs recentes"):
+                for job_recente in jobs_recentes[:10]:
+                    duracao = f" em {job_recente.duracao_segundos:.1f}s" if job_recente.duracao_segundos is not None and not job_recente.ativo else ""
+                    st.write(f"**#{job_recente.id}** · {job_recente.criado_em.strftime('%d/%m %H:%M')} · {job_recente.status}{duracao}")
+        
+        # Relatórios já gerados, listados pelo catálogo (sem varrer o diretório)
+        anteriores = report_generator.catalogo.listar('completo')
+        if anteriores:
+            with st.expander("📚 Relatórios anteriores"):
+                indice_anterior = st.selectbox(
+                    "Relatório",
+                    range(len(anteriores)),
+                    format_func=lambda i: (
+                        f"{datetime.fromisoformat(anteriores[i]['criado_em']).strftime('%d/%m %H:%M')} · "
+                        f"{anteriores[i]['descricao']} ({anteriores[i]['bytes'] / 1024 / 1024:.1f} MB)"
+                    )
+                )
+                anterior = anteriores[indice_anterior]
+                if os.path.exists(anterior['arquivo']):
+                    with open(anterior['arquivo'], 'rb') as f:
+                        st.download_button(
+                            "📄 Baixar",
+                            f.read(),
+                            file_name=f"relatorio_mavi_{datetime.fromisoformat(anterior['criado_em']).strftime('%Y%m%d_%H%M%S')}.html",
+                            mime="text/html"
+                        )
         
         if st.button("📊 Gráfico de Status", use_container_width=True):
             with st.spinner("Gerando gráfico..."):
                 try:
-                    caminho = report_generator.gerar_grafico_status()
+                    caminho = report_generator.gerar_grafico_status(filtro=filtro)
                     if caminho:
                         st.success("✅ Gráfico gerado!")
                         st.markdown(f"[Visualizar Gráfico]({caminho})")
@@ -615,7 +941,7 @@ def page_relatorios(report_generator):
         if st.button("💻 Gráfico de Dispositivos", use_container_width=True):
             with st.spinner("Gerando gráfico..."):
                 try:
-                    caminho = report_generator.gerar_grafico_dispositivos()
+                    caminho = report_generator.gerar_grafico_dispositivos(filtro=filtro)
                     if caminho:
                         st.success("✅ Gráfico gerado!")
                         st.markdown(f"[Visualizar Gráfico]({caminho})")
@@ -626,25 +952,74 @@ def page_relatorios(report_generator):
         st.subheader("📋 Dados Gerais")
         
         # Estatísticas gerais
-        relatorio_geral = report_generator.gerar_relatorio_geral()
+        relatorio_geral = report_generator.gerar_relatorio_geral(filtro=filtro)
+        
+        # Variação em relação ao mesmo período do ano anterior
+        anterior = {}
+        if comparar and filtro is not None and filtro.inicio:
+            anterior = report_generator.gerar_relatorio_geral(filtro=filtro.ano_anterior())
+        
+        def variacao(campo):
+            return relatorio_geral[campo] - anterior[campo] if anterior else None
         
         # Exibe métricas
         col_a, col_b, col_c = st.columns(3)
         
         with col_a:
-            st.metric("📊 Total de Tickets", relatorio_geral['total_tickets'])
-            st.metric("⏳ Pendentes", relatorio_geral['pendentes'])
+            st.metric("📊 Total de Tickets", relatorio_geral['total_tickets'], variacao('total_tickets'))
+            st.metric("⏳ Pendentes", relatorio_geral['pendentes'], variacao('pendentes'), delta_color="inverse")
         
         with col_b:
-            st.metric("🔄 Em Andamento", relatorio_geral['em_andamento'])
-            st.metric("✅ Concluídos", relatorio_geral['concluidos'])
+            st.metric("🔄 Em Andamento", relatorio_geral['em_andamento'], variacao('em_andamento'))
+            st.metric("✅ Concluídos", relatorio_geral['concluidos'], variacao('concluidos'))
         
         with col_c:
             st.metric(
                 "⏱️ Tempo Médio (horas)",
-                f"{relatorio_geral['tempo_medio_resolucao_horas']:.1f}"
+                f"{relatorio_geral['tempo_medio_resolucao_horas']:.1f}",
+                f"{variacao('tempo_medio_resolucao_horas'):+.1f}" if anterior else None,
+                delta_color="inverse"
+            )
+            st.metric(
+                "🕘 Tempo Médio (horas úteis)",
+                f"{relatorio_geral['tempo_medio_resolucao_horas_uteis']:.1f}",
+                f"{variacao('tempo_medio_resolucao_horas_uteis'):+.1f}" if anterior else None,
+                delta_color="inverse",
+                help="Só o horário comercial conta; fins de semana e feriados ficam de fora"
             )
         
+        # Percentis do tempo de resolução (menos sensíveis a tickets esquecidos que a média)
+        percentis = relatorio_geral.get('percentis_resolucao_horas')
+        if percentis:
+            st.subheader("⏱️ Tempo de Resolução (horas)")
+            col_p50, col_p90, col_p99 = st.columns(3)
+            col_p50.metric("Mediana (p50)", f"{percentis['p50']:.1f}")
+            col_p90.metric("p90", f"{percentis['p90']:.1f}")
+            col_p99.metric("p99", f"{percentis['p99']:.1f}")
+            
+            rotulos = {'prioridade': 'Prioridade', 'squad_leader': 'Squad Leader', 'dispositivo': 'Dispositivo'}
+            with st.expander("Percentis por prioridade, squad leader e dispositivo"):
+                for dimensao, rotulo in rotulos.items():
+                    por_valor = relatorio_geral['percentis_resolucao_por'].get(dimensao)
+                    if por_valor:
+                        tabela = pd.DataFrame.from_dict(por_valor, orient='index')
+                        tabela.index.name = rotulo
+                        st.dataframe(tabela, use_container_width=True)
+        
+        # SLA em horas úteis (um ticket aberto na sexta à noite não acumula o fim de semana)
+        percentis_uteis = relatorio_geral.get('percentis_resolucao_horas_uteis')
+        if percentis_uteis:
+            st.subheader("🕘 SLA em Horas Úteis")
+            col_p50, col_p90, col_p99 = st.columns(3)
+            col_p50.metric("Mediana (p50)", f"{percentis_uteis['p50']:.1f}")
+            col_p90.metric("p90", f"{percentis_uteis['p90']:.1f}")
+            col_p99.metric("p99", f"{percentis_uteis['p99']:.1f}")
+            por_prioridade = relatorio_geral.get('percentis_resolucao_uteis_por_prioridade')
+            if por_prioridade:
+                tabela = pd.DataFrame.from_dict(por_prioridade, orient='index')
+                tabela.index.name = 'Prioridade'
+                st.dataframe(tabela, use_container_width=True)
+        
         # Top dispositivos
         if relatorio_geral['dispositivos_mais_solicitados']:
             st.subheader("🏆 Top 5 Dispositivos")
@@ -653,12 +1028,13 @@ def page_relatorios(report_generator):
             for i, (dispositivo, count) in enumerate(top_dispositivos, 1):
                 st.write(f"{i}. **{dispositivo}**: {count} solicitações")
 
-def page_administracao(fila_manager, email_notifier):
+def page_administracao(fila_manager, email_notifier, exportador, analitico):
     """Página de administração"""
     st.subheader("⚙️ Administração do Sistema")
     
     # Interface de administração
-    tab1, tab2, tab3 = st.tabs(["🎫 Gerenciar Tickets", "📊 Dados", "⚙️ Configurações"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["🎫 Gerenciar Tickets", "📊 Dados", "⚙️ Configurações",
+                                            "📥 Importar Histórico", "🧮 SQL Analítico"])
     
     with tab1:
         st.subheader("Gerenciamento de Tickets")
@@ -672,7 +1048,7 @@ def page_administracao(fila_manager, email_notifier):
             with col1:
                 status_filter = st.selectbox(
                     "Filtrar por Status",
-                    ["Todos", "Pendente", "Em andamento", "Concluída"]
+                    ["Todos", "Pendente", "Em espera", "Em andamento", "Concluída"]
                 )
             
             with col2:
@@ -690,6 +1066,17 @@ def page_administracao(fila_manager, email_notifier):
             if prioridade_filter != "Todas":
                 df_filtrado = df_filtrado[df_filtrado['prioridade'] == prioridade_filter]
             
+            # Ordem de atendimento (prioridade com envelhecimento)
+            proximo_ticket = fila_manager.obter_proximo_ticket()
+            if proximo_ticket:
+                st.info(f"🎯 Próximo ticket a atender: #{proximo_ticket}")
+            
+            previsoes = fila_manager.obter_previsoes()
+            ordem_atendimento = {ticket: i for i, ticket in enumerate(previsoes, 1)}
+            df_filtrado.insert(0, 'posicao_fila', df_filtrado['id'].astype(str).map(ordem_atendimento))
+            df_filtrado.insert(1, 'previsao_conclusao', df_filtrado['id'].astype(str).map(previsoes))
+            df_filtrado = df_filtrado.sort_values('posicao_fila', na_position='last')
+            
             # Exibe tabela
             st.dataframe(df_filtrado, use_container_width=True)
             
@@ -709,17 +1096,32 @@ def page_administracao(fila_manager, email_notifier):
             
             with col4:
                 if st.button("Atualizar"):
-                    if fila_manager.atualizar_status(ticket_id, novo_status, observacoes):
-                        st.success("✅ Status atualizado!")
+                    try:
+                        atualizado = fila_manager.atualizar_status(ticket_id, novo_status, observacoes)
+                    except FilaCheiaError as e:
+                        st.error(f"🚫 Não foi possível reabrir: {e}")
+                        atualizado = None
+                    if isinstance(atualizado, str):
+                        # Fila cheia no modo mesclar: o ticket continua concluído
+                        st.info(f"🔀 Fila cheia: a reabertura foi mesclada ao ticket #{atualizado}; "
+                                f"o ticket #{ticket_id} não mudou de status.")
+                    elif atualizado:
+                        status_notificado = novo_status
+                        if novo_status == "Pendente" and fila_manager.em_espera(ticket_id):
+                            status_notificado = "Em espera"
+                            st.warning(f"⏳ Fila cheia: ticket reaberto na lista de espera "
+                                       f"(posição {fila_manager.obter_posicao_espera(ticket_id)}).")
+                        else:
+                            st.success("✅ Status atualizado!")
                         
                         # Envia notificação por email
                         ticket_data = df_completo[df_completo['id'] == ticket_id].iloc[0]
                         email_notifier.enviar_atualizacao_status(
-                            ticket_data['email'], ticket_id, novo_status, observacoes
+                            ticket_data['email'], ticket_id, status_notificado, observacoes
                         )
                         
                         st.rerun()
-                    else:
+                    elif atualizado is not None:
                         st.error("❌ Erro ao atualizar status!")
         else:
             st.info("Nenhum ticket encontrado.")
@@ -727,22 +1129,59 @@ def page_administracao(fila_manager, email_notifier):
     with tab2:
         st.subheader("Exportar Dados")
         
-        df_completo = fila_manager.obter_dados_completos()
+        # Totais e squad leaders vêm do rollup; a fila só é lida ao preparar o arquivo
+        fila_manager.rollup.sincronizar()
+        total_registros, primeiro_dia, ultimo_dia = fila_manager.rollup.totais()
         
-        if not df_completo.empty:
-            # Botão de download CSV
-            csv = df_completo.to_csv(index=False)
-            st.download_button(
-                "📥 Baixar dados em CSV",
-                csv,
-                file_name=f"tickets_mavi_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv"
+        if total_registros:
+            # Colunas e filtros da exportação
+            colunas_exportacao = st.multiselect("Colunas", COLUNAS_FILA, default=COLUNAS_FILA)
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                status_exportacao = st.multiselect("Status", ["Pendente", "Em andamento", "Concluída"])
+                periodo_exportacao = st.date_input("Período de criação", value=[], key="periodo_exportacao")
+            with col2:
+                prioridades_exportacao = st.multiselect("Prioridade", ["Normal", "Alta", "Urgente"])
+                squads = fila_manager.rollup.squad_leaders()
+                squad_exportacao = st.selectbox("Squad Leader", ["Todos"] + squads)
+            
+            formato = st.radio("Formato", list(FORMATOS), format_func=lambda f: {'csv': 'CSV', 'xlsx': 'Excel'}[f],
+                               horizontal=True)
+            
+            periodo_exportacao = list(periodo_exportacao) + [None, None]
+            filtro_exportacao = FiltroRelatorio(
+                inicio=periodo_exportacao[0],
+                fim=periodo_exportacao[1] or periodo_exportacao[0],
+                squad_leader=None if squad_exportacao == "Todos" else squad_exportacao,
+                status=status_exportacao,
+                prioridades=prioridades_exportacao
             )
+            pedido = (formato, tuple(colunas_exportacao), filtro_exportacao)
+            
+            # O arquivo só é gerado ao clicar; downloads repetidos da mesma versão reaproveitam o arquivo
+            if st.button("📦 Preparar arquivo"):
+                try:
+                    with st.spinner("Gerando arquivo..."):
+                        caminho = exportador.exportar(formato, colunas_exportacao, filtro_exportacao)
+                    st.session_state.exportacao = {'pedido': pedido, 'caminho': caminho}
+                except (ValueError, ImportError) as e:
+                    st.error(f"❌ Erro na exportação: {str(e)}")
+            
+            exportacao = st.session_state.get('exportacao')
+            if exportacao and exportacao['pedido'] == pedido and os.path.exists(exportacao['caminho']):
+                with open(exportacao['caminho'], 'rb') as f:
+                    st.download_button(
+                        f"📥 Baixar dados em {'Excel' if formato == 'xlsx' else 'CSV'}",
+                        f,
+                        file_name=f"tickets_mavi_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{formato}",
+                        mime=FORMATOS[formato]
+                    )
             
             # Estatísticas
             st.subheader("Estatísticas dos Dados")
-            st.write(f"**Total de registros:** {len(df_completo)}")
-            st.write(f"**Período:** {df_completo['data_criacao'].min()} a {df_completo['data_criacao'].max()}")
+            st.write(f"**Total de registros:** {total_registros}")
+            st.write(f"**Período:** {primeiro_dia} a {ultimo_dia}")
         else:
             st.info("Nenhum dado para exportar.")
     
@@ -758,14 +1197,109 @@ E-mail remetente: {email_config.sender_email}
         
         st.write("**Configurações da Aplicação:**")
         st.code(f"""
+Armazenamento: {app_config.storage_backend}{f' ({app_config.sqlite_file})' if app_config.storage_backend == 'sqlite' else ''}
 Arquivo da fila: {app_config.fila_file}
 Diretório de relatórios: {app_config.relatorios_dir}
 Tamanho máximo da fila: {app_config.max_fila_size}
+Limites por prioridade: {', '.join(f'{p}: {l}' for p, l in app_config.limites_por_prioridade.items())}
+Modo de overflow: {app_config.modo_overflow}
+Lista de espera: {app_config.lista_espera_file}
+Envelhecimento (horas de atraso por prioridade): {', '.join(f'{p}: {h}' for p, h in app_config.envelhecimento_horas.items())}
+Janela de duplicidade: {app_config.janela_duplicidade_segundos}s
+Modo analítico: {'ativo' if analitico else 'inativo'} (limite de {app_config.analitico_limite_linhas} linhas, {app_config.analitico_timeout_segundos}s por consulta)
+Horas úteis (SLA): {app_config.sla_expediente}, dias {app_config.sla_dias_semana} (seg-dom), feriados da empresa: {app_config.sla_feriados_empresa or 'nenhum'}
         """)
         
         if st.button("🔄 Limpar Cache"):
             st.cache_resource.clear()
             st.success("✅ Cache limpo!")
+    
+    with tab4:
+        st.subheader("Importar Histórico de Tickets")
+        st.write("Envie um CSV ou XLSX exportado da ferramenta anterior. O arquivo é lido em blocos, "
+                 "as colunas são mapeadas para o formato da fila e linhas inválidas são listadas sem interromper a importação.")
+        
+        arquivo = st.file_uploader("Arquivo de histórico", type=['csv', 'xlsx'])
+        simular = st.checkbox("Apenas validar (não gravar)", value=True)
+        
+        if arquivo is not None and st.button("📥 Importar"):
+            erros_file = os.path.join(app_config.data_dir, 'importacao_erros.csv')
+            progresso_texto = st.empty()
+            
+            try:
+                with st.spinner("Importando histórico..."):
+                    resultado = importar_historico(
+                        arquivo,
+                        fila_manager.storage,
+                        erros_file=erros_file,
+                        simular=simular,
+                        progresso=lambda linhas: progresso_texto.caption(f"{linhas} linhas processadas...")
+                    )
+            except (ValueError, ImportError) as e:
+                st.error(f"❌ Erro na importação: {str(e)}")
+            else:
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("📄 Linhas lidas", resultado['linhas_lidas'])
+                with col2:
+                    st.metric("✅ Válidas" if simular else "✅ Importadas", resultado['importadas'])
+                with col3:
+                    st.metric("❌ Rejeitadas", resultado['rejeitadas'])
+                
+                if simular:
+                    st.info("Simulação concluída: nada foi gravado. Desmarque a opção para importar.")
+                else:
+                    st.success("✅ Importação concluída!")
+                
+                if resultado['amostra_erros']:
+                    st.write("**Primeiros erros encontrados:**")
+                    st.dataframe(pd.DataFrame(resultado['amostra_erros']), use_container_width=True)
+                if resultado['erros_file']:
+                    with open(resultado['erros_file'], 'rb') as f:
+                        st.download_button(
+                            "📥 Baixar relatório de erros",
+                            f.read(),
+                            file_name="importacao_erros.csv",
+                            mime="text/csv"
+                        )
+    
+    with tab5:
+        st.subheader("Consultas SQL sobre o Histórico")
+        if analitico is None:
+            st.info("Modo analítico indisponível: instale o pacote duckdb (pip install duckdb) e defina MAVI_ANALITICO=1.")
+        else:
+            st.write("Consultas de leitura (DuckDB) sobre a tabela `tickets`, atualizada a cada mudança nos dados. "
+                     "As datas são TIMESTAMP e as demais colunas, texto.")
+            
+            consulta_salva = st.selectbox(
+                "Consulta salva",
+                list(CONSULTAS_SALVAS),
+                format_func=lambda nome: CONSULTAS_SALVAS[nome]['titulo']
+            )
+            sql = st.text_area("SQL", value=CONSULTAS_SALVAS[consulta_salva]['sql'], height=220,
+                               key=f"sql_{consulta_salva}")
+            limite = st.number_input("Limite de linhas", min_value=1, max_value=app_config.analitico_limite_linhas,
+                                     value=app_config.analitico_limite_linhas)
+            
+            if st.button("▶️ Executar consulta"):
+                inicio = datetime.now()
+                try:
+                    with st.spinner("Executando consulta..."):
+                        resultado, truncado = analitico.consultar(sql, limite=int(limite))
+                except (ValueError, TimeoutError) as e:
+                    st.error(f"❌ {str(e)}")
+                else:
+                    duracao = (datetime.now() - inicio).total_seconds()
+                    st.caption(f"{len(resultado)} linhas em {duracao:.2f}s")
+                    if truncado:
+                        st.warning(f"⚠️ Resultado limitado às primeiras {int(limite)} linhas.")
+                    st.dataframe(resultado, use_container_width=True)
+                    st.download_button(
+                        "📥 Baixar resultado em CSV",
+                        resultado.to_csv(index=False),
+                        file_name=f"consulta_{consulta_salva}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                        mime="text/csv"
+                    )
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,121 @@
+"""
+Benchmark dos relatórios sobre um histórico sintético grande
+
+Compara o fluxo anterior de ``gerar_relatorio_completo`` (quatro leituras do
+CSV e dois laços iterrows sobre os dispositivos) com o motor de relatórios,
+que lê um único snapshot e calcula todos os agregados em uma passada.
+
+Uso:
+    python benchmarks/bench_relatorios.py --linhas 200000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from report_engine import calcular_agregados, carregar_snapshot
+from storage import COLUNAS_FILA, CSVStorage
+
+DISPOSITIVOS = ['Fones de ouvido', 'Teclado', 'Mouse', 'Monitor', 'Webcam',
+                'Headset', 'Carregador', 'Cabo HDMI', 'Hub USB', 'Notebook']
+
+def gerar_historico(caminho: str, linhas: int, seed: int = 42):
+    """Grava um histórico sintético de tickets no formato da fila"""
+    rng = np.random.default_rng(seed)
+    agora = datetime.now()
+    criacao = pd.to_datetime(agora) - pd.to_timedelta(rng.integers(0, 365 * 24 * 3600, linhas), unit='s')
+    status = rng.choice(['Pendente', 'Em andamento', 'Concluída'], linhas, p=[0.1, 0.1, 0.8])
+    conclusao = criacao + pd.to_timedelta(rng.integers(600, 10 * 24 * 3600, linhas), unit='s')
+    qtd_dispositivos = rng.integers(1, 4, linhas)
+    dispositivos = [', '.join(rng.choice(DISPOSITIVOS, n, replace=False)) for n in qtd_dispositivos]
+    
+    df = pd.DataFrame({
+        'id': [f"{i:08X}" for i in range(linhas)],
+        'data_criacao': criacao.strftime('%Y-%m-%d %H:%M:%S'),
+        'data_solicitacao': criacao.strftime('%Y-%m-%d'),
+        'nome': 'Colaborador',
+        'email': [f"pessoa{i % 5000}@mavi.com" for i in range(linhas)],
+        'telefone': '',
+        'squad_leader': rng.choice(['Ana', 'Bruno', 'Carla', 'Diego'], linhas),
+        'dispositivos': dispositivos,
+        'necessidade': 'Troca de equipamento',
+        'status': status,
+        'prioridade': rng.choice(['Normal', 'Alta', 'Urgente'], linhas, p=[0.7, 0.2, 0.1]),
+        'data_conclusao': np.where(status == 'Concluída', conclusao.strftime('%Y-%m-%d %H:%M:%S'), ''),
+        'observacoes': ''
+    }, columns=COLUNAS_FILA)
+    df.to_csv(caminho, index=False)
+
+def fluxo_anterior(storage):
+    """Reproduz o custo do fluxo antigo: cada seção relê e reprocessa o CSV"""
+    def carregar():
+        df = storage.ler('fila')
+        for coluna in ('data_criacao', 'data_solicitacao', 'data_conclusao'):
+            df[coluna] = pd.to_datetime(df[coluna], errors='coerce')
+        return df
+    
+    def contar_dispositivos(df):
+        dispositivos_lista = []
+        for _, row in df.iterrows():
+            if pd.notna(row['dispositivos']):
+                dispositivos_lista.extend([d.strip() for d in str(row['dispositivos']).split(',')])
+        return pd.Series(dispositivos_lista).value_counts().head(10)
+    
+    data_limite = datetime.now() - timedelta(days=30)
+    
+    # gerar_relatorio_geral
+    df = carregar()
+    df_concluidos = df[df['status'] == 'Concluída']
+    (df_concluidos['data_conclusao'] - df_concluidos['data_criacao']).dt.total_seconds().mean()
+    contar_dispositivos(df)
+    df[df['data_criacao'] >= data_limite].groupby(df['data_criacao'].dt.date).size()
+    
+    # gerar_grafico_status, gerar_grafico_dispositivos e gerar_grafico_timeline
+    carregar()['status'].value_counts()
+    contar_dispositivos(carregar())
+    df = carregar()
+    df_recentes = df[df['data_criacao'] >= data_limite]
+    df_recentes.groupby([df_recentes['data_criacao'].dt.date, 'status']).size()
+
+def motor_relatorios(storage):
+    """Fluxo atual: um snapshot e uma passada de agregação"""
+    agregados = calcular_agregados(carregar_snapshot(storage))
+    agregados.resumo()
+    agregados.timeline_df()
+
+def medir(funcao, *args, repeticoes: int = 1) -> float:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(*args)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos relatórios")
+    parser.add_argument('--linhas', type=int, default=200000, help="Tamanho do histórico sintético")
+    parser.add_argument('--repeticoes', type=int, default=1, help="Repetições (vale o melhor tempo)")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, 'fila.csv')
+        print(f"Gerando histórico sintético com {args.linhas} tickets...")
+        gerar_historico(caminho, args.linhas)
+        storage = CSVStorage(caminho)
+        
+        tempo_anterior = medir(fluxo_anterior, storage, repeticoes=args.repeticoes)
+        tempo_motor = medir(motor_relatorios, storage, repeticoes=args.repeticoes)
+    
+    print(f"Fluxo anterior:      {tempo_anterior:8.2f}s")
+    print(f"Motor de relatórios: {tempo_motor:8.2f}s")
+    print(f"Ganho:               {tempo_anterior / tempo_motor:8.1f}x")
+
+if __name__ == "__main__":
+    main()
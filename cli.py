@@ -0,0 +1,222 @@
+"""
+Linha de comando do Mavi Suporte (executa sem Streamlit, ex.: via cron)
+"""
+import argparse
+import os
+import sys
+from datetime import date, datetime
+
+# Adiciona o diretório src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from config.config import app_config
+from storage import criar_storage
+
+def criar_storage_configurado():
+    """Cria o armazenamento conforme as configurações da aplicação"""
+    return criar_storage(
+        app_config.storage_backend,
+        app_config.fila_file,
+        lista_espera_file=app_config.lista_espera_file,
+        sqlite_file=app_config.sqlite_file
+    )
+
+def criar_report_generator(relatorios_dir=None):
+    """Gerador de relatórios configurado (``relatorios_dir`` substitui o diretório padrão)"""
+    from analitico import criar_motor_analitico
+    from reports import ReportGenerator
+    from rollup import RollupDiario
+    from sla import CalendarioUteis
+    
+    storage = criar_storage_configurado()
+    calendario = CalendarioUteis.de_texto(app_config.sla_expediente, app_config.sla_dias_semana,
+                                          app_config.sla_feriados_empresa, app_config.sla_pontos_facultativos)
+    return ReportGenerator(
+        app_config.fila_file,
+        relatorios_dir or app_config.relatorios_dir,
+        storage=storage,
+        rollup=RollupDiario(storage, app_config.rollup_file, calendario=calendario),
+        cache_itens=app_config.report_cache_itens,
+        report_workers=app_config.report_workers,
+        max_artefatos_por_tipo=app_config.relatorios_max_por_tipo,
+        max_bytes_artefatos=app_config.relatorios_max_mb * 1024 * 1024,
+        min_linhas_paralelo=app_config.report_min_linhas_paralelo,
+        analitico=criar_motor_analitico(storage, app_config.analitico_dir,
+                                        calendario=calendario) if app_config.analitico_ativo else None,
+        calendario=calendario
+    )
+
+def criar_agendador():
+    """Agendador dos relatórios padrão com o gerador de relatórios configurado"""
+    from agendador_relatorios import AgendadorRelatorios
+    
+    return AgendadorRelatorios(criar_report_generator(), app_config.horarios_relatorios)
+
+def imprimir_precomputados(entradas):
+    for entrada in entradas.values():
+        print(f"{entrada['titulo']:<20} {entrada['relatorio_html']}")
+
+def comando_precomputar(args):
+    """Pré-calcula os relatórios padrão uma vez (para uso via cron)"""
+    imprimir_precomputados(criar_agendador().precomputar(args.relatorio))
+    return 0
+
+def comando_agendar(args):
+    """Mantém o agendador rodando e pré-calcula os relatórios nos horários configurados"""
+    agendador = criar_agendador()
+    if not agendador.horarios:
+        print("Nenhum horário configurado (MAVI_HORARIOS_RELATORIOS)", file=sys.stderr)
+        return 1
+    if args.agora:
+        imprimir_precomputados(agendador.precomputar())
+    print(f"Agendador ativo; próxima execução em {agendador.proxima_execucao():%d/%m/%Y %H:%M}", file=sys.stderr)
+    try:
+        agendador.rodar(ao_concluir=imprimir_precomputados)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def data_argumento(valor):
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data inválida (use AAAA-MM-DD): {valor}")
+
+def para_json(valor):
+    """Resultado de relatório serializável (ex.: as datas de ``tickets_por_dia`` são chaves)"""
+    if isinstance(valor, dict):
+        return {str(chave): para_json(item) for chave, item in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [para_json(item) for item in valor]
+    return valor
+
+def comando_relatorio(args):
+    """Gera um relatório sem a interface web (para uso via cron)"""
+    from report_engine import FiltroRelatorio, periodo_relatorio
+    from reports import ETAPAS
+    
+    if args.tipo == 'geral' and args.formato == 'html':
+        print("O relatório geral só tem saída em JSON (use --formato json)", file=sys.stderr)
+        return 2
+    
+    inicio, fim = periodo_relatorio(args.periodo) if args.periodo else (None, None)
+    filtro = FiltroRelatorio(
+        inicio=args.inicio or inicio,
+        fim=args.fim or fim,
+        squad_leader=args.squad,
+        status=args.status or (),
+        prioridades=args.prioridade or ()
+    )
+    filtro = None if filtro == FiltroRelatorio() else filtro
+    
+    report_generator = criar_report_generator(args.saida)
+    geradores = {
+        'completo': lambda: report_generator.gerar_relatorio_completo(filtro=filtro),
+        'geral': lambda: report_generator.gerar_relatorio_geral(filtro=filtro),
+        'status': lambda: report_generator.gerar_grafico_status(filtro=filtro),
+        'dispositivos': lambda: report_generator.gerar_grafico_dispositivos(filtro=filtro),
+        'timeline': lambda: report_generator.gerar_grafico_timeline(filtro=filtro),
+        'horarios': lambda: report_generator.gerar_grafico_horarios(filtro=filtro),
+        'squads': lambda: report_generator.gerar_relatorios_por_squad(filtro=filtro)
+    }
+    
+    inicio_execucao = datetime.now()
+    resultado = geradores[args.tipo]()
+    
+    if args.formato == 'json':
+        arquivo = report_generator.gravar_json(args.tipo, para_json(resultado), filtro)
+    elif isinstance(resultado, dict):
+        arquivo = resultado.get('relatorio_html') or resultado['indice']
+    else:
+        arquivo = resultado
+    
+    if arquivo is None:
+        print("Nenhum dado para o gráfico no recorte selecionado", file=sys.stderr)
+        return 1
+    print(arquivo)
+    
+    if args.profile:
+        total = (datetime.now() - inicio_execucao).total_seconds()
+        for etapa in ETAPAS:
+            print(f"{etapa:<12} {report_generator.tempos[etapa]:8.3f}s", file=sys.stderr)
+        print(f"{'total':<12} {total:8.3f}s", file=sys.stderr)
+        if not any(report_generator.tempos.values()):
+            print("(resultado reaproveitado do cache: os dados não mudaram desde a última geração)", file=sys.stderr)
+    return 0
+
+def comando_importar(args):
+    """Importa um histórico de tickets (CSV/XLSX) em blocos"""
+    from importador import importar_historico
+    
+    mapeamento = {}
+    for item in args.mapear or []:
+        origem, _, destino = item.partition('=')
+        mapeamento[origem] = destino
+    
+    def progresso(linhas):
+        print(f"  {linhas} linhas processadas...", file=sys.stderr)
+    
+    resultado = importar_historico(
+        args.arquivo,
+        criar_storage_configurado(),
+        mapeamento=mapeamento,
+        chunksize=args.bloco,
+        erros_file=args.erros,
+        simular=args.simular,
+        progresso=progresso
+    )
+    
+    print(f"Linhas lidas: {resultado['linhas_lidas']}")
+    print(f"Importadas: {resultado['importadas']}{' (simulação, nada foi gravado)' if resultado['simulacao'] else ''}")
+    print(f"Rejeitadas: {resultado['rejeitadas']}")
+    if resultado['erros_file']:
+        print(f"Erros por linha em: {resultado['erros_file']}")
+    return 0 if resultado['rejeitadas'] == 0 else 1
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando"""
+    parser = argparse.ArgumentParser(description="Ferramentas de linha de comando do Mavi Suporte")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    
+    importar = subparsers.add_parser('importar', help="Importa histórico de tickets de CSV/XLSX")
+    importar.add_argument('arquivo', help="Arquivo .csv ou .xlsx")
+    importar.add_argument('--mapear', action='append', metavar='COLUNA=CAMPO',
+                          help="Mapeia uma coluna do arquivo para um campo da fila (pode repetir)")
+    importar.add_argument('--bloco', type=int, default=50000, help="Linhas por bloco (padrão: 50000)")
+    importar.add_argument('--erros', default='importacao_erros.csv', help="CSV com os erros por linha")
+    importar.add_argument('--simular', action='store_true', help="Valida sem gravar")
+    importar.set_defaults(func=comando_importar)
+    
+    precomputar = subparsers.add_parser('precomputar', help="Pré-calcula os relatórios padrão uma vez")
+    precomputar.add_argument('--relatorio', action='append', metavar='NOME',
+                             help="diario, semanal, mensal ou squad:<nome> (padrão: todos; pode repetir)")
+    precomputar.set_defaults(func=comando_precomputar)
+    
+    relatorio = subparsers.add_parser('relatorio', help="Gera um relatório sem a interface web")
+    relatorio.add_argument('--tipo', default='completo',
+                           choices=['completo', 'geral', 'status', 'dispositivos', 'timeline', 'horarios', 'squads'],
+                           help="Relatório a gerar (padrão: completo; squads = um por squad leader)")
+    relatorio.add_argument('--periodo', choices=['todo_historico', 'ultimos_30_dias', 'mes_atual', 'ano_atual'],
+                           help="Período pronto (--inicio/--fim têm precedência)")
+    relatorio.add_argument('--inicio', type=data_argumento, help="Primeiro dia de criação (AAAA-MM-DD)")
+    relatorio.add_argument('--fim', type=data_argumento, help="Último dia de criação (AAAA-MM-DD)")
+    relatorio.add_argument('--status', action='append', metavar='STATUS', help="Filtra por status (pode repetir)")
+    relatorio.add_argument('--prioridade', action='append', metavar='PRIORIDADE',
+                           help="Filtra por prioridade (pode repetir)")
+    relatorio.add_argument('--squad', help="Filtra por squad leader")
+    relatorio.add_argument('--formato', choices=['html', 'json'], default='html',
+                           help="html (arquivo gerado) ou json (dados e caminhos do resultado)")
+    relatorio.add_argument('--saida', help="Diretório de saída (padrão: diretório de relatórios configurado)")
+    relatorio.add_argument('--profile', action='store_true',
+                           help="Mostra o tempo de cada etapa (carregar, agregar, renderizar, gravar) no stderr")
+    relatorio.set_defaults(func=comando_relatorio)
+    
+    agendar = subparsers.add_parser('agendar', help="Pré-calcula os relatórios padrão nos horários configurados")
+    agendar.add_argument('--agora', action='store_true', help="Também executa imediatamente ao iniciar")
+    agendar.set_defaults(func=comando_agendar)
+    
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
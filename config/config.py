@@ -3,7 +3,7 @@ Configurações do sistema de suporte Mavi
 """
 import os
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, List
 
 @dataclass
 class EmailConfig:
@@ -26,10 +26,49 @@ class AppConfig:
     data_dir: str = "data"
     fila_file: str = "data/fila.csv"
     relatorios_dir: str = "data/relatorios"
+    exportacoes_dir: str = "data/exportacoes"  # arquivos CSV/Excel gerados pela exportação
+    rollup_file: str = "data/rollup_diario.json"  # agregado diário usado pelo dashboard e relatórios
+    report_cache_itens: int = 64  # resultados de relatórios mantidos em memória (há também um cache em disco)
+    report_workers: int = int(os.getenv("MAVI_REPORT_WORKERS", "3"))  # processos para gravar os gráficos
+    report_min_linhas_paralelo: int = int(os.getenv("MAVI_REPORT_MIN_LINHAS_PARALELO", "200000"))  # agrega por mês em paralelo a partir daqui
+    report_jobs_simultaneos: int = 2  # relatórios gerados ao mesmo tempo em segundo plano
+    relatorios_max_por_tipo: int = 20  # arquivos mantidos de cada tipo de relatório em relatorios_dir
+    relatorios_max_mb: int = int(os.getenv("MAVI_RELATORIOS_MAX_MB", "200"))  # espaço total dos relatórios gerados
+    horarios_relatorios: List[str] = None  # horários (HH:MM) do pré-cálculo dos relatórios padrão (cli.py agendar)
+    storage_backend: str = os.getenv("MAVI_STORAGE", "csv")  # csv (uma réplica) ou sqlite (réplicas compartilhadas)
+    sqlite_file: str = os.getenv("MAVI_SQLITE_FILE", "data/fila.db")
     max_fila_size: int = 100
+    limites_por_prioridade: Dict[str, int] = None
+    modo_overflow: str = os.getenv("MAVI_MODO_OVERFLOW", "rejeitar")  # rejeitar, espera ou mesclar
+    lista_espera_file: str = "data/fila_espera.csv"
+    envelhecimento_horas: Dict[str, float] = None  # atraso de cada prioridade na ordem de atendimento
+    janela_duplicidade_segundos: int = int(os.getenv("MAVI_JANELA_DUPLICIDADE", "120"))  # 0 desativa
+    previsao_semanas: int = int(os.getenv("MAVI_PREVISAO_SEMANAS", "8"))  # histórico usado nas taxas das ETAs
+    sla_expediente: str = os.getenv("MAVI_SLA_EXPEDIENTE", "09:00-18:00")  # horário comercial contado nas horas úteis
+    sla_dias_semana: str = os.getenv("MAVI_SLA_DIAS_SEMANA", "1111100")  # segunda a domingo, 1 = dia útil
+    sla_pontos_facultativos: bool = os.getenv("MAVI_SLA_PONTOS_FACULTATIVOS", "1") == "1"  # Carnaval e Corpus Christi sem expediente
+    sla_feriados_empresa: str = os.getenv("MAVI_SLA_FERIADOS_EMPRESA", "")  # datas ISO separadas por vírgula (além dos nacionais)
+    analitico_ativo: bool = os.getenv("MAVI_ANALITICO", "1") == "1"  # SQL com DuckDB (se instalado) no console e nos relatórios
+    analitico_dir: str = "data/analitico"  # snapshot colunar (Parquet) consultado pelo modo analítico
+    analitico_limite_linhas: int = int(os.getenv("MAVI_ANALITICO_LIMITE", "1000"))  # linhas máximas no console SQL
+    analitico_timeout_segundos: int = int(os.getenv("MAVI_ANALITICO_TIMEOUT", "30"))  # tempo máximo de cada consulta
     dispositivos_opcoes: List[str] = None
     
     def __post_init__(self):
+        if self.limites_por_prioridade is None:
+            self.limites_por_prioridade = {
+                "Normal": 70,
+                "Alta": 20,
+                "Urgente": 10
+            }
+        if self.horarios_relatorios is None:
+            self.horarios_relatorios = os.getenv("MAVI_HORARIOS_RELATORIOS", "06:00").split(",")
+        if self.envelhecimento_horas is None:
+            self.envelhecimento_horas = {
+                "Urgente": 0,
+                "Alta": 4,
+                "Normal": 24
+            }
         if self.dispositivos_opcoes is None:
             self.dispositivos_opcoes = [
                 "Fones de ouvido",
@@ -0,0 +1,172 @@
+"""
+Pré-cálculo agendado dos relatórios padrão (diário, semanal, mensal e por squad leader)
+"""
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from cache_relatorios import gravar_atomico
+from report_engine import FiltroRelatorio
+
+# Dias completos (terminando ontem) cobertos por cada relatório padrão
+JANELAS_PADRAO = {'diario': 1, 'semanal': 7, 'mensal': 30}
+
+TITULOS_PADRAO = {'diario': 'Diário', 'semanal': 'Semanal', 'mensal': 'Mensal'}
+
+# Os relatórios por squad leader usam a janela mensal
+PREFIXO_SQUAD = 'squad:'
+
+def filtro_padrao(nome: str, hoje: Optional[date] = None) -> FiltroRelatorio:
+    """Recorte de um relatório padrão ('diario', 'semanal', 'mensal' ou 'squad:<nome>')"""
+    hoje = hoje or date.today()
+    squad_leader = None
+    janela = nome
+    if nome.startswith(PREFIXO_SQUAD):
+        squad_leader = nome[len(PREFIXO_SQUAD):]
+        janela = 'mensal'
+    if janela not in JANELAS_PADRAO:
+        raise ValueError(f"Relatório padrão desconhecido: {nome}")
+    fim = hoje - timedelta(days=1)
+    return FiltroRelatorio(inicio=fim - timedelta(days=JANELAS_PADRAO[janela] - 1), fim=fim,
+                           squad_leader=squad_leader)
+
+def titulo_padrao(nome: str) -> str:
+    if nome.startswith(PREFIXO_SQUAD):
+        return f"Squad {nome[len(PREFIXO_SQUAD):]}"
+    return TITULOS_PADRAO.get(nome, nome)
+
+class AgendadorRelatorios:
+    """Pré-calcula os relatórios padrão nos horários configurados
+    
+    Roda sem Streamlit (``python cli.py agendar``) e registra o último
+    artefato de cada relatório em ``precomputados.json``, com a revisão dos
+    dados usada. A interface serve esse artefato na hora e só oferece
+    regenerar quando a revisão ou o dia mudaram desde o pré-cálculo.
+    """
+    
+    def __init__(self, report_generator, horarios: List[str], arquivo_indice: Optional[str] = None):
+        self.report_generator = report_generator
+        self.horarios = sorted(datetime.strptime(h.strip(), '%H:%M').time() for h in horarios if h.strip())
+        self.arquivo_indice = arquivo_indice or os.path.join(report_generator.relatorios_dir, 'precomputados.json')
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _normalizar(revisao):
+        """Revisão no formato em que é gravada em JSON (tuplas viram listas)"""
+        return json.loads(json.dumps(revisao))
+    
+    def nomes_padrao(self) -> List[str]:
+        """Relatórios padrão: as janelas fixas e um por squad leader presente nos dados (lidos do rollup)"""
+        rollup = self.report_generator.rollup
+        rollup.sincronizar()
+        squads = {squad.strip() for squad in rollup.squad_leaders()}
+        return list(JANELAS_PADRAO) + [PREFIXO_SQUAD + squad for squad in sorted(squads - {''})]
+    
+    def precomputar(self, nomes: Optional[List[str]] = None,
+                    progresso: Optional[Callable[[str, float], None]] = None) -> Dict[str, Dict]:
+        """Gera os relatórios pedidos (todos os padrão por omissão) e atualiza o índice
+        
+        Os relatórios por squad leader saem de um único lote
+        (``gerar_relatorios_por_squad``), que lê e agrega a janela mensal uma
+        vez para todos; só um squad leader sem tickets na janela é gerado à parte.
+        """
+        nomes = nomes or self.nomes_padrao()
+        progresso = progresso or (lambda etapa, fracao: None)
+        hoje = date.today()
+        janelas = [nome for nome in nomes if not nome.startswith(PREFIXO_SQUAD)]
+        squads = [nome for nome in nomes if nome.startswith(PREFIXO_SQUAD)]
+        etapas = len(janelas) + (1 if squads else 0)
+        entradas = {}
+        
+        def entrada(nome: str, revisao, relatorio_html: str, graficos: Dict) -> Dict:
+            return {
+                'titulo': titulo_padrao(nome),
+                'filtro': filtro_padrao(nome, hoje).parametros(),
+                'relatorio_html': relatorio_html,
+                'graficos': graficos,
+                'revisao': revisao,
+                'dia': hoje.isoformat(),
+                'gerado_em': datetime.now().isoformat(timespec='seconds')
+            }
+        
+        for i, nome in enumerate(janelas):
+            # A revisão é lida antes da geração: uma escrita durante o cálculo
+            # deixa o artefato marcado como desatualizado, nunca o contrário
+            revisao = self._normalizar(self.report_generator.storage.revisao())
+            
+            def progresso_parcial(etapa, fracao, i=i, nome=nome):
+                progresso(f"{titulo_padrao(nome)}: {etapa}", (i + fracao) / etapas)
+            
+            resultado = self.report_generator.gerar_relatorio_completo(progresso=progresso_parcial,
+                                                                       filtro=filtro_padrao(nome, hoje))
+            entradas[nome] = entrada(nome, revisao, resultado['relatorio_html'], resultado['graficos'])
+        
+        if squads:
+            revisao = self._normalizar(self.report_generator.storage.revisao())
+            manifesto = self.report_generator.gerar_relatorios_por_squad(
+                progresso=lambda etapa, fracao: progresso(f"Squads: {etapa}", (len(janelas) + fracao) / etapas),
+                filtro=filtro_padrao('mensal', hoje)
+            )
+            arquivos = {PREFIXO_SQUAD + item['squad_leader'].strip(): item['arquivo']
+                        for item in manifesto['relatorios']}
+            for nome in squads:
+                if nome in arquivos:
+                    entradas[nome] = entrada(nome, revisao, arquivos[nome], {})
+                else:
+                    resultado = self.report_generator.gerar_relatorio_completo(filtro=filtro_padrao(nome, hoje))
+                    entradas[nome] = entrada(nome, revisao, resultado['relatorio_html'], resultado['graficos'])
+        
+        with self._lock:
+            indice = self.indice()
+            indice.update(entradas)
+            self._salvar_indice(indice)
+        return entradas
+    
+    def indice(self) -> Dict[str, Dict]:
+        """Último artefato de cada relatório padrão"""
+        try:
+            with open(self.arquivo_indice, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _salvar_indice(self, indice: Dict[str, Dict]):
+        gravar_atomico(self.arquivo_indice, lambda f: json.dump(indice, f, ensure_ascii=False, indent=2))
+    
+    def desatualizado(self, entrada: Dict) -> bool:
+        """Se os dados ou a janela do relatório mudaram desde o pré-cálculo"""
+        if entrada.get('dia') != date.today().isoformat():
+            return True
+        if not os.path.exists(entrada.get('relatorio_html', '')):
+            return True
+        return entrada.get('revisao') != self._normalizar(self.report_generator.storage.revisao())
+    
+    def proxima_execucao(self, agora: Optional[datetime] = None) -> Optional[datetime]:
+        """Próximo horário configurado a partir de ``agora``"""
+        if not self.horarios:
+            return None
+        agora = agora or datetime.now()
+        for horario in self.horarios:
+            candidato = datetime.combine(agora.date(), horario)
+            if candidato > agora:
+                return candidato
+        return datetime.combine(agora.date() + timedelta(days=1), self.horarios[0])
+    
+    def rodar(self, parar: Optional[threading.Event] = None,
+              ao_concluir: Optional[Callable[[Dict[str, Dict]], None]] = None):
+        """Laço do agendador: espera cada horário e pré-calcula todos os relatórios padrão"""
+        parar = parar or threading.Event()
+        while not parar.is_set():
+            proxima = self.proxima_execucao()
+            if proxima is None:
+                return
+            # Espera em passos curtos para acompanhar ajustes do relógio
+            while not parar.is_set() and datetime.now() < proxima:
+                parar.wait(min(60.0, max(0.0, (proxima - datetime.now()).total_seconds())))
+            if parar.is_set():
+                return
+            entradas = self.precomputar()
+            if ao_concluir:
+                ao_concluir(entradas)
@@ -0,0 +1,287 @@
+"""
+Modo analítico: SQL ad hoc (DuckDB) sobre um snapshot colunar dos tickets
+"""
+import glob
+import os
+import threading
+from dataclasses import replace
+from datetime import datetime, time, timedelta
+from typing import Optional, Tuple
+
+import pandas as pd
+
+from cache_relatorios import CacheRelatorios, substituicao_atomica
+from report_engine import (DIMENSOES_SLA, AgregadosRelatorio, FiltroRelatorio, digests_resolucao,
+                           inicio_dia_timeline, sketches_solicitantes)
+from sla import CalendarioUteis
+from storage import COLUNAS_FILA
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+COLUNAS_DATA = ('data_criacao', 'data_solicitacao', 'data_conclusao')
+
+# Consultas prontas do console SQL (a tabela ``tickets`` tem as colunas da fila, com as datas como TIMESTAMP)
+CONSULTAS_SALVAS = {
+    'dispositivos_por_squad_mes': {
+        'titulo': "Dispositivos por squad leader e mês",
+        'sql': """SELECT strftime(data_criacao, '%Y-%m') AS mes, squad_leader, dispositivo, count(*) AS solicitacoes
+FROM (SELECT data_criacao, squad_leader, trim(unnest(string_split(dispositivos, ','))) AS dispositivo FROM tickets)
+WHERE dispositivo <> ''
+GROUP BY ALL
+ORDER BY mes DESC, squad_leader, solicitacoes DESC"""
+    },
+    'volume_mensal_status': {
+        'titulo': "Tickets por mês e status",
+        'sql': """SELECT strftime(data_criacao, '%Y-%m') AS mes, status, count(*) AS tickets
+FROM tickets
+GROUP BY ALL
+ORDER BY mes DESC, status"""
+    },
+    'resolucao_por_prioridade': {
+        'titulo': "Tempo de resolução por prioridade (horas)",
+        'sql': """SELECT prioridade, count(*) AS concluidos,
+       round(avg(horas), 1) AS media, round(quantile_cont(horas, 0.5), 1) AS p50,
+       round(quantile_cont(horas, 0.9), 1) AS p90
+FROM (SELECT prioridade, epoch(data_conclusao - data_criacao) / 3600 AS horas
+      FROM tickets WHERE status = 'Concluída' AND data_conclusao IS NOT NULL)
+GROUP BY prioridade
+ORDER BY p50 DESC"""
+    },
+    'retorno_30_dias': {
+        'titulo': "Retorno em 30 dias (novo pedido após uma conclusão) por mês",
+        'sql': """WITH pedidos AS (
+    SELECT lower(trim(email)) AS solicitante, data_criacao, data_conclusao, status
+    FROM tickets WHERE trim(coalesce(email, '')) <> ''
+)
+SELECT strftime(a.data_criacao, '%Y-%m') AS mes, count(*) AS tickets,
+       count(*) FILTER (WHERE EXISTS (
+           SELECT 1 FROM pedidos b
+           WHERE b.solicitante = a.solicitante AND b.status = 'Concluída'
+             AND b.data_conclusao < a.data_criacao
+             AND b.data_conclusao >= a.data_criacao - INTERVAL 30 DAY
+       )) AS retornos,
+       round(retornos / count(*), 4) AS taxa_retorno
+FROM pedidos a
+GROUP BY mes
+ORDER BY mes DESC"""
+    },
+    'solicitantes_recorrentes': {
+        'titulo': "Solicitantes com mais pedidos",
+        'sql': """SELECT lower(trim(email)) AS solicitante, count(*) AS pedidos,
+       min(data_criacao) AS primeiro, max(data_criacao) AS ultimo
+FROM tickets
+WHERE trim(coalesce(email, '')) <> ''
+GROUP BY solicitante
+HAVING count(*) > 1
+ORDER BY pedidos DESC"""
+    },
+    'backlog_por_squad': {
+        'titulo': "Backlog por squad leader",
+        'sql': """SELECT squad_leader, count(*) AS abertos,
+       count(*) FILTER (WHERE prioridade = 'Urgente') AS urgentes,
+       round(max(epoch(current_localtimestamp() - data_criacao)) / 86400, 1) AS dias_mais_antigo
+FROM tickets
+WHERE status IN ('Pendente', 'Em andamento')
+GROUP BY squad_leader
+ORDER BY abertos DESC"""
+    }
+}
+
+class MotorAnalitico:
+    """Consultas SQL (DuckDB) sobre um snapshot em Parquet da fila
+    
+    O snapshot é gravado em ``diretorio`` a partir de ``storage.ler_blocos``
+    (CSV ou SQLite) e refeito quando a revisão dos dados muda, então as
+    consultas nunca veem dados desatualizados. Cada consulta usa uma conexão
+    própria, sem acesso a outros arquivos, com limite de linhas e de tempo.
+    """
+    
+    def __init__(self, storage, diretorio: str, limite_linhas: int = 1000, timeout_segundos: float = 30,
+                 calendario: Optional[CalendarioUteis] = None):
+        if duckdb is None:
+            raise ImportError("O modo analítico requer o pacote duckdb (pip install duckdb)")
+        self.storage = storage
+        self.diretorio = diretorio
+        self.limite_linhas = limite_linhas
+        self.timeout_segundos = timeout_segundos
+        self.calendario = calendario or CalendarioUteis()
+        self._lock = threading.Lock()
+        if not os.path.exists(diretorio):
+            os.makedirs(diretorio)
+    
+    def snapshot(self) -> str:
+        """Caminho do snapshot da revisão atual, gerado só se ainda não existir"""
+        revisao = self.storage.revisao()
+        caminho = os.path.join(self.diretorio,
+                               f"tickets_{CacheRelatorios.chave(revisao, 'snapshot_analitico')[:16]}.parquet")
+        with self._lock:
+            if not os.path.exists(caminho):
+                self._gravar_snapshot(caminho)
+                for antigo in glob.glob(os.path.join(self.diretorio, 'tickets_*.parquet')):
+                    if antigo != caminho:
+                        os.remove(antigo)
+        return caminho
+    
+    def _gravar_snapshot(self, caminho: str):
+        """Copia a fila em blocos para uma tabela colunar e grava em Parquet"""
+        colunas = ', '.join(f"{coluna} {'TIMESTAMP' if coluna in COLUNAS_DATA else 'VARCHAR'}"
+                            for coluna in COLUNAS_FILA)
+        selecao = ', '.join(coluna if coluna in COLUNAS_DATA else f"CAST({coluna} AS VARCHAR)"
+                            for coluna in COLUNAS_FILA)
+        con = duckdb.connect()
+        try:
+            con.execute(f"CREATE TABLE tickets ({colunas})")
+            for bloco in self.storage.ler_blocos('fila'):
+                # Mesma conversão de datas dos relatórios (valores inválidos viram nulos)
+                bloco = bloco.reindex(columns=COLUNAS_FILA).astype(object)
+                for coluna in COLUNAS_DATA:
+                    bloco[coluna] = pd.to_datetime(bloco[coluna], errors='coerce')
+                con.register('bloco', bloco)
+                con.execute(f"INSERT INTO tickets SELECT {selecao} FROM bloco")
+                con.unregister('bloco')
+            with substituicao_atomica(caminho) as temporario:
+                con.execute(f"COPY tickets TO '{temporario}' (FORMAT PARQUET)")
+        finally:
+            con.close()
+    
+    def _conectar(self):
+        """Conexão com a view ``tickets`` e sem acesso a arquivos fora do snapshot"""
+        caminho = self.snapshot()
+        con = duckdb.connect()
+        con.execute(f"CREATE VIEW tickets AS SELECT * FROM read_parquet('{caminho}')")
+        con.execute(f"SET allowed_directories = ['{os.path.abspath(self.diretorio)}/']")
+        con.execute("SET enable_external_access = false")
+        con.execute("SET lock_configuration = true")
+        return con
+    
+    def consultar(self, sql: str, limite: Optional[int] = None,
+                  timeout: Optional[float] = None) -> Tuple[pd.DataFrame, bool]:
+        """Executa uma consulta (um único SELECT) e retorna (resultado, truncado)
+        
+        No máximo ``limite`` linhas são trazidas; a consulta é interrompida
+        depois de ``timeout`` segundos (TimeoutError). Erros de SQL viram
+        ValueError com a mensagem do DuckDB.
+        """
+        limite = limite or self.limite_linhas
+        timeout = timeout or self.timeout_segundos
+        con = self._conectar()
+        try:
+            try:
+                comandos = con.extract_statements(sql)
+            except duckdb.Error as e:
+                raise ValueError(str(e))
+            if len(comandos) != 1 or comandos[0].type != duckdb.StatementType.SELECT:
+                raise ValueError("Informe uma única consulta SELECT")
+            
+            cronometro = threading.Timer(timeout, con.interrupt)
+            cronometro.start()
+            try:
+                # O texto do comando mantém o ";" final, que não cabe dentro da subconsulta
+                consulta = comandos[0].query.strip().rstrip(';')
+                resultado = con.execute(
+                    f"SELECT * FROM (\n{consulta}\n) AS consulta LIMIT {int(limite) + 1}"
+                ).df()
+            except duckdb.InterruptException:
+                raise TimeoutError(f"Consulta interrompida após {timeout:g}s")
+            except duckdb.Error as e:
+                raise ValueError(str(e))
+            finally:
+                cronometro.cancel()
+        finally:
+            con.close()
+        return resultado.head(limite), len(resultado) > limite
+    
+    def consulta_salva(self, nome: str, limite: Optional[int] = None) -> Tuple[pd.DataFrame, bool]:
+        if nome not in CONSULTAS_SALVAS:
+            raise ValueError(f"Consulta desconhecida: {nome}")
+        return self.consultar(CONSULTAS_SALVAS[nome]['sql'], limite)
+    
+    def agregados(self, filtro: FiltroRelatorio, data_limite: datetime) -> AgregadosRelatorio:
+        """Agregados de um recorte calculados no DuckDB
+        
+        Contagens por status, dispositivos, timeline e soma das resoluções
+        saem de GROUP BYs no snapshot colunar; só as colunas que alimentam os
+        digests, os HyperLogLogs e as horas úteis são trazidas para o pandas. O resultado é o
+        mesmo de ``report_engine.calcular_agregados`` sobre o recorte.
+        """
+        condicao, parametros = filtro.predicado().sql()
+        # No mapa de calor as conclusões contam no dia em que aconteceram (o período do recorte é de criação)
+        condicao_conclusao, parametros_conclusao = replace(filtro, inicio=None, fim=None).predicado().sql()
+        if filtro.inicio:
+            condicao_conclusao += " AND data_conclusao >= ?"
+            parametros_conclusao.append(datetime.combine(filtro.inicio, time()))
+        if filtro.fim:
+            condicao_conclusao += " AND data_conclusao < ?"
+            parametros_conclusao.append(datetime.combine(filtro.fim + timedelta(days=1), time()))
+        data_limite = inicio_dia_timeline(data_limite)
+        con = self._conectar()
+        try:
+            def consultar(sql: str, extras: Tuple = ()) -> pd.DataFrame:
+                return con.execute(sql.format(condicao=condicao), list(extras) + parametros).df()
+            
+            total = int(consultar("SELECT count(*) AS n FROM tickets WHERE {condicao}")['n'].iloc[0])
+            agregados = AgregadosRelatorio(data_limite=data_limite, total_tickets=total)
+            if total == 0:
+                return agregados
+            
+            por_status = consultar("SELECT status, count(*) AS n FROM tickets WHERE status IS NOT NULL AND {condicao} "
+                                   "GROUP BY status ORDER BY n DESC, status")
+            agregados.por_status = dict(zip(por_status['status'], por_status['n'].astype(int)))
+            
+            resolvidos = consultar(
+                "SELECT epoch(data_conclusao - data_criacao) / 3600 AS horas, data_criacao, data_conclusao, "
+                "prioridade, dispositivos, squad_leader "
+                "FROM tickets WHERE status = 'Concluída' AND data_conclusao IS NOT NULL "
+                "AND data_criacao IS NOT NULL AND {condicao}"
+            )
+            agregados.soma_resolucao_horas = float(resolvidos['horas'].sum())
+            agregados.qtd_resolucoes = len(resolvidos)
+            agregados.resolucao = digests_resolucao(resolvidos)
+            uteis = resolvidos.assign(horas=self.calendario.horas_uteis(resolvidos['data_criacao'],
+                                                                         resolvidos['data_conclusao']))
+            agregados.soma_resolucao_horas_uteis = float(uteis['horas'].sum())
+            agregados.resolucao_uteis = digests_resolucao(uteis, dimensoes=DIMENSOES_SLA)
+            agregados.solicitantes = sketches_solicitantes(
+                consultar("SELECT email, squad_leader FROM tickets WHERE email IS NOT NULL AND {condicao}")
+            )
+            
+            dispositivos = consultar(
+                "SELECT dispositivo, count(*) AS n FROM (SELECT trim(unnest(string_split(dispositivos, ','))) "
+                "AS dispositivo FROM tickets WHERE {condicao}) WHERE dispositivo <> '' "
+                "GROUP BY dispositivo ORDER BY n DESC, dispositivo"
+            )
+            agregados.dispositivos = dict(zip(dispositivos['dispositivo'], dispositivos['n'].astype(int)))
+            
+            timeline = consultar(
+                "SELECT CAST(data_criacao AS DATE) AS dia, status, count(*) AS n FROM tickets "
+                "WHERE data_criacao >= ? AND status IS NOT NULL AND {condicao} GROUP BY ALL",
+                (data_limite,)
+            )
+            agregados.timeline = {(dia.date() if isinstance(dia, pd.Timestamp) else dia, status): int(n)
+                                  for dia, status, n in timeline.itertuples(index=False, name=None)}
+            
+            # Horário da semana com segunda 00h = 0 (isodow: segunda = 1)
+            horarios = con.execute(
+                f"SELECT 'chegada' AS evento, coalesce(prioridade, '') AS prioridade, "
+                f"(isodow(data_criacao) - 1) * 24 + hour(data_criacao) AS horario, count(*) AS n FROM tickets "
+                f"WHERE data_criacao IS NOT NULL AND {condicao} GROUP BY ALL "
+                f"UNION ALL SELECT 'conclusao', coalesce(prioridade, ''), "
+                f"(isodow(data_conclusao) - 1) * 24 + hour(data_conclusao), count(*) FROM tickets "
+                f"WHERE status = 'Concluída' AND data_conclusao IS NOT NULL AND {condicao_conclusao} GROUP BY ALL",
+                parametros + parametros_conclusao
+            ).df()
+            agregados.horarios = {(evento, prioridade, int(horario)): int(n)
+                                  for evento, prioridade, horario, n in horarios.itertuples(index=False, name=None)}
+        finally:
+            con.close()
+        return agregados
+
+def criar_motor_analitico(storage, diretorio: str, limite_linhas: int = 1000, timeout_segundos: float = 30,
+                          calendario: Optional[CalendarioUteis] = None) -> Optional[MotorAnalitico]:
+    """Motor analítico, ou None se o DuckDB não estiver instalado"""
+    if duckdb is None:
+        return None
+    return MotorAnalitico(storage, diretorio, limite_linhas, timeout_segundos, calendario)
@@ -0,0 +1,142 @@
+"""
+Catálogo dos arquivos de relatórios (nomes por conteúdo, retenção e índice)
+"""
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from cache_relatorios import gravar_atomico
+
+try:
+    import fcntl
+except ImportError:  # Windows: o lock entre processos não está disponível
+    fcntl = None
+
+def tamanho_artefato(caminho: str) -> int:
+    """Bytes de um arquivo ou, para um diretório (lote de relatórios), de todo o seu conteúdo"""
+    if not os.path.isdir(caminho):
+        return os.path.getsize(caminho)
+    return sum(os.path.getsize(os.path.join(raiz, nome))
+               for raiz, _, nomes in os.walk(caminho) for nome in nomes)
+
+class CatalogoArtefatos:
+    """Índice dos arquivos gerados em ``data/relatorios``
+    
+    Cada arquivo é nomeado pelo hash das entradas que o produziram (revisão
+    dos dados, tipo e parâmetros), então um pedido idêntico reaproveita o
+    arquivo existente. O índice ``catalogo.json`` lista os relatórios sem
+    varrer o diretório e aplica a retenção: no máximo ``max_por_tipo``
+    arquivos de cada tipo e ``max_bytes`` no total, descartando os usados há
+    mais tempo. Arquivos fora do catálogo (antigos ou avulsos) não são tocados.
+    Um artefato também pode ser um diretório (ex.: o lote por squad leader),
+    que é medido e removido por inteiro. O registro (releitura do índice,
+    alteração, retenção e gravação) roda sob um lock de arquivo, já que o
+    app e o agendador podem registrar ao mesmo tempo.
+    """
+    
+    def __init__(self, diretorio: str, max_por_tipo: int = 20, max_bytes: int = 200 * 1024 * 1024):
+        self.diretorio = diretorio
+        self.max_por_tipo = max_por_tipo
+        self.max_bytes = max_bytes
+        self.arquivo_indice = os.path.join(diretorio, 'catalogo.json')
+        self._lock = threading.RLock()
+        self._entradas: Dict[str, Dict] = {}
+        self._mtime_indice = None
+        self._recarregar()
+    
+    def caminho(self, prefixo: str, chave: str, extensao: Optional[str] = 'html') -> str:
+        """Caminho de um artefato endereçado pelo conteúdo (sem ``extensao``, um diretório)"""
+        nome = f"{prefixo}_{chave[:16]}"
+        return os.path.join(self.diretorio, f"{nome}.{extensao}" if extensao else nome)
+    
+    @contextmanager
+    def _travar(self):
+        """Seção exclusiva para leitura-modificação-escrita do índice (lock de arquivo entre processos)"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(self.diretorio, exist_ok=True)
+            with open(self.arquivo_indice + '.lock', 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _recarregar(self, forcar: bool = False):
+        """Relê o índice se outro processo (ex.: o agendador) o alterou"""
+        try:
+            mtime = os.stat(self.arquivo_indice).st_mtime_ns
+        except FileNotFoundError:
+            self._entradas = {}
+            self._mtime_indice = None
+            return
+        if mtime == self._mtime_indice and not forcar:
+            return
+        try:
+            with open(self.arquivo_indice, encoding='utf-8') as f:
+                self._entradas = json.load(f)
+        except (OSError, ValueError):
+            self._entradas = {}
+        self._mtime_indice = mtime
+    
+    def _salvar(self):
+        gravar_atomico(self.arquivo_indice, lambda f: json.dump(self._entradas, f, ensure_ascii=False))
+        self._mtime_indice = os.stat(self.arquivo_indice).st_mtime_ns
+    
+    def registrar(self, tipo: str, caminho: str, descricao: str = '') -> Dict:
+        """Registra (ou marca como usado) um arquivo gerado e aplica a retenção"""
+        agora = datetime.now().isoformat()
+        nome = os.path.basename(caminho)
+        with self._travar():
+            # Sob o lock o índice é sempre relido: duas gravações no mesmo tique do relógio têm o mesmo mtime
+            self._recarregar(forcar=True)
+            entrada = self._entradas.get(nome)
+            if entrada is None:
+                entrada = {'tipo': tipo, 'descricao': descricao, 'criado_em': agora}
+                self._entradas[nome] = entrada
+            entrada['bytes'] = tamanho_artefato(caminho)
+            entrada['usado_em'] = agora
+            self._aplicar_retencao(manter=nome)
+            self._salvar()
+        return dict(entrada, arquivo=caminho)
+    
+    def _aplicar_retencao(self, manter: str):
+        """Remove os arquivos menos usados além dos limites por tipo e de bytes"""
+        # O arquivo recém-registrado conta primeiro e nunca é removido
+        ordenados = sorted(self._entradas.items(), key=lambda item: (item[0] == manter, item[1]['usado_em']),
+                           reverse=True)
+        por_tipo: Dict[str, int] = {}
+        total = 0
+        for nome, entrada in ordenados:
+            por_tipo[entrada['tipo']] = por_tipo.get(entrada['tipo'], 0) + 1
+            total += entrada['bytes']
+            if nome != manter and (por_tipo[entrada['tipo']] > self.max_por_tipo or total > self.max_bytes):
+                total -= entrada['bytes']
+                por_tipo[entrada['tipo']] -= 1
+                self._remover(nome)
+    
+    def _remover(self, nome: str):
+        del self._entradas[nome]
+        caminho = os.path.join(self.diretorio, nome)
+        try:
+            if os.path.isdir(caminho):
+                shutil.rmtree(caminho)
+            else:
+                os.remove(caminho)
+        except FileNotFoundError:
+            pass
+    
+    def listar(self, tipo: Optional[str] = None) -> List[Dict]:
+        """Artefatos do catálogo, do usado mais recentemente para o mais antigo"""
+        with self._lock:
+            self._recarregar()
+            entradas = [dict(entrada, arquivo=os.path.join(self.diretorio, nome))
+                        for nome, entrada in self._entradas.items()
+                        if tipo is None or entrada['tipo'] == tipo]
+        return sorted(entradas, key=lambda entrada: entrada['usado_em'], reverse=True)
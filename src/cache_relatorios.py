@@ -0,0 +1,128 @@
+"""
+Cache de resultados de relatórios por versão dos dados (memória LRU + disco)
+"""
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import IO, Any, Callable, Hashable, Iterator, Optional, Tuple
+
+@contextmanager
+def substituicao_atomica(caminho: str) -> Iterator[str]:
+    """Temporário exclusivo do processo e da thread que substitui ``caminho`` ao fim do bloco
+    
+    Threads, processos do pool e outras réplicas podem gravar o mesmo arquivo
+    ao mesmo tempo; cada um usa o seu temporário e o último ``os.replace``
+    vence, sem arquivo truncado ou ausente. Em erro o temporário é apagado.
+    """
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        yield temporario
+        os.replace(temporario, caminho)
+    except BaseException:
+        try:
+            os.remove(temporario)
+        except OSError:
+            pass
+        raise
+
+def gravar_atomico(caminho: str, escrever: Callable[[IO], None], modo: str = 'w'):
+    """Grava ``caminho`` com ``escrever(arquivo)`` por um temporário exclusivo (``substituicao_atomica``)"""
+    with substituicao_atomica(caminho) as temporario:
+        with open(temporario, modo, **({} if 'b' in modo else {'encoding': 'utf-8'})) as f:
+            escrever(f)
+
+class CacheRelatorios:
+    """Cache de dois níveis para resultados de relatórios
+    
+    A chave inclui a revisão dos dados, então uma mudança em qualquer ticket
+    torna as entradas antigas inalcançáveis sem precisar de invalidação
+    explícita. O nível em memória é um LRU com ``max_itens`` entradas; o nível
+    em disco (opcional) guarda os resultados em pickle e sobrevive a
+    reinícios, mantendo no máximo ``max_itens_disco`` arquivos.
+    """
+    
+    def __init__(self, diretorio: Optional[str] = None, max_itens: int = 64, max_itens_disco: int = 256):
+        self.diretorio = diretorio
+        self.max_itens = max_itens
+        self.max_itens_disco = max_itens_disco
+        self._memoria: OrderedDict = OrderedDict()
+        self._lock = threading.RLock()
+        if diretorio and not os.path.exists(diretorio):
+            os.makedirs(diretorio)
+    
+    @staticmethod
+    def chave(revisao: Hashable, tipo: str, parametros: Optional[dict] = None) -> str:
+        """Chave estável para (revisão dos dados, tipo de relatório, parâmetros)"""
+        conteudo = json.dumps([revisao, tipo, parametros or {}], sort_keys=True, default=str)
+        return hashlib.sha1(conteudo.encode('utf-8')).hexdigest()
+    
+    def _arquivo(self, chave: str) -> str:
+        return os.path.join(self.diretorio, f"{chave}.pkl")
+    
+    def obter(self, chave: str) -> Tuple[bool, Any]:
+        """Retorna (encontrado, valor), promovendo acertos do disco para a memória"""
+        with self._lock:
+            if chave in self._memoria:
+                self._memoria.move_to_end(chave)
+                return True, self._memoria[chave]
+        
+        if self.diretorio:
+            try:
+                with open(self._arquivo(chave), 'rb') as f:
+                    valor = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                return False, None
+            # Atualiza o mtime para que a limpeza do disco remova os menos usados
+            try:
+                os.utime(self._arquivo(chave))
+            except OSError:
+                pass
+            self._guardar_memoria(chave, valor)
+            return True, valor
+        return False, None
+    
+    def guardar(self, chave: str, valor: Any):
+        """Guarda um resultado nos dois níveis"""
+        self._guardar_memoria(chave, valor)
+        if self.diretorio:
+            gravar_atomico(self._arquivo(chave), lambda f: pickle.dump(valor, f), 'wb')
+            self._limitar_disco()
+    
+    def _guardar_memoria(self, chave: str, valor: Any):
+        with self._lock:
+            self._memoria[chave] = valor
+            self._memoria.move_to_end(chave)
+            while len(self._memoria) > self.max_itens:
+                self._memoria.popitem(last=False)
+    
+    def _limitar_disco(self):
+        """Remove os arquivos menos usados além de ``max_itens_disco``"""
+        arquivos = [os.path.join(self.diretorio, nome) for nome in os.listdir(self.diretorio) if nome.endswith('.pkl')]
+        if len(arquivos) <= self.max_itens_disco:
+            return
+        usos = []
+        for caminho in arquivos:
+            try:
+                usos.append((os.stat(caminho).st_mtime, caminho))
+            except OSError:
+                # Removido por outro processo no meio da limpeza
+                continue
+        usos.sort()
+        for _, caminho in usos[:len(usos) - self.max_itens_disco]:
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
+    
+    def limpar(self):
+        """Descarta todas as entradas"""
+        with self._lock:
+            self._memoria.clear()
+        if self.diretorio:
+            for nome in os.listdir(self.diretorio):
+                if nome.endswith('.pkl'):
+                    os.remove(os.path.join(self.diretorio, nome))
@@ -115,13 +115,20 @@ def render_progress_ring(percentage, label, color="#667eea"):
     return fig
 
 def render_timeline_chart(df):
-    """Renderiza gráfico de timeline interativo"""
+    """Renderiza gráfico de timeline interativo
+    
+    Aceita os tickets brutos ou a série já agregada por dia e status
+    (colunas data_criacao, status e count), como a do rollup diário.
+    """
     if df.empty:
         return None
     
     # Prepara dados para timeline
-    df['data_criacao'] = pd.to_datetime(df['data_criacao'])
-    df_timeline = df.groupby([df['data_criacao'].dt.date, 'status']).size().reset_index(name='count')
+    if 'count' in df.columns:
+        df_timeline = df
+    else:
+        df['data_criacao'] = pd.to_datetime(df['data_criacao'])
+        df_timeline = df.groupby([df['data_criacao'].dt.date, 'status']).size().reset_index(name='count')
     
     fig = px.line(
         df_timeline,
@@ -160,6 +167,56 @@ def render_timeline_chart(df):
     
     return fig
 
+def render_projecao_backlog(projecao):
+    """Renderiza a projeção de tickets pendentes (colunas horario e pendentes)"""
+    if projecao.empty:
+        return None
+    
+    fig = px.area(
+        projecao,
+        x='horario',
+        y='pendentes',
+        title="🔮 Projeção da Fila (próximos 7 dias)",
+        color_discrete_sequence=['#667eea']
+    )
+    
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family="Inter, sans-serif"),
+        title_font_size=18,
+        title_x=0.5,
+        xaxis_title="Data",
+        yaxis_title="Tickets Pendentes (estimativa)"
+    )
+    
+    return fig
+
+def render_mapa_horarios(mapa, titulo):
+    """Renderiza o mapa de calor dia da semana × hora (DataFrame 7 × 24)"""
+    if not mapa.values.any():
+        return None
+    
+    fig = px.imshow(
+        mapa.values,
+        x=[f"{hora:02d}h" for hora in mapa.columns],
+        y=list(mapa.index),
+        color_continuous_scale='Purples',
+        aspect='auto',
+        labels=dict(x="Hora", y="Dia da Semana", color="Tickets"),
+        title=titulo
+    )
+    
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family="Inter, sans-serif"),
+        title_font_size=18,
+        title_x=0.5
+    )
+    
+    return fig
+
 def render_device_chart(dispositivos_stats):
     """Renderiza gráfico de dispositivos com estilo moderno"""
     if not dispositivos_stats:
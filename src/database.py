@@ -2,118 +2,516 @@
 Módulo para gerenciamento de dados da fila de suporte
 """
 import pandas as pd
+import hashlib
 import os
+import re
+import threading
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Union
 import uuid
 
+from previsao import PrevisaoFila
+from rollup import RollupDiario
+from scheduler import EscalonadorFila
+from storage import COLUNAS_FILA, CSVStorage, Predicado
+
+MODOS_OVERFLOW = ('rejeitar', 'espera', 'mesclar')
+
+# Ordem em que a lista de espera é promovida quando abre vaga
+ORDEM_PRIORIDADES = ['Urgente', 'Alta', 'Normal']
+
+def _normalizar_dispositivos(dispositivos) -> Tuple[str, ...]:
+    """Dispositivos de uma solicitação sem espaços, caixa ou ordem"""
+    return tuple(sorted(d.strip().lower() for d in str(dispositivos).split(',') if d.strip()))
+
+class FilaCheiaError(Exception):
+    """Erro levantado quando a fila não aceita novas solicitações"""
+    
+    def __init__(self, prioridade: str, limite: int):
+        self.prioridade = prioridade
+        self.limite = limite
+        super().__init__(
+            f"Fila cheia para a prioridade {prioridade} (limite de {limite} tickets pendentes)"
+        )
+
 class FilaManager:
     """Gerenciador da fila de suporte"""
     
-    def __init__(self, fila_file: str):
+    def __init__(self, fila_file: str, max_fila_size: Optional[int] = None,
+                 limites_por_prioridade: Optional[Dict[str, int]] = None,
+                 modo_overflow: str = 'rejeitar', lista_espera_file: Optional[str] = None,
+                 envelhecimento_horas: Optional[Dict[str, float]] = None, storage=None,
+                 janela_duplicidade_segundos: int = 0, rollup: Optional[RollupDiario] = None,
+                 previsao: Optional[PrevisaoFila] = None):
+        if modo_overflow not in MODOS_OVERFLOW:
+            raise ValueError(f"Modo de overflow inválido: {modo_overflow}")
+        
         self.fila_file = fila_file
-        self.ensure_data_dir()
-        self.init_fila_file()
-    
-    def ensure_data_dir(self):
-        """Garante que o diretório de dados existe"""
-        data_dir = os.path.dirname(self.fila_file)
-        if data_dir and not os.path.exists(data_dir):
-            os.makedirs(data_dir)
-    
-    def init_fila_file(self):
-        """Inicializa o arquivo da fila se não existir"""
-        if not os.path.exists(self.fila_file):
-            df = pd.DataFrame(columns=[
-                'id', 'data_criacao', 'data_solicitacao', 'nome', 'email', 
-                'telefone', 'squad_leader', 'dispositivos', 'necessidade', 
-                'status', 'prioridade', 'data_conclusao', 'observacoes'
-            ])
-            df.to_csv(self.fila_file, index=False)
+        self.max_fila_size = max_fila_size
+        self.limites_por_prioridade = dict(limites_por_prioridade or {})
+        self.modo_overflow = modo_overflow
+        self.lista_espera_file = lista_espera_file or os.path.join(
+            os.path.dirname(fila_file), 'fila_espera.csv'
+        )
+        self.envelhecimento_horas = envelhecimento_horas
+        self.janela_duplicidade_segundos = janela_duplicidade_segundos
+        # CSV por padrão; SQLiteStorage permite várias réplicas compartilhando os dados
+        self.storage = storage or CSVStorage(self.fila_file, self.lista_espera_file)
+        # Agregado diário usado pelo dashboard e pelos relatórios
+        self.rollup = rollup or RollupDiario(self.storage)
+        # Taxas de chegada e atendimento usadas nas ETAs
+        self.previsao = previsao or PrevisaoFila(self.storage)
+        self._lock = threading.RLock()
+        self._reconstruir_indices()
+    
+    @staticmethod
+    def _chave_duplicata(prioridade: str, dispositivos) -> Tuple:
+        """Chave usada para mesclar solicitações equivalentes"""
+        return (prioridade, _normalizar_dispositivos(dispositivos))
+    
+    @staticmethod
+    def _hash_conteudo(email, dispositivos, necessidade) -> str:
+        """Hash do conteúdo normalizado de uma solicitação (detecção de reenvio)"""
+        texto = re.sub(r'\s+', ' ', str(necessidade)).strip().lower()
+        conteudo = '\x1f'.join([str(email).strip().lower(), ','.join(_normalizar_dispositivos(dispositivos)), texto])
+        return hashlib.sha1(conteudo.encode('utf-8')).hexdigest()
+    
+    def _indexar_envio(self, hash_conteudo: str, ticket_id: str, instante: float):
+        """Registra um envio no índice de duplicidade, no balde de tempo do instante"""
+        balde = int(instante // self.janela_duplicidade_segundos)
+        self._envios_recentes[(hash_conteudo, balde)] = (ticket_id, instante)
+        self._expiracao_envios.append((balde, (hash_conteudo, balde)))
+    
+    def _buscar_envio_recente(self, hash_conteudo: str, instante: float) -> Optional[str]:
+        """Procura um envio igual dentro da janela: consulta o balde atual e o anterior (O(1))"""
+        balde = int(instante // self.janela_duplicidade_segundos)
+        # Descarta baldes que já saíram da janela
+        while self._expiracao_envios and self._expiracao_envios[0][0] < balde - 1:
+            _, chave = self._expiracao_envios.popleft()
+            self._envios_recentes.pop(chave, None)
+        for chave in ((hash_conteudo, balde), (hash_conteudo, balde - 1)):
+            encontrado = self._envios_recentes.get(chave)
+            if encontrado and instante - encontrado[1] <= self.janela_duplicidade_segundos:
+                return encontrado[0]
+        return None
+    
+    def _reconstruir_indices(self):
+        """Reconstrói os contadores de pendentes e a lista de espera a partir do armazenamento"""
+        self._versao = self.storage.versao()
+        df = self.storage.ler('fila')
+        df_pendentes = df[df['status'] == 'Pendente']
+        
+        self._pendentes_por_prioridade: Dict[str, int] = {}
+        self._pendentes_info: Dict[str, Tuple] = {}
+        self._pendentes_por_chave: Dict[Tuple, List[str]] = {}
+        self._total_pendentes = 0
+        self._escalonador = EscalonadorFila(self.envelhecimento_horas)
+        datas_criacao = pd.to_datetime(df_pendentes['data_criacao'], errors='coerce')
+        df_pendentes = df_pendentes.assign(data_criacao=datas_criacao).sort_values('data_criacao', kind='stable')
+        for ticket_id, prioridade, dispositivos, data_criacao in zip(
+            df_pendentes['id'], df_pendentes['prioridade'], df_pendentes['dispositivos'], df_pendentes['data_criacao']
+        ):
+            self._indexar_pendente(str(ticket_id), prioridade, dispositivos, data_criacao)
+        
+        df_espera = self.storage.ler('espera')
+        self._espera: Dict[str, deque] = {}
+        for ticket_id, prioridade in zip(df_espera['id'], df_espera['prioridade']):
+            self._espera.setdefault(prioridade, deque()).append(str(ticket_id))
+        # Tickets reabertos com a fila cheia: a linha fica na fila e a espera guarda só a referência
+        referencias = df_espera['id'].astype(str).isin(set(df['id'].astype(str)))
+        self._espera_na_fila = set(df_espera.loc[referencias, 'id'].astype(str))
+        df_espera = df_espera[~referencias]
+        
+        # Índice de duplicidade com os envios ainda dentro da janela
+        self._envios_recentes: Dict[Tuple, Tuple] = {}
+        self._expiracao_envios: deque = deque()
+        if self.janela_duplicidade_segundos > 0:
+            df_todos = pd.concat([df, df_espera], ignore_index=True)
+            instantes = pd.to_datetime(df_todos['data_criacao'], errors='coerce')
+            limite = pd.Timestamp.now() - pd.Timedelta(seconds=2 * self.janela_duplicidade_segundos)
+            df_recentes = df_todos[instantes >= limite].assign(instante=instantes[instantes >= limite])
+            for linha in df_recentes.sort_values('instante').itertuples(index=False):
+                hash_conteudo = self._hash_conteudo(linha.email, linha.dispositivos, linha.necessidade)
+                self._indexar_envio(hash_conteudo, str(linha.id), linha.instante.timestamp())
+    
+    def _sincronizar(self):
+        """Recarrega os índices se outra réplica ou processo alterou os dados"""
+        if self.storage.versao() != self._versao:
+            self._reconstruir_indices()
+        self.rollup.sincronizar()
+    
+    @property
+    def versao_dados(self):
+        """Versão atual dos dados no armazenamento"""
+        return self.storage.versao()
+    
+    def _indexar_pendente(self, ticket_id: str, prioridade: str, dispositivos, data_criacao=None):
+        chave = self._chave_duplicata(prioridade, dispositivos)
+        data_criacao = pd.to_datetime(data_criacao, errors='coerce')
+        self._escalonador.inserir(ticket_id, prioridade, pd.Timestamp.now() if pd.isna(data_criacao) else data_criacao)
+        self._pendentes_info[ticket_id] = (prioridade, chave)
+        self._pendentes_por_prioridade[prioridade] = self._pendentes_por_prioridade.get(prioridade, 0) + 1
+        self._pendentes_por_chave.setdefault(chave, []).append(ticket_id)
+        self._total_pendentes += 1
+    
+    def _desindexar_pendente(self, ticket_id: str):
+        info = self._pendentes_info.pop(ticket_id, None)
+        if info is None:
+            return
+        prioridade, chave = info
+        self._escalonador.remover(ticket_id)
+        self._pendentes_por_prioridade[prioridade] -= 1
+        ids = self._pendentes_por_chave.get(chave, [])
+        if ticket_id in ids:
+            ids.remove(ticket_id)
+        if not ids:
+            self._pendentes_por_chave.pop(chave, None)
+        self._total_pendentes -= 1
+    
+    def _limite_excedido(self, prioridade: str) -> Optional[int]:
+        """Retorna o limite atingido para a prioridade, ou None se houver vaga (O(1))"""
+        limite = self.limites_por_prioridade.get(prioridade)
+        if limite is not None and self._pendentes_por_prioridade.get(prioridade, 0) >= limite:
+            return limite
+        if self.max_fila_size is not None and self._total_pendentes >= self.max_fila_size:
+            return self.max_fila_size
+        return None
+    
+    def fila_cheia(self, prioridade: str = 'Normal') -> bool:
+        """Indica se uma nova solicitação com esta prioridade excede os limites"""
+        with self._lock:
+            self._sincronizar()
+            return self._limite_excedido(prioridade) is not None
+    
+    def obter_situacao_fila(self) -> Dict:
+        """Retorna a ocupação da fila por prioridade para exibição"""
+        with self._lock:
+            self._sincronizar()
+            return {
+                'pendentes': self._total_pendentes,
+                'limite_total': self.max_fila_size,
+                'pendentes_por_prioridade': dict(self._pendentes_por_prioridade),
+                'limites_por_prioridade': dict(self.limites_por_prioridade),
+                'em_espera': sum(len(ids) for ids in self._espera.values()),
+                'modo_overflow': self.modo_overflow
+            }
     
     def adicionar_solicitacao(self, dados: Dict) -> str:
-        """Adiciona uma nova solicitação à fila"""
-        df = pd.read_csv(self.fila_file)
-        
-        # Gera ID único
-        ticket_id = str(uuid.uuid4())[:8].upper()
-        
-        # Prepara dados da nova solicitação
-        nova_linha = {
-            'id': ticket_id,
-            'data_criacao': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            'data_solicitacao': dados.get('data_solicitacao', datetime.now().strftime("%Y-%m-%d")),
-            'nome': dados.get('nome', ''),
-            'email': dados.get('email', ''),
-            'telefone': dados.get('telefone', ''),
-            'squad_leader': dados.get('squad_leader', ''),
-            'dispositivos': dados.get('dispositivos', ''),
-            'necessidade': dados.get('necessidade', ''),
-            'status': 'Pendente',
-            'prioridade': dados.get('prioridade', 'Normal'),
-            'data_conclusao': '',
-            'observacoes': ''
-        }
+        """Adiciona uma nova solicitação à fila
         
-        # Adiciona à fila
-        df = pd.concat([df, pd.DataFrame([nova_linha])], ignore_index=True)
-        df.to_csv(self.fila_file, index=False)
+        Um reenvio com o mesmo conteúdo (e-mail, dispositivos e necessidade)
+        dentro de ``janela_duplicidade_segundos`` retorna o ID já criado.
+        Quando a fila está cheia o comportamento segue ``modo_overflow``:
+        ``rejeitar`` levanta ``FilaCheiaError``, ``espera`` grava o ticket na
+        lista de espera e ``mesclar`` anexa a solicitação a um ticket pendente
+        equivalente (mesma prioridade e dispositivos), retornando o seu ID.
+        """
+        with self._lock, self.storage.transacao():
+            self._sincronizar()
+            revisao_anterior = self.storage.revisao()
+            
+            # Detecção de envio duplicado (duplo clique, reenvio após rerun lento)
+            hash_conteudo = None
+            if self.janela_duplicidade_segundos > 0:
+                hash_conteudo = self._hash_conteudo(
+                    dados.get('email', ''), dados.get('dispositivos', ''), dados.get('necessidade', '')
+                )
+                ticket_existente = self._buscar_envio_recente(hash_conteudo, pd.Timestamp.now().timestamp())
+                if ticket_existente:
+                    return ticket_existente
+            
+            # Gera ID único
+            ticket_id = str(uuid.uuid4())[:8].upper()
+            
+            # Prepara dados da nova solicitação
+            nova_linha = {
+                'id': ticket_id,
+                'data_criacao': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'data_solicitacao': dados.get('data_solicitacao', datetime.now().strftime("%Y-%m-%d")),
+                'nome': dados.get('nome', ''),
+                'email': dados.get('email', ''),
+                'telefone': dados.get('telefone', ''),
+                'squad_leader': dados.get('squad_leader', ''),
+                'dispositivos': dados.get('dispositivos', ''),
+                'necessidade': dados.get('necessidade', ''),
+                'status': 'Pendente',
+                'prioridade': dados.get('prioridade', 'Normal'),
+                'data_conclusao': '',
+                'observacoes': ''
+            }
+            
+            mudancas = []
+            limite = self._limite_excedido(nova_linha['prioridade'])
+            if limite is not None:
+                if self.modo_overflow == 'espera':
+                    ticket_id = self._adicionar_espera(nova_linha)
+                else:
+                    ticket_id = self._mesclar_duplicata(nova_linha) if self.modo_overflow == 'mesclar' else None
+                    if not ticket_id:
+                        raise FilaCheiaError(nova_linha['prioridade'], limite)
+            else:
+                # Adiciona à fila
+                self.storage.anexar([nova_linha], 'fila')
+                mudancas.append((None, nova_linha))
+                
+                self._indexar_pendente(ticket_id, nova_linha['prioridade'], nova_linha['dispositivos'],
+                                       nova_linha['data_criacao'])
+                self._versao = self.storage.versao()
+            self.rollup.aplicar(mudancas, revisao_anterior, self.storage.revisao())
+            
+            if hash_conteudo:
+                self._indexar_envio(hash_conteudo, ticket_id, pd.Timestamp(nova_linha['data_criacao']).timestamp())
+            
+            return ticket_id
+    
+    def _adicionar_espera(self, nova_linha: Dict) -> str:
+        """Grava a solicitação na lista de espera"""
+        linha = dict(nova_linha, status='Em espera')
+        self.storage.anexar([linha], 'espera')
+        
+        self._espera.setdefault(linha['prioridade'], deque()).append(linha['id'])
+        self._versao = self.storage.versao()
+        return linha['id']
+    
+    def _mesclar_duplicata(self, nova_linha: Dict) -> Optional[str]:
+        """Anexa a solicitação a um ticket pendente equivalente, se existir"""
+        chave = self._chave_duplicata(nova_linha['prioridade'], nova_linha['dispositivos'])
+        ids = self._pendentes_por_chave.get(chave)
+        if not ids:
+            return None
+        
+        ticket_id = ids[0]
+        existente = self.storage.obter(ticket_id, 'fila') or {}
+        observacoes = existente.get('observacoes')
+        observacoes = '' if pd.isna(observacoes) else str(observacoes)
+        nota = (f"[{nova_linha['data_criacao']}] Mesclado: {nova_linha['nome']} "
+                f"<{nova_linha['email']}> - {nova_linha['necessidade']}")
+        self.storage.atualizar(ticket_id, {'observacoes': (observacoes + '\n' + nota).strip()}, 'fila')
         
+        self._versao = self.storage.versao()
         return ticket_id
     
-    def obter_posicao_fila(self, ticket_id: str) -> int:
-        """Obtém a posição na fila de um ticket específico"""
-        df = pd.read_csv(self.fila_file)
-        df_pendentes = df[df['status'] == 'Pendente'].reset_index(drop=True)
-        
-        try:
-            posicao = df_pendentes[df_pendentes['id'] == ticket_id].index[0] + 1
-            return posicao
-        except IndexError:
+    def buscar_duplicata(self, dados: Dict) -> Optional[str]:
+        """Retorna o ID de uma solicitação igual enviada dentro da janela de duplicidade"""
+        if self.janela_duplicidade_segundos <= 0:
+            return None
+        with self._lock:
+            self._sincronizar()
+            hash_conteudo = self._hash_conteudo(
+                dados.get('email', ''), dados.get('dispositivos', ''), dados.get('necessidade', '')
+            )
+            return self._buscar_envio_recente(hash_conteudo, pd.Timestamp.now().timestamp())
+    
+    def em_espera(self, ticket_id: str) -> bool:
+        """Indica se o ticket está na lista de espera"""
+        with self._lock:
+            self._sincronizar()
+            return any(ticket_id in ids for ids in self._espera.values())
+    
+    def obter_posicao_espera(self, ticket_id: str) -> int:
+        """Obtém a posição do ticket na lista de espera da sua prioridade"""
+        with self._lock:
+            self._sincronizar()
+            for ids in self._espera.values():
+                if ticket_id in ids:
+                    return list(ids).index(ticket_id) + 1
             return -1
     
+    def _adicionar_referencia_espera(self, linha: Dict):
+        """Põe na lista de espera um ticket que continua na fila (reaberto com a fila cheia)"""
+        referencia = dict.fromkeys(COLUNAS_FILA, '')
+        referencia.update(id=linha['id'], prioridade=linha['prioridade'], status='Em espera',
+                          data_criacao=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        self.storage.anexar([referencia], 'espera')
+        self._espera.setdefault(linha['prioridade'], deque()).append(linha['id'])
+        self._espera_na_fila.add(linha['id'])
+    
+    def _retirar_referencia_espera(self, ticket_id: str):
+        """Tira da lista de espera um ticket reaberto cujo status mudou antes da promoção"""
+        self._espera_na_fila.discard(ticket_id)
+        for ids in self._espera.values():
+            if ticket_id in ids:
+                ids.remove(ticket_id)
+        self.storage.remover([ticket_id], 'espera')
+    
+    def _promover_espera(self) -> List[Tuple[Optional[Dict], Dict]]:
+        """Move tickets da lista de espera para a fila enquanto houver vaga
+        
+        Retorna as mudanças (linha antiga, linha nova) na fila: solicitações
+        novas entram como inserção e tickets reabertos, que já estavam na
+        fila, só mudam de Em espera para Pendente.
+        """
+        if not any(self._espera.values()):
+            return []
+        
+        df_espera = self.storage.ler('espera')
+        promovidos = []
+        novos = []
+        mudancas = []
+        for prioridade in ORDEM_PRIORIDADES + [p for p in self._espera if p not in ORDEM_PRIORIDADES]:
+            ids = self._espera.get(prioridade)
+            while ids and self._limite_excedido(prioridade) is None:
+                ticket_id = ids.popleft()
+                if ticket_id in self._espera_na_fila:
+                    self._espera_na_fila.discard(ticket_id)
+                    antiga = self.storage.obter(ticket_id, 'fila')
+                    promovidos.append(ticket_id)
+                    if antiga is None:
+                        continue
+                    self._indexar_pendente(ticket_id, prioridade, antiga['dispositivos'], antiga['data_criacao'])
+                    self.storage.atualizar(ticket_id, {'status': 'Pendente'}, 'fila')
+                    mudancas.append((antiga, dict(antiga, status='Pendente')))
+                    continue
+                linha = df_espera[df_espera['id'].astype(str) == ticket_id]
+                if linha.empty:
+                    continue
+                self._indexar_pendente(ticket_id, prioridade, linha['dispositivos'].iloc[0],
+                                       linha['data_criacao'].iloc[0])
+                promovidos.append(ticket_id)
+                novos.append(ticket_id)
+        
+        if not promovidos:
+            return []
+        
+        linhas = df_espera[df_espera['id'].astype(str).isin(novos)].assign(status='Pendente').to_dict('records')
+        self.storage.remover(promovidos, 'espera')
+        if linhas:
+            self.storage.anexar(linhas, 'fila')
+        return mudancas + [(None, linha) for linha in linhas]
+    
+    def obter_posicao_fila(self, ticket_id: str) -> int:
+        """Obtém a posição na fila de um ticket específico, considerando prioridade e envelhecimento"""
+        with self._lock:
+            self._sincronizar()
+            return self._escalonador.posicao(ticket_id)
+    
+    def obter_proximo_ticket(self) -> Optional[str]:
+        """Retorna o ID do próximo ticket a ser atendido"""
+        with self._lock:
+            self._sincronizar()
+            return self._escalonador.proximo()
+    
+    def obter_ordem_atendimento(self) -> List[str]:
+        """Retorna os tickets pendentes na ordem de atendimento"""
+        with self._lock:
+            self._sincronizar()
+            return self._escalonador.ordem_atendimento()
+    
+    def obter_previsao_conclusao(self, ticket_id: str) -> Optional[datetime]:
+        """Conclusão estimada de um ticket pendente, pela sua posição e pelas taxas históricas"""
+        posicao = self.obter_posicao_fila(ticket_id)
+        if posicao <= 0:
+            return None
+        return self.previsao.estimar([posicao])[0]
+    
+    def obter_previsoes(self) -> Dict[str, Optional[datetime]]:
+        """Conclusão estimada de todos os tickets pendentes, na ordem de atendimento"""
+        ordem = self.obter_ordem_atendimento()
+        return dict(zip(ordem, self.previsao.estimar(range(1, len(ordem) + 1))))
+    
+    def projetar_backlog(self, horas: int = 7 * 24) -> pd.DataFrame:
+        """Pendentes esperados nas próximas horas, a partir da fila atual"""
+        return self.previsao.projetar(self.obter_situacao_fila()['pendentes'], horas)
+    
     def obter_estatisticas(self) -> Dict:
-        """Obtém estatísticas da fila"""
-        df = pd.read_csv(self.fila_file)
-        
-        total_solicitacoes = len(df)
-        pendentes = len(df[df['status'] == 'Pendente'])
-        em_andamento = len(df[df['status'] == 'Em andamento'])
-        concluidas = len(df[df['status'] == 'Concluída'])
-        
-        # Estatísticas por dispositivo
-        dispositivos_stats = {}
-        for _, row in df.iterrows():
-            dispositivos = str(row['dispositivos']).split(', ')
-            for dispositivo in dispositivos:
-                if dispositivo and dispositivo != 'nan':
-                    dispositivos_stats[dispositivo] = dispositivos_stats.get(dispositivo, 0) + 1
+        """Obtém estatísticas da fila (lidas do rollup diário, sem varrer os tickets)"""
+        self.rollup.sincronizar()
+        agregados = self.rollup.agregados()
         
         return {
-            'total_solicitacoes': total_solicitacoes,
-            'pendentes': pendentes,
-            'em_andamento': em_andamento,
-            'concluidas': concluidas,
-            'dispositivos_mais_solicitados': dispositivos_stats
+            'total_solicitacoes': agregados.total_tickets,
+            'pendentes': agregados.por_status.get('Pendente', 0),
+            'em_andamento': agregados.por_status.get('Em andamento', 0),
+            'concluidas': agregados.por_status.get('Concluída', 0),
+            # Estatísticas por dispositivo (da mais para a menos solicitada)
+            'dispositivos_mais_solicitados': agregados.dispositivos
         }
     
+    def obter_recentes(self, n: int = 10) -> pd.DataFrame:
+        """Os ``n`` tickets criados mais recentemente, lendo só os últimos dias (recorte pelo rollup)"""
+        self.rollup.sincronizar()
+        dia = self.rollup.dia_inicial_recentes(n)
+        blocos = list(self.storage.ler_blocos('fila', predicado=Predicado(inicio=dia) if dia else None))
+        df = pd.concat(blocos, ignore_index=True) if blocos else pd.DataFrame(columns=COLUNAS_FILA)
+        return df.sort_values('data_criacao', ascending=False).head(n)
+    
     def obter_dados_completos(self) -> pd.DataFrame:
         """Retorna todos os dados da fila"""
-        return pd.read_csv(self.fila_file)
+        return self.storage.ler('fila')
     
-    def atualizar_status(self, ticket_id: str, novo_status: str, observacoes: str = ""):
-        """Atualiza o status de um ticket"""
-        df = pd.read_csv(self.fila_file)
-        mask = df['id'] == ticket_id
+    def atualizar_status(self, ticket_id: str, novo_status: str, observacoes: str = "") -> Union[bool, str]:
+        """Atualiza o status de um ticket
         
-        if mask.any():
-            df.loc[mask, 'status'] = novo_status
-            if observacoes:
-                df.loc[mask, 'observacoes'] = observacoes
-            if novo_status == 'Concluída':
-                df.loc[mask, 'data_conclusao'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        Reabrir um ticket (voltar para Pendente) passa pelos mesmos limites de
+        ``adicionar_solicitacao``: com a fila cheia, ``rejeitar`` levanta
+        ``FilaCheiaError``, ``espera`` deixa o ticket na fila com o status Em
+        espera até abrir vaga e ``mesclar`` anexa a reabertura a um ticket
+        pendente equivalente. Retorna True se o status mudou, False se o
+        ticket não existe ou, quando a reabertura foi mesclada, o ID do ticket
+        que a recebeu (o ticket reaberto continua com o status anterior).
+        """
+        with self._lock, self.storage.transacao():
+            self._sincronizar()
+            revisao_anterior = self.storage.revisao()
+            linha = self.storage.obter(ticket_id, 'fila')
             
-            df.to_csv(self.fila_file, index=False)
+            if linha is not None:
+                if novo_status == 'Pendente' and ticket_id not in self._pendentes_info:
+                    limite = self._limite_excedido(linha['prioridade'])
+                    if limite is not None:
+                        return self._reabrir_com_fila_cheia(linha, limite, observacoes, revisao_anterior)
+                campos = {'status': novo_status}
+                if observacoes:
+                    campos['observacoes'] = observacoes
+                if novo_status == 'Concluída':
+                    campos['data_conclusao'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                elif linha['status'] == 'Concluída':
+                    # Reaberto: a conclusão anterior deixa de valer
+                    campos['data_conclusao'] = ''
+                self.storage.atualizar(ticket_id, campos, 'fila')
+                mudancas = [(linha, dict(linha, **campos))]
+                if ticket_id in self._espera_na_fila:
+                    self._retirar_referencia_espera(ticket_id)
+                
+                # Mantém os contadores de admissão e libera vagas da lista de espera
+                if novo_status == 'Pendente':
+                    if ticket_id not in self._pendentes_info:
+                        self._indexar_pendente(ticket_id, linha['prioridade'], linha['dispositivos'],
+                                               linha['data_criacao'])
+                else:
+                    self._desindexar_pendente(ticket_id)
+                    mudancas.extend(self._promover_espera())
+                
+                self._versao = self.storage.versao()
+                self.rollup.aplicar(mudancas, revisao_anterior, self.storage.revisao())
+                return True
+            return False
+    
+    def _reabrir_com_fila_cheia(self, linha: Dict, limite: int, observacoes: str,
+                                revisao_anterior) -> Union[bool, str]:
+        """Reabertura de um ticket quando a prioridade (ou a fila) já está no limite
+        
+        Em ``espera`` a linha continua na fila (histórico, relatórios e grade
+        do admin), sem a data de conclusão, e a lista de espera guarda só a
+        referência ao ticket; na promoção o status passa a Pendente.
+        """
+        if self.modo_overflow == 'espera':
+            campos = {'status': 'Em espera', 'data_conclusao': ''}
+            if observacoes:
+                campos['observacoes'] = observacoes
+            self.storage.atualizar(linha['id'], campos, 'fila')
+            if linha['id'] not in self._espera_na_fila:
+                self._adicionar_referencia_espera(linha)
+            self._versao = self.storage.versao()
+            self.rollup.aplicar([(linha, dict(linha, **campos))], revisao_anterior, self.storage.revisao())
             return True
-        return False
-
+        
+        if self.modo_overflow == 'mesclar':
+            reaberto = dict(linha, data_criacao=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                            necessidade=f"Reabertura do ticket {linha['id']}. {observacoes}".strip())
+            mesclado_em = self._mesclar_duplicata(reaberto)
+            if mesclado_em:
+                self.rollup.aplicar([], revisao_anterior, self.storage.revisao())
+                return mesclado_em
+        raise FilaCheiaError(linha['prioridade'], limite)
@@ -0,0 +1,66 @@
+"""
+Agregação vetorizada dos dispositivos solicitados nos tickets
+"""
+from typing import List, Optional, Union
+
+import pandas as pd
+
+AGRUPAMENTOS = ('status', 'prioridade', 'squad_leader')
+
+# Períodos aceitos em ``contar_dispositivos(periodo=...)``
+PERIODOS = {'dia': 'D', 'semana': 'W', 'mes': 'M'}
+
+def explodir_dispositivos(df: pd.DataFrame, colunas: Optional[List[str]] = None) -> pd.DataFrame:
+    """Uma linha por (ticket, dispositivo), mantendo as colunas pedidas
+    
+    A coluna ``dispositivos`` guarda uma lista separada por vírgulas
+    ("Mouse, Teclado"); os itens são separados, aparados e os vazios descartados.
+    """
+    colunas = [c for c in (colunas or []) if c != 'dispositivos']
+    if df.empty:
+        return pd.DataFrame(columns=colunas + ['dispositivo'])
+    
+    validos = df['dispositivos'].notna().to_numpy()
+    base = df.loc[validos, colunas].copy()
+    base['dispositivo'] = df.loc[validos, 'dispositivos'].astype(str).str.split(',')
+    explodido = base.explode('dispositivo', ignore_index=True)
+    explodido['dispositivo'] = explodido['dispositivo'].str.strip()
+    return explodido[explodido['dispositivo'].fillna('') != '']
+
+def contar_dispositivos(df: pd.DataFrame, por: Union[str, List[str], None] = None,
+                        periodo: Optional[str] = None, top: Optional[int] = None) -> Union[pd.Series, pd.DataFrame]:
+    """Conta solicitações por dispositivo
+    
+    Sem agrupamento retorna uma Series ordenada da mais para a menos pedida.
+    Com ``por`` (status, prioridade, squad_leader) e/ou ``periodo``
+    (dia, semana, mes, sobre ``data_criacao``) retorna uma tabela com uma
+    linha por dispositivo e uma coluna por grupo. ``top`` limita aos
+    dispositivos mais solicitados no total.
+    """
+    grupos = [por] if isinstance(por, str) else list(por or [])
+    for grupo in grupos:
+        if grupo not in AGRUPAMENTOS:
+            raise ValueError(f"Agrupamento inválido: {grupo}")
+    if periodo is not None and periodo not in PERIODOS:
+        raise ValueError(f"Período inválido: {periodo}")
+    
+    colunas = grupos + (['data_criacao'] if periodo else [])
+    explodido = explodir_dispositivos(df, colunas)
+    
+    if periodo:
+        datas = pd.to_datetime(explodido['data_criacao'], errors='coerce')
+        explodido = explodido[datas.notna()].assign(
+            periodo=datas[datas.notna()].dt.to_period(PERIODOS[periodo]).astype(str)
+        )
+        grupos = grupos + ['periodo']
+    
+    if not grupos:
+        contagem = explodido['dispositivo'].value_counts()
+        contagem.index.name = None
+        contagem.name = None
+        return contagem.head(top) if top else contagem
+    
+    tabela = explodido.groupby(['dispositivo'] + grupos, observed=True).size().unstack(grupos, fill_value=0)
+    totais = tabela.sum(axis=1).sort_values(ascending=False, kind='stable')
+    tabela = tabela.loc[totais.index]
+    return tabela.head(top) if top else tabela
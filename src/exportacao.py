@@ -0,0 +1,119 @@
+"""
+Exportação dos tickets em CSV e Excel por streaming (memória limitada)
+"""
+import os
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+from artefatos import CatalogoArtefatos
+from cache_relatorios import CacheRelatorios, substituicao_atomica
+from report_engine import FiltroRelatorio
+from storage import COLUNAS_FILA
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+FORMATOS = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+
+# Linhas por planilha no Excel (incluindo o cabeçalho)
+LIMITE_LINHAS_XLSX = 1048576
+
+def blocos_filtrados(storage, colunas: Optional[Sequence[str]] = None, filtro: Optional[FiltroRelatorio] = None,
+                     tamanho: int = 50000) -> Iterator[pd.DataFrame]:
+    """Blocos da fila já filtrados e com as colunas pedidas, lidos sob demanda
+    
+    O recorte é empurrado para o armazenamento; a conferência final com as
+    datas convertidas garante o mesmo resultado de ``FiltroRelatorio.aplicar``.
+    """
+    colunas = list(colunas or COLUNAS_FILA)
+    predicado = filtro.predicado() if filtro is not None else None
+    for bloco in storage.ler_blocos('fila', tamanho, predicado):
+        if filtro is not None:
+            datas = bloco.assign(data_criacao=pd.to_datetime(bloco['data_criacao'], errors='coerce'))
+            bloco = bloco.loc[filtro.aplicar(datas).index]
+        if not bloco.empty:
+            yield bloco[colunas]
+
+def gerar_csv(blocos: Iterable[pd.DataFrame], colunas: List[str]) -> Iterator[str]:
+    """CSV em pedaços: o cabeçalho e depois um pedaço por bloco"""
+    yield pd.DataFrame(columns=colunas).to_csv(index=False)
+    for bloco in blocos:
+        yield bloco.to_csv(index=False, header=False)
+
+def gravar_csv(blocos: Iterable[pd.DataFrame], colunas: List[str], caminho: str):
+    with open(caminho, 'w', encoding='utf-8', newline='') as f:
+        for pedaco in gerar_csv(blocos, colunas):
+            f.write(pedaco)
+
+def gravar_xlsx(blocos: Iterable[pd.DataFrame], colunas: List[str], caminho: str):
+    """Grava um Excel linha a linha (modo constant_memory do xlsxwriter)
+    
+    Acima do limite de linhas do Excel os dados continuam em novas planilhas.
+    """
+    if xlsxwriter is None:
+        raise ImportError("Exportação em Excel requer o pacote xlsxwriter (pip install xlsxwriter)")
+    
+    workbook = xlsxwriter.Workbook(caminho, {'constant_memory': True})
+    negrito = workbook.add_format({'bold': True})
+    planilhas = 0
+    linha = LIMITE_LINHAS_XLSX
+    for bloco in blocos:
+        for valores in bloco.itertuples(index=False, name=None):
+            if linha >= LIMITE_LINHAS_XLSX:
+                planilhas += 1
+                planilha = workbook.add_worksheet('Tickets' if planilhas == 1 else f'Tickets ({planilhas})')
+                planilha.write_row(0, 0, colunas, negrito)
+                linha = 1
+            planilha.write_row(linha, 0, ['' if pd.isna(valor) else valor for valor in valores])
+            linha += 1
+    if planilhas == 0:
+        workbook.add_worksheet('Tickets').write_row(0, 0, colunas, negrito)
+    workbook.close()
+
+class ExportadorDados:
+    """Gera arquivos de exportação sob demanda
+    
+    Os tickets são lidos em blocos e gravados direto no arquivo, sem montar
+    o conteúdo inteiro em memória. O arquivo é nomeado pela revisão dos dados
+    e pelos parâmetros, então downloads repetidos reaproveitam o mesmo
+    arquivo enquanto os dados não mudam.
+    """
+    
+    def __init__(self, storage, diretorio: str, max_arquivos: int = 10, max_bytes: int = 500 * 1024 * 1024):
+        self.storage = storage
+        if not os.path.exists(diretorio):
+            os.makedirs(diretorio)
+        self.catalogo = CatalogoArtefatos(diretorio, max_por_tipo=max_arquivos, max_bytes=max_bytes)
+    
+    def exportar(self, formato: str = 'csv', colunas: Optional[Sequence[str]] = None,
+                 filtro: Optional[FiltroRelatorio] = None) -> str:
+        """Caminho do arquivo exportado, gerado só se ainda não existir para esta revisão"""
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato de exportação inválido: {formato}")
+        colunas = list(COLUNAS_FILA) if colunas is None else [coluna for coluna in colunas if coluna in COLUNAS_FILA]
+        if not colunas:
+            raise ValueError("Selecione ao menos uma coluna para exportar")
+        
+        parametros = {
+            'colunas': colunas,
+            'filtro': filtro.parametros() if filtro else None
+        }
+        chave = CacheRelatorios.chave(self.storage.revisao(), f'exportacao_{formato}', parametros)
+        caminho = self.catalogo.caminho('tickets', chave, formato)
+        
+        if not os.path.exists(caminho):
+            blocos = blocos_filtrados(self.storage, colunas, filtro)
+            with substituicao_atomica(caminho) as temporario:
+                if formato == 'xlsx':
+                    gravar_xlsx(blocos, colunas, temporario)
+                else:
+                    gravar_csv(blocos, colunas, temporario)
+        
+        self.catalogo.registrar(f'exportacao_{formato}', caminho, (filtro or FiltroRelatorio()).descricao())
+        return caminho
@@ -0,0 +1,243 @@
+"""
+Módulo para importação em lote de históricos de tickets (CSV/XLSX)
+"""
+import os
+import unicodedata
+import uuid
+from typing import Callable, Dict, Iterator, Optional
+
+import pandas as pd
+
+from storage import COLUNAS_FILA
+
+# Nomes de colunas aceitos (normalizados: minúsculas, sem acentos) -> coluna da fila
+ALIASES_COLUNAS = {
+    'id': 'id', 'ticket': 'id', 'ticket id': 'id', 'numero': 'id',
+    'data_criacao': 'data_criacao', 'data criacao': 'data_criacao', 'criado em': 'data_criacao',
+    'created': 'data_criacao', 'created at': 'data_criacao',
+    'data_solicitacao': 'data_solicitacao', 'data solicitacao': 'data_solicitacao', 'data': 'data_solicitacao',
+    'nome': 'nome', 'solicitante': 'nome', 'requester': 'nome', 'name': 'nome',
+    'email': 'email', 'e-mail': 'email', 'requester email': 'email',
+    'telefone': 'telefone', 'celular': 'telefone', 'phone': 'telefone',
+    'squad_leader': 'squad_leader', 'squad leader': 'squad_leader', 'lider': 'squad_leader',
+    'dispositivos': 'dispositivos', 'dispositivo': 'dispositivos', 'itens': 'dispositivos', 'category': 'dispositivos',
+    'necessidade': 'necessidade', 'descricao': 'necessidade', 'description': 'necessidade',
+    'status': 'status', 'situacao': 'status',
+    'prioridade': 'prioridade', 'priority': 'prioridade',
+    'data_conclusao': 'data_conclusao', 'data conclusao': 'data_conclusao', 'concluido em': 'data_conclusao',
+    'resolved': 'data_conclusao', 'resolved at': 'data_conclusao', 'closed at': 'data_conclusao',
+    'observacoes': 'observacoes', 'observacao': 'observacoes', 'notes': 'observacoes',
+}
+
+STATUS_VALIDOS = {
+    'pendente': 'Pendente', 'aberto': 'Pendente', 'open': 'Pendente', 'pending': 'Pendente', 'new': 'Pendente',
+    'em andamento': 'Em andamento', 'andamento': 'Em andamento', 'in progress': 'Em andamento',
+    'concluida': 'Concluída', 'concluido': 'Concluída', 'fechado': 'Concluída', 'resolvido': 'Concluída',
+    'closed': 'Concluída', 'resolved': 'Concluída', 'done': 'Concluída',
+}
+
+PRIORIDADES_VALIDAS = {
+    'normal': 'Normal', 'baixa': 'Normal', 'media': 'Normal', 'low': 'Normal', 'medium': 'Normal',
+    'alta': 'Alta', 'high': 'Alta',
+    'urgente': 'Urgente', 'urgent': 'Urgente', 'critica': 'Urgente', 'critical': 'Urgente',
+}
+
+REGEX_EMAIL = r'^[^@\s]+@[^@\s]+\.[^@\s]+$'
+
+# Formatos de data tentados em ordem, cada um sobre a coluna inteira
+FORMATOS_DATA = (
+    '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S.%f',
+    '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y', '%d-%m-%Y %H:%M:%S', '%d-%m-%Y', '%Y/%m/%d'
+)
+
+def _normalizar_texto(serie: pd.Series) -> pd.Series:
+    """Minúsculas e sem acentos, para comparar nomes e valores de enum"""
+    return (serie.astype(str).str.normalize('NFKD')
+            .str.encode('ascii', 'ignore').str.decode('ascii')
+            .str.strip().str.lower())
+
+def _normalizar_nome(nome: str) -> str:
+    nome = unicodedata.normalize('NFKD', str(nome)).encode('ascii', 'ignore').decode('ascii')
+    return nome.strip().lower()
+
+def _converter_datas(serie: pd.Series) -> pd.Series:
+    """Converte datas ISO e no formato brasileiro (dia/mês/ano) de forma vetorizada
+    
+    Cada formato de ``FORMATOS_DATA`` é aplicado ao que ainda não foi
+    convertido; só os valores fora de todos eles são convertidos um a um.
+    """
+    serie = serie.str.strip().where(serie.str.strip() != '')
+    datas = pd.Series(pd.NaT, index=serie.index, dtype='datetime64[ns]')
+    for formato in FORMATOS_DATA:
+        restantes = serie.notna() & datas.isna()
+        if not restantes.any():
+            return datas
+        datas = datas.combine_first(pd.to_datetime(serie[restantes], format=formato, errors='coerce'))
+    
+    restantes = serie.notna() & datas.isna()
+    if restantes.any():
+        brasileiro = serie[restantes].str.match(r'^\d{1,2}/\d{1,2}/\d{4}')
+        datas[restantes] = [pd.to_datetime(valor, errors='coerce', dayfirst=dia_primeiro)
+                            for valor, dia_primeiro in zip(serie[restantes], brasileiro)]
+    return datas
+
+def mapear_colunas(colunas, mapeamento: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Define qual coluna do arquivo alimenta cada coluna da fila"""
+    mapeamento = {_normalizar_nome(origem): destino for origem, destino in (mapeamento or {}).items()}
+    resultado = {}
+    for coluna in colunas:
+        nome = _normalizar_nome(coluna)
+        destino = mapeamento.get(nome) or ALIASES_COLUNAS.get(nome)
+        if destino in COLUNAS_FILA and destino not in resultado.values():
+            resultado[coluna] = destino
+    return resultado
+
+def ler_em_blocos(caminho_ou_arquivo, chunksize: int = 50000, formato: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """Lê um CSV ou XLSX em blocos de até chunksize linhas, sem carregar o arquivo todo"""
+    if formato is None:
+        nome = getattr(caminho_ou_arquivo, 'name', caminho_ou_arquivo)
+        formato = 'xlsx' if str(nome).lower().endswith(('.xlsx', '.xlsm')) else 'csv'
+    
+    if formato == 'csv':
+        yield from pd.read_csv(caminho_ou_arquivo, dtype=str, chunksize=chunksize,
+                               keep_default_na=False, encoding_errors='replace')
+        return
+    
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("Importação de XLSX requer o pacote openpyxl (pip install openpyxl)")
+    
+    workbook = load_workbook(caminho_ou_arquivo, read_only=True, data_only=True)
+    try:
+        linhas = workbook.active.iter_rows(values_only=True)
+        cabecalho = [str(c) if c is not None else f'coluna_{i}' for i, c in enumerate(next(linhas, []))]
+        bloco = []
+        for linha in linhas:
+            bloco.append(linha)
+            if len(bloco) >= chunksize:
+                yield pd.DataFrame(bloco, columns=cabecalho, dtype=object)
+                bloco = []
+        if bloco:
+            yield pd.DataFrame(bloco, columns=cabecalho, dtype=object)
+    finally:
+        workbook.close()
+
+def validar_bloco(df_origem: pd.DataFrame, colunas: Dict[str, str], linha_inicial: int,
+                  ids_existentes: set):
+    """Valida e normaliza um bloco de forma vetorizada
+    
+    Retorna (df_valido, df_erros), onde df_erros tem uma linha por problema
+    encontrado (linha, campo, valor, erro).
+    """
+    df = df_origem.rename(columns=colunas).reindex(columns=COLUNAS_FILA)
+    df = df.astype(object).where(df.notna(), '')
+    df = df.apply(lambda coluna: coluna.astype(str).str.strip())
+    df.index = pd.RangeIndex(linha_inicial, linha_inicial + len(df))
+    
+    erros = []
+    
+    def registrar(mask: pd.Series, campo: str, mensagem: str):
+        if mask.any():
+            erros.append(pd.DataFrame({
+                'linha': df.index[mask],
+                'campo': campo,
+                'valor': df.loc[mask, campo].values,
+                'erro': mensagem
+            }))
+    
+    # Datas
+    data_criacao = _converter_datas(df['data_criacao'])
+    registrar(data_criacao.isna(), 'data_criacao', 'Data de criação ausente ou inválida')
+    
+    data_solicitacao = _converter_datas(df['data_solicitacao'])
+    registrar((df['data_solicitacao'] != '') & data_solicitacao.isna(), 'data_solicitacao', 'Data inválida')
+    data_solicitacao = data_solicitacao.fillna(data_criacao.dt.normalize())
+    
+    data_conclusao = _converter_datas(df['data_conclusao'])
+    registrar((df['data_conclusao'] != '') & data_conclusao.isna(), 'data_conclusao', 'Data inválida')
+    registrar(data_conclusao < data_criacao, 'data_conclusao', 'Conclusão anterior à criação')
+    
+    # Contato
+    registrar(~df['email'].str.match(REGEX_EMAIL), 'email', 'E-mail inválido')
+    digitos = df['telefone'].str.replace(r'\D', '', regex=True)
+    registrar((df['telefone'] != '') & ~digitos.str.len().between(10, 13), 'telefone', 'Telefone inválido')
+    
+    # Enums
+    status = _normalizar_texto(df['status']).map(STATUS_VALIDOS)
+    registrar(status.isna(), 'status', 'Status desconhecido')
+    prioridade = _normalizar_texto(df['prioridade'].replace('', 'Normal')).map(PRIORIDADES_VALIDAS)
+    registrar(prioridade.isna(), 'prioridade', 'Prioridade desconhecida')
+    
+    # IDs: gera os ausentes e rejeita os repetidos
+    registrar((df['id'] != '') & (df['id'].isin(ids_existentes) | df['id'].duplicated()), 'id', 'ID duplicado')
+    sem_id = df['id'] == ''
+    while sem_id.any():
+        df.loc[sem_id, 'id'] = [str(uuid.uuid4())[:8].upper() for _ in range(int(sem_id.sum()))]
+        # Regera os poucos IDs que colidirem com existentes ou com o próprio bloco
+        sem_id = sem_id & (df['id'].isin(ids_existentes) | df['id'].duplicated())
+    
+    df['data_criacao'] = data_criacao.dt.strftime('%Y-%m-%d %H:%M:%S')
+    df['data_solicitacao'] = data_solicitacao.dt.strftime('%Y-%m-%d')
+    df['data_conclusao'] = data_conclusao.dt.strftime('%Y-%m-%d %H:%M:%S').fillna('')
+    df['status'] = status
+    df['prioridade'] = prioridade
+    
+    df_erros = pd.concat(erros, ignore_index=True) if erros else pd.DataFrame(columns=['linha', 'campo', 'valor', 'erro'])
+    df_valido = df[~df.index.isin(df_erros['linha'])]
+    return df_valido, df_erros
+
+def importar_historico(caminho_ou_arquivo, storage, mapeamento: Optional[Dict[str, str]] = None,
+                       chunksize: int = 50000, erros_file: Optional[str] = None, simular: bool = False,
+                       formato: Optional[str] = None,
+                       progresso: Optional[Callable[[int], None]] = None) -> Dict:
+    """Importa um histórico de tickets em blocos, gravando pelo caminho de lote do armazenamento
+    
+    Linhas inválidas não são importadas; cada problema é gravado em erros_file
+    (CSV com linha, campo, valor e erro). A memória usada é limitada pelo
+    tamanho do bloco, independentemente do tamanho do arquivo.
+    """
+    ids_existentes = storage.ids('fila')
+    colunas = None
+    lidas = importadas = 0
+    linhas_rejeitadas = 0
+    amostra_erros = []
+    
+    if erros_file and os.path.exists(erros_file):
+        os.remove(erros_file)
+    
+    for bloco in ler_em_blocos(caminho_ou_arquivo, chunksize=chunksize, formato=formato):
+        if colunas is None:
+            colunas = mapear_colunas(bloco.columns, mapeamento)
+            faltando = {'data_criacao', 'email', 'status'} - set(colunas.values())
+            if faltando:
+                raise ValueError(f"Colunas obrigatórias não encontradas no arquivo: {', '.join(sorted(faltando))}")
+        
+        # Linha 2 = primeira linha de dados (a linha 1 é o cabeçalho)
+        df_valido, df_erros = validar_bloco(bloco, colunas, lidas + 2, ids_existentes)
+        lidas += len(bloco)
+        
+        if not df_valido.empty and not simular:
+            storage.anexar_lote(df_valido, 'fila')
+        ids_existentes.update(df_valido['id'])
+        importadas += len(df_valido)
+        linhas_rejeitadas += df_erros['linha'].nunique()
+        
+        if not df_erros.empty:
+            if erros_file:
+                df_erros.to_csv(erros_file, mode='a', header=not os.path.exists(erros_file), index=False)
+            if len(amostra_erros) < 100:
+                amostra_erros.extend(df_erros.head(100 - len(amostra_erros)).to_dict('records'))
+        
+        if progresso:
+            progresso(lidas)
+    
+    return {
+        'linhas_lidas': lidas,
+        'importadas': importadas,
+        'rejeitadas': linhas_rejeitadas,
+        'colunas_mapeadas': colunas or {},
+        'erros_file': erros_file if linhas_rejeitadas and erros_file else None,
+        'amostra_erros': amostra_erros,
+        'simulacao': simular
+    }
@@ -0,0 +1,127 @@
+"""
+Fila de jobs de relatórios executados em segundo plano
+"""
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+STATUS_ATIVOS = ('Na fila', 'Executando')
+
+@dataclass
+class JobRelatorio:
+    """Estado de um job de relatório"""
+    id: str
+    tipo: str
+    parametros: Dict = field(default_factory=dict)
+    status: str = 'Na fila'
+    etapa: str = ''
+    progresso: float = 0.0
+    resultado: Any = None
+    erro: str = ''
+    criado_em: datetime = field(default_factory=datetime.now)
+    iniciado_em: Optional[datetime] = None
+    concluido_em: Optional[datetime] = None
+    
+    @property
+    def ativo(self) -> bool:
+        return self.status in STATUS_ATIVOS
+    
+    @property
+    def duracao_segundos(self) -> Optional[float]:
+        if self.iniciado_em is None:
+            return None
+        return ((self.concluido_em or datetime.now()) - self.iniciado_em).total_seconds()
+
+class GerenciadorJobs:
+    """Executa relatórios em threads de segundo plano
+    
+    ``submeter`` retorna imediatamente o ID do job; a sessão do Streamlit pode
+    ser fechada e o resultado consultado depois com ``obter``. No máximo
+    ``max_simultaneos`` jobs rodam ao mesmo tempo (os demais aguardam na
+    fila) e um pedido idêntico a um job ainda ativo reaproveita esse job.
+    """
+    
+    def __init__(self, max_simultaneos: int = 2, historico: int = 50):
+        self._executor = ThreadPoolExecutor(max_workers=max_simultaneos, thread_name_prefix='relatorio')
+        self._jobs: 'OrderedDict[str, JobRelatorio]' = OrderedDict()
+        self._ativos_por_chave: Dict[str, str] = {}
+        self._historico = historico
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _chave(tipo: str, parametros: Dict) -> str:
+        return json.dumps([tipo, parametros], sort_keys=True, default=str)
+    
+    def submeter(self, tipo: str, tarefa: Callable[[Callable[[str, float], None]], Any],
+                 parametros: Optional[Dict] = None) -> str:
+        """Agenda um job e retorna seu ID
+        
+        ``tarefa`` recebe uma função ``progresso(etapa, fracao)`` para informar
+        a etapa atual. Inclua em ``parametros`` tudo o que diferencia o
+        resultado (filtros, versão dos dados) para a deduplicação.
+        """
+        parametros = dict(parametros or {})
+        chave = self._chave(tipo, parametros)
+        with self._lock:
+            job_existente = self._ativos_por_chave.get(chave)
+            if job_existente:
+                return job_existente
+            
+            job = JobRelatorio(id=uuid.uuid4().hex[:8].upper(), tipo=tipo, parametros=parametros)
+            self._jobs[job.id] = job
+            self._ativos_por_chave[chave] = job.id
+            self._limitar_historico()
+        
+        self._executor.submit(self._executar, job, chave, tarefa)
+        return job.id
+    
+    def _executar(self, job: JobRelatorio, chave: str, tarefa: Callable):
+        def progresso(etapa: str, fracao: float):
+            job.etapa = etapa
+            job.progresso = max(0.0, min(fracao, 1.0))
+        
+        job.status = 'Executando'
+        job.iniciado_em = datetime.now()
+        try:
+            job.resultado = tarefa(progresso)
+            job.status = 'Concluído'
+            job.etapa = 'Concluído'
+            job.progresso = 1.0
+        except Exception as e:
+            job.status = 'Erro'
+            job.erro = str(e)
+        finally:
+            job.concluido_em = datetime.now()
+            with self._lock:
+                if self._ativos_por_chave.get(chave) == job.id:
+                    del self._ativos_por_chave[chave]
+    
+    def _limitar_historico(self):
+        """Descarta os jobs finalizados mais antigos além do histórico"""
+        excedente = len(self._jobs) - self._historico
+        for job_id in list(self._jobs):
+            if excedente <= 0:
+                break
+            if not self._jobs[job_id].ativo:
+                del self._jobs[job_id]
+                excedente -= 1
+    
+    def obter(self, job_id: str) -> Optional[JobRelatorio]:
+        """Estado atual de um job"""
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def listar(self, tipo: Optional[str] = None) -> List[JobRelatorio]:
+        """Jobs conhecidos, do mais recente para o mais antigo"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job for job in reversed(jobs) if tipo is None or job.tipo == tipo]
+    
+    def encerrar(self, aguardar: bool = True):
+        """Encerra as threads de execução"""
+        self._executor.shutdown(wait=aguardar)
@@ -6,6 +6,7 @@ from email.message import EmailMessage
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import logging
+from datetime import datetime
 from typing import Optional
 
 # Configuração de logging
@@ -21,9 +22,14 @@ class EmailNotifier:
         self.sender_email = sender_email
         self.sender_password = sender_password
     
-    def enviar_confirmacao_ticket(self, destinatario: str, ticket_id: str, posicao_fila: int) -> bool:
-        """Envia email de confirmação de criação do ticket"""
+    def enviar_confirmacao_ticket(self, destinatario: str, ticket_id: str, posicao_fila: int,
+                                  eta: Optional[datetime] = None) -> bool:
+        """Envia email de confirmação de criação do ticket (com a previsão de conclusão, se houver)"""
         try:
+            linha_eta = f"\n- Previsão de conclusão: {eta.strftime('%d/%m/%Y %H:%M')} (estimativa)" if eta else ""
+            html_eta = (f"<p><strong>Previsão de conclusão:</strong> {eta.strftime('%d/%m/%Y %H:%M')} "
+                        f"<small>(estimativa)</small></p>") if eta else ""
+            
             msg = MIMEMultipart('alternative')
             msg['Subject'] = f'Ticket #{ticket_id} - Solicitação de Suporte Mavi'
             msg['From'] = self.sender_email
@@ -37,7 +43,7 @@ Sua solicitação de suporte foi registrada com sucesso!
 
 Detalhes do seu ticket:
 - Número do ticket: #{ticket_id}
-- Posição na fila: {posicao_fila}
+- Posição na fila: {posicao_fila}{linha_eta}
 - Status: Pendente
 
 Você receberá atualizações sobre o andamento do seu ticket por email.
@@ -63,6 +69,7 @@ Equipe de Suporte Mavi
                       <h3 style="margin-top: 0; color: #333;">Detalhes do Ticket</h3>
                       <p><strong>Número:</strong> #{ticket_id}</p>
                       <p><strong>Posição na fila:</strong> {posicao_fila}</p>
+                      {html_eta}
                       <p><strong>Status:</strong> <span style="color: #ffc107; font-weight: bold;">Pendente</span></p>
                     </div>
                     
@@ -208,14 +215,16 @@ class SMSNotifier:
         except Exception as e:
             logger.error(f"Erro ao inicializar cliente Twilio: {str(e)}")
     
-    def enviar_sms_ticket(self, telefone: str, ticket_id: str, posicao_fila: int) -> bool:
-        """Envia SMS de confirmação de criação do ticket"""
+    def enviar_sms_ticket(self, telefone: str, ticket_id: str, posicao_fila: int,
+                          eta: Optional[datetime] = None) -> bool:
+        """Envia SMS de confirmação de criação do ticket (com a previsão de conclusão, se houver)"""
         if not self.client:
             logger.warning("Cliente SMS não disponível")
             return False
         
         try:
-            mensagem = f"Mavi Suporte: Ticket #{ticket_id} criado. Posição na fila: {posicao_fila}. Você receberá atualizações por email."
+            previsao = f" Previsão: {eta.strftime('%d/%m %H:%M')}." if eta else ""
+            mensagem = f"Mavi Suporte: Ticket #{ticket_id} criado. Posição na fila: {posicao_fila}.{previsao} Você receberá atualizações por email."
             
             message = self.client.messages.create(
                 body=mensagem,
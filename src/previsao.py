@@ -0,0 +1,150 @@
+"""
+Previsão da fila: taxas de chegada e atendimento por dia da semana × hora e ETA dos tickets
+"""
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from storage import Predicado
+
+# Horários da semana (segunda 00h = 0, domingo 23h = 167)
+HORARIOS_SEMANA = 7 * 24
+
+def _horario_semana(instantes) -> np.ndarray:
+    return np.asarray(instantes.dayofweek * 24 + instantes.hour, dtype=np.intp)
+
+def _contar_por_horario(instantes: pd.Series, inicio: pd.Timestamp, fim: pd.Timestamp) -> np.ndarray:
+    """Eventos por horário da semana dentro de [inicio, fim)"""
+    instantes = instantes[(instantes >= inicio) & (instantes < fim)]
+    return np.bincount(_horario_semana(instantes.dt), minlength=HORARIOS_SEMANA)
+
+@dataclass
+class TaxasFila:
+    """Chegadas e atendimentos médios por hora em cada horário da semana (vetores de 168 posições)"""
+    chegadas: np.ndarray
+    atendimentos: np.ndarray
+    calculado_em: datetime
+    semanas: int
+
+def calcular_taxas(blocos, agora: Optional[datetime] = None, semanas: int = 8) -> TaxasFila:
+    """Taxas por horário da semana a partir das últimas ``semanas`` do histórico
+    
+    ``blocos`` são DataFrames da fila (``storage.ler_blocos``); cada bloco é
+    reduzido a contagens por horário e descartado. A taxa de um horário é o
+    total de eventos nele dividido por quantas vezes ele ocorreu na janela.
+    """
+    fim = pd.Timestamp(agora or datetime.now()).floor('h')
+    inicio = fim - pd.Timedelta(weeks=semanas)
+    chegadas = np.zeros(HORARIOS_SEMANA)
+    atendimentos = np.zeros(HORARIOS_SEMANA)
+    for bloco in blocos:
+        criacao = pd.to_datetime(bloco['data_criacao'], errors='coerce')
+        conclusao = pd.to_datetime(bloco['data_conclusao'], errors='coerce').where(bloco['status'] == 'Concluída')
+        chegadas += _contar_por_horario(criacao, inicio, fim)
+        atendimentos += _contar_por_horario(conclusao, inicio, fim)
+    
+    ocorrencias = np.bincount(_horario_semana(pd.date_range(inicio, periods=semanas * HORARIOS_SEMANA, freq='h')),
+                              minlength=HORARIOS_SEMANA)
+    return TaxasFila(chegadas=chegadas / ocorrencias, atendimentos=atendimentos / ocorrencias,
+                     calculado_em=fim.to_pydatetime(), semanas=semanas)
+
+def _capacidade(taxas: TaxasFila, agora: datetime, horas: int):
+    """Início, duração (em horas) e atendimentos esperados de cada hora a partir de agora
+    
+    A primeira hora é parcial: começa em ``agora`` e termina na hora cheia.
+    """
+    agora = pd.Timestamp(agora)
+    horarios = pd.date_range(agora.floor('h'), periods=horas, freq='h')
+    duracao = np.ones(horas)
+    duracao[0] -= (agora - horarios[0]) / pd.Timedelta(hours=1)
+    inicios = horarios.to_numpy().copy()
+    inicios[0] = agora.to_datetime64()
+    posicao = _horario_semana(horarios)
+    return inicios, duracao, taxas.atendimentos[posicao] * duracao, taxas.chegadas[posicao] * duracao
+
+def estimar_conclusoes(taxas: TaxasFila, posicoes: Sequence[int], agora: Optional[datetime] = None,
+                       horizonte_horas: int = 8 * HORARIOS_SEMANA) -> List[Optional[datetime]]:
+    """Horário estimado de conclusão para cada posição na fila (None além do horizonte)
+    
+    A posição ``k`` termina quando a capacidade de atendimento acumulada a
+    partir de agora chega a ``k``; a busca é binária sobre o acumulado, então
+    recalcular todas as ETAs depois de uma mudança de status é barato.
+    """
+    agora = agora or datetime.now()
+    inicios, duracao, capacidade, _ = _capacidade(taxas, agora, horizonte_horas)
+    acumulada = np.cumsum(capacidade)
+    posicoes = np.asarray(posicoes, dtype=float)
+    indices = np.searchsorted(acumulada, posicoes)
+    dentro = indices < horizonte_horas
+    indices = indices[dentro]
+    # Interpola dentro da hora em que a capacidade acumulada alcança a posição
+    anteriores = np.where(indices > 0, acumulada[indices - 1], 0.0)
+    fracoes = (posicoes[dentro] - anteriores) / capacidade[indices]
+    instantes = pd.to_datetime(inicios[indices]) + pd.to_timedelta(fracoes * duracao[indices], unit='h')
+    previsoes = iter(instantes.round('s').to_pydatetime())
+    return [next(previsoes) if valido else None for valido in dentro]
+
+def projetar_backlog(taxas: TaxasFila, pendentes: int, agora: Optional[datetime] = None,
+                     horas: int = HORARIOS_SEMANA) -> pd.DataFrame:
+    """Pendentes esperados ao fim de cada hora, com chegadas e atendimentos médios
+    
+    A fila não fica negativa: o saldo acumulado é refletido em zero
+    (pendentes + saldo - mínimo negativo do saldo até a hora).
+    """
+    agora = agora or datetime.now()
+    inicios, duracao, capacidade, chegadas = _capacidade(taxas, agora, horas)
+    saldo = pendentes + np.cumsum(chegadas - capacidade)
+    backlog = saldo - np.minimum(0, np.minimum.accumulate(saldo))
+    fins = pd.to_datetime(inicios) + pd.to_timedelta(duracao, unit='h')
+    return pd.DataFrame({'horario': fins, 'pendentes': backlog})
+
+class PrevisaoFila:
+    """Taxas da fila com cache, recalculadas no máximo uma vez por hora
+    
+    As taxas dependem de semanas de histórico e mudam pouco de uma escrita
+    para outra; depois de cada mudança de status só as posições mudam e as
+    ETAs são recalculadas sobre as taxas em cache.
+    """
+    
+    def __init__(self, storage, semanas: int = 8, horizonte_semanas: int = 8):
+        self.storage = storage
+        self.semanas = semanas
+        self.horizonte_horas = horizonte_semanas * HORARIOS_SEMANA
+        self._lock = threading.Lock()
+        self._taxas: Optional[TaxasFila] = None
+    
+    def taxas(self, agora: Optional[datetime] = None) -> TaxasFila:
+        """Taxas da hora atual, lendo só os tickets criados nas últimas 2 × ``semanas``
+        
+        O recorte por ``data_criacao`` vai para o armazenamento (WHERE no
+        SQLite, máscara por bloco no CSV). A janela lida é o dobro da usada
+        nas taxas para contar as conclusões de tickets abertos antes dela.
+        """
+        hora = pd.Timestamp(agora or datetime.now()).floor('h').to_pydatetime()
+        with self._lock:
+            if self._taxas is None or self._taxas.calculado_em != hora:
+                predicado = Predicado(inicio=(hora - timedelta(weeks=2 * self.semanas)).isoformat(sep=' '))
+                self._taxas = calcular_taxas(self.storage.ler_blocos('fila', predicado=predicado), hora, self.semanas)
+            return self._taxas
+    
+    def estimar(self, posicoes: Sequence[int], agora: Optional[datetime] = None) -> List[Optional[datetime]]:
+        agora = agora or datetime.now()
+        return estimar_conclusoes(self.taxas(agora), posicoes, agora, self.horizonte_horas)
+    
+    def projetar(self, pendentes: int, horas: int = HORARIOS_SEMANA,
+                 agora: Optional[datetime] = None) -> pd.DataFrame:
+        agora = agora or datetime.now()
+        return projetar_backlog(self.taxas(agora), pendentes, agora, horas)
+
+def formatar_eta(previsao: Optional[datetime], agora: Optional[datetime] = None) -> str:
+    """ETA para exibição: horário estimado e a espera aproximada"""
+    if previsao is None:
+        return "Sem previsão"
+    agora = agora or datetime.now()
+    horas = max(0.0, (previsao - agora) / timedelta(hours=1))
+    espera = f"~{horas:.0f}h" if horas < 48 else f"~{horas / 24:.0f} dias"
+    return f"{previsao.strftime('%d/%m %H:%M')} ({espera})"
@@ -0,0 +1,462 @@
+"""
+Motor de relatórios: um snapshot tipado e agregados calculados em uma única passada
+"""
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from dispositivos import contar_dispositivos, explodir_dispositivos
+from sketches import HyperLogLog, TDigest
+from sla import CalendarioUteis
+from storage import COLUNAS_FILA, Predicado
+
+# Dimensões dos percentis de resolução ('geral' cobre todos os tickets)
+DIMENSOES_RESOLUCAO = ('geral', 'prioridade', 'dispositivo', 'squad_leader')
+
+QUANTIS_SLA = {'p50': 0.5, 'p90': 0.9, 'p99': 0.99}
+
+# Dimensões dos percentis em horas úteis (calendário comercial de sla.py)
+DIMENSOES_SLA = ('geral', 'prioridade')
+
+# Dimensões da contagem de solicitantes distintos (por e-mail)
+DIMENSOES_SOLICITANTES = ('geral', 'squad_leader')
+
+# Eventos do mapa de calor por dia da semana × hora (horário 0 = segunda 00h, como em previsao.py)
+EVENTOS_HORARIOS = ('chegada', 'conclusao')
+DIAS_SEMANA = ['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb', 'Dom']
+
+def normalizar_email(valor) -> str:
+    return '' if valor is None or pd.isna(valor) else str(valor).strip().lower()
+
+def inicio_dia_timeline(data_limite: Optional[datetime] = None) -> datetime:
+    """00h do primeiro dia da timeline (sem limite, 30 dias atrás)
+    
+    A timeline conta dias inteiros no snapshot, no rollup e no DuckDB, então
+    todos os caminhos cortam no mesmo ponto.
+    """
+    if data_limite is None:
+        data_limite = datetime.now() - timedelta(days=30)
+    return datetime.combine(data_limite.date(), time())
+
+def periodo_relatorio(nome: str, hoje: Optional[date] = None) -> Tuple[Optional[date], Optional[date]]:
+    """Datas (inclusivas) dos períodos prontos: 'todo_historico', 'ultimos_30_dias', 'mes_atual' e 'ano_atual'"""
+    hoje = hoje or date.today()
+    periodos = {
+        'todo_historico': (None, None),
+        'ultimos_30_dias': (hoje - timedelta(days=29), hoje),
+        'mes_atual': (hoje.replace(day=1), hoje),
+        'ano_atual': (hoje.replace(month=1, day=1), hoje)
+    }
+    if nome not in periodos:
+        raise ValueError(f"Período desconhecido: {nome}")
+    return periodos[nome]
+
+def carregar_snapshot(storage, filtro: Optional['FiltroRelatorio'] = None) -> pd.DataFrame:
+    """Lê a fila uma única vez e converte os tipos usados pelos relatórios
+    
+    Com ``filtro`` o recorte é empurrado para o armazenamento (WHERE no
+    SQLite, filtro por bloco no CSV) e só as linhas selecionadas são tipadas.
+    """
+    if filtro is None:
+        return preparar_snapshot(storage.ler('fila'))
+    blocos = list(storage.ler_blocos('fila', predicado=filtro.predicado()))
+    df = pd.concat(blocos, ignore_index=True) if blocos else pd.DataFrame(columns=COLUNAS_FILA)
+    return filtro.aplicar(preparar_snapshot(df))
+
+def preparar_snapshot(df: pd.DataFrame) -> pd.DataFrame:
+    """Converte datas e categorias de um DataFrame bruto da fila"""
+    df = df.copy()
+    for coluna in ('data_criacao', 'data_solicitacao', 'data_conclusao'):
+        df[coluna] = pd.to_datetime(df[coluna], errors='coerce')
+    df['status'] = df['status'].astype('category')
+    df['prioridade'] = df['prioridade'].astype('category')
+    return df
+
+@dataclass(frozen=True)
+class FiltroRelatorio:
+    """Recorte de um relatório: período de criação (inclusivo), status, prioridades e squad leader"""
+    inicio: Optional[date] = None
+    fim: Optional[date] = None
+    squad_leader: Optional[str] = None
+    status: Tuple[str, ...] = ()
+    prioridades: Tuple[str, ...] = ()
+    
+    def __post_init__(self):
+        # Listas viram tuplas para o filtro continuar imutável e comparável
+        object.__setattr__(self, 'status', tuple(self.status or ()))
+        object.__setattr__(self, 'prioridades', tuple(self.prioridades or ()))
+    
+    @property
+    def apenas_periodo(self) -> bool:
+        """Se o recorte é só de período (o que o rollup diário atende sozinho)"""
+        return not (self.squad_leader or self.status or self.prioridades)
+    
+    def parametros(self) -> Dict:
+        """Parâmetros serializáveis (chave de cache e índice dos relatórios)"""
+        return {
+            'inicio': self.inicio.isoformat() if self.inicio else None,
+            'fim': self.fim.isoformat() if self.fim else None,
+            'squad_leader': self.squad_leader,
+            'status': sorted(self.status),
+            'prioridades': sorted(self.prioridades)
+        }
+    
+    def predicado(self) -> Predicado:
+        """O recorte no formato do armazenamento (datas e valores como texto)"""
+        valores = [('status', tuple(self.status)), ('prioridade', tuple(self.prioridades))]
+        if self.squad_leader:
+            valores.append(('squad_leader', (self.squad_leader,)))
+        return Predicado(
+            inicio=self.inicio.isoformat() if self.inicio else None,
+            fim=(self.fim + timedelta(days=1)).isoformat() if self.fim else None,
+            valores=tuple((coluna, aceitos) for coluna, aceitos in valores if aceitos)
+        )
+    
+    def inicio_timeline(self) -> datetime:
+        """Primeiro dia da timeline: o início do período ou os 30 dias até o fim"""
+        if self.inicio:
+            return datetime.combine(self.inicio, time())
+        if self.fim:
+            return datetime.combine(self.fim - timedelta(days=29), time())
+        return inicio_dia_timeline()
+    
+    def ano_anterior(self) -> 'FiltroRelatorio':
+        """O mesmo recorte um ano antes (29/02 vira 28/02)"""
+        def recuar(dia: Optional[date]) -> Optional[date]:
+            if dia is None:
+                return None
+            return dia.replace(year=dia.year - 1, day=28 if (dia.month, dia.day) == (2, 29) else dia.day)
+        return replace(self, inicio=recuar(self.inicio), fim=recuar(self.fim))
+    
+    def descricao(self) -> str:
+        """Texto curto do recorte para títulos"""
+        partes = []
+        if self.inicio and self.fim:
+            partes.append(f"{self.inicio.strftime('%d/%m/%Y')} a {self.fim.strftime('%d/%m/%Y')}")
+        elif self.inicio:
+            partes.append(f"A partir de {self.inicio.strftime('%d/%m/%Y')}")
+        elif self.fim:
+            partes.append(f"Até {self.fim.strftime('%d/%m/%Y')}")
+        if self.squad_leader:
+            partes.append(f"Squad {self.squad_leader}")
+        if self.status:
+            partes.append(', '.join(self.status))
+        if self.prioridades:
+            partes.append(f"Prioridade {', '.join(self.prioridades)}")
+        return ' · '.join(partes) or 'Todo o histórico'
+    
+    def aplicar(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Linhas de um snapshot já tipado que pertencem ao recorte"""
+        mascara = pd.Series(True, index=df.index)
+        if self.inicio:
+            mascara &= df['data_criacao'] >= pd.Timestamp(self.inicio)
+        if self.fim:
+            mascara &= df['data_criacao'] < pd.Timestamp(self.fim + timedelta(days=1))
+        if self.squad_leader:
+            mascara &= df['squad_leader'].astype(str) == self.squad_leader
+        if self.status:
+            mascara &= df['status'].astype(str).isin(self.status)
+        if self.prioridades:
+            mascara &= df['prioridade'].astype(str).isin(self.prioridades)
+        return df[mascara]
+
+@dataclass
+class AgregadosRelatorio:
+    """Resultado compartilhado por todos os gráficos e pelo resumo do relatório
+    
+    Guarda contagens e somas (não médias) para que agregados de partes
+    diferentes do histórico possam ser combinados com ``mesclar``.
+    """
+    data_limite: datetime
+    total_tickets: int = 0
+    por_status: Dict[str, int] = field(default_factory=dict)
+    soma_resolucao_horas: float = 0.0
+    soma_resolucao_horas_uteis: float = 0.0
+    qtd_resolucoes: int = 0
+    dispositivos: Dict[str, int] = field(default_factory=dict)
+    timeline: Dict[Tuple[date, str], int] = field(default_factory=dict)
+    resolucao: Dict[Tuple[str, str], TDigest] = field(default_factory=dict)
+    resolucao_uteis: Dict[Tuple[str, str], TDigest] = field(default_factory=dict)
+    solicitantes: Dict[Tuple[str, str], HyperLogLog] = field(default_factory=dict)
+    horarios: Dict[Tuple[str, str, int], int] = field(default_factory=dict)
+    
+    @property
+    def tempo_medio_resolucao_horas(self) -> float:
+        if self.qtd_resolucoes == 0:
+            return 0
+        return self.soma_resolucao_horas / self.qtd_resolucoes
+    
+    @property
+    def tempo_medio_resolucao_horas_uteis(self) -> float:
+        if self.qtd_resolucoes == 0:
+            return 0
+        return self.soma_resolucao_horas_uteis / self.qtd_resolucoes
+    
+    @property
+    def tickets_por_dia(self) -> Dict[date, int]:
+        """Tickets criados por dia no período recente (soma dos status)"""
+        por_dia = Counter()
+        for (dia, _), quantidade in self.timeline.items():
+            por_dia[dia] += quantidade
+        return dict(sorted(por_dia.items()))
+    
+    def dispositivos_mais_solicitados(self, n: int = 10) -> Dict[str, int]:
+        return dict(Counter(self.dispositivos).most_common(n))
+    
+    def mesclar(self, outro: 'AgregadosRelatorio') -> 'AgregadosRelatorio':
+        """Combina dois agregados calculados sobre partes disjuntas do histórico"""
+        return AgregadosRelatorio.combinar([self, outro], self.data_limite)
+    
+    @classmethod
+    def combinar(cls, partes: Sequence['AgregadosRelatorio'], data_limite: datetime) -> 'AgregadosRelatorio':
+        """Combina os agregados de várias partes disjuntas (ex.: um por mês)
+        
+        Contagens e somas são somadas; os digests e sketches de cada chave são
+        mesclados de uma só vez, sem recompressões intermediárias.
+        """
+        resultado = cls(data_limite=data_limite)
+        por_status, dispositivos, timeline, horarios = Counter(), Counter(), Counter(), Counter()
+        digests, digests_uteis, sketches = {}, {}, {}
+        for parte in partes:
+            resultado.total_tickets += parte.total_tickets
+            resultado.soma_resolucao_horas += parte.soma_resolucao_horas
+            resultado.soma_resolucao_horas_uteis += parte.soma_resolucao_horas_uteis
+            resultado.qtd_resolucoes += parte.qtd_resolucoes
+            por_status.update(parte.por_status)
+            dispositivos.update(parte.dispositivos)
+            timeline.update(parte.timeline)
+            horarios.update(parte.horarios)
+            for chave, digest in parte.resolucao.items():
+                digests.setdefault(chave, []).append(digest)
+            for chave, digest in parte.resolucao_uteis.items():
+                digests_uteis.setdefault(chave, []).append(digest)
+            for chave, sketch in parte.solicitantes.items():
+                sketches.setdefault(chave, []).append(sketch)
+        resultado.por_status = dict(+por_status)
+        resultado.dispositivos = dict(+dispositivos)
+        resultado.timeline = dict(+timeline)
+        resultado.horarios = dict(+horarios)
+        resultado.resolucao = {chave: TDigest.combinar(lista) for chave, lista in digests.items()}
+        resultado.resolucao_uteis = {chave: TDigest.combinar(lista) for chave, lista in digests_uteis.items()}
+        resultado.solicitantes = {chave: HyperLogLog.combinar(lista) for chave, lista in sketches.items()}
+        return resultado
+    
+    def percentis_resolucao(self, dimensao: str = 'geral', uteis: bool = False) -> Dict[str, Dict[str, float]]:
+        """Percentis das horas de resolução (p50/p90/p99 e n) por valor da dimensão
+        
+        Com ``uteis`` as horas são as do calendário comercial (só ``DIMENSOES_SLA``).
+        """
+        percentis = {}
+        for (dim, valor), digest in sorted((self.resolucao_uteis if uteis else self.resolucao).items()):
+            if dim == dimensao and digest.total:
+                percentis[valor] = {nome: round(digest.quantil(q), 2) for nome, q in QUANTIS_SLA.items()}
+                percentis[valor]['n'] = len(digest)
+        return percentis
+    
+    def metricas_solicitantes(self, dimensao: str = 'geral') -> Dict[str, Dict]:
+        """Solicitantes distintos (aproximado), pedidos e taxa de recorrência por valor
+        
+        A recorrência é a fração dos pedidos feita por quem já tinha pedido
+        antes no período: 1 - distintos / pedidos.
+        """
+        metricas = {}
+        for (dim, valor), sketch in sorted(self.solicitantes.items()):
+            if dim == dimensao and sketch.total:
+                unicos = max(1, min(sketch.estimativa(), sketch.total))
+                metricas[valor] = {'unicos': unicos, 'pedidos': sketch.total,
+                                   'recorrencia': round(1 - unicos / sketch.total, 4)}
+        return metricas
+    
+    def resumo(self) -> Dict:
+        """Resumo no formato de ``ReportGenerator.gerar_relatorio_geral``"""
+        return {
+            'total_tickets': self.total_tickets,
+            'pendentes': self.por_status.get('Pendente', 0),
+            'em_andamento': self.por_status.get('Em andamento', 0),
+            'concluidos': self.por_status.get('Concluída', 0),
+            'tempo_medio_resolucao_horas': round(self.tempo_medio_resolucao_horas, 2),
+            'tempo_medio_resolucao_horas_uteis': round(self.tempo_medio_resolucao_horas_uteis, 2),
+            'dispositivos_mais_solicitados': self.dispositivos_mais_solicitados(10),
+            'tickets_por_dia': self.tickets_por_dia,
+            'percentis_resolucao_horas': self.percentis_resolucao('geral').get('', {}),
+            'percentis_resolucao_por': {dimensao: self.percentis_resolucao(dimensao)
+                                        for dimensao in DIMENSOES_RESOLUCAO if dimensao != 'geral'},
+            'percentis_resolucao_horas_uteis': self.percentis_resolucao('geral', uteis=True).get('', {}),
+            'percentis_resolucao_uteis_por_prioridade': self.percentis_resolucao('prioridade', uteis=True),
+            'solicitantes': self.metricas_solicitantes('geral').get('', {}),
+            'solicitantes_por_squad': self.metricas_solicitantes('squad_leader'),
+            'dispositivos_distintos': sum(1 for quantidade in self.dispositivos.values() if quantidade > 0)
+        }
+    
+    def mapa_horarios(self, evento: str = 'chegada', prioridades: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Chegadas ou conclusões por dia da semana (linhas) e hora (colunas)"""
+        return mapa_horarios(self.horarios.items(), evento, prioridades)
+    
+    def timeline_df(self) -> pd.DataFrame:
+        """Timeline por dia e status no formato usado pelo gráfico"""
+        linhas = [(dia, status, quantidade) for (dia, status), quantidade in sorted(self.timeline.items())]
+        return pd.DataFrame(linhas, columns=['data_criacao', 'status', 'count'])
+
+def digests_resolucao(base: pd.DataFrame, por: Sequence[str] = (),
+                      dimensoes: Sequence[str] = DIMENSOES_RESOLUCAO) -> Dict[tuple, TDigest]:
+    """Digests das horas de resolução por dimensão
+    
+    ``base`` traz a coluna ``horas`` (NaN para tickets não resolvidos) e as
+    colunas das dimensões; as chaves são (*valores de ``por``, dimensão, valor).
+    """
+    resolvidos = base[base['horas'].notna()]
+    digests = {}
+    if resolvidos.empty:
+        return digests
+    
+    for dimensao in dimensoes:
+        if dimensao == 'geral':
+            tabela = resolvidos.assign(geral='')
+        elif dimensao == 'dispositivo':
+            tabela = explodir_dispositivos(resolvidos, list(por) + ['horas'])
+        else:
+            tabela = resolvidos
+        valores = tabela[dimensao].astype(str).where(tabela[dimensao].notna(), '')
+        if dimensao != 'geral':
+            valores = valores.str.strip()
+            tabela, valores = tabela[valores != ''], valores[valores != '']
+        if tabela.empty:
+            continue
+        grupos = [tabela[coluna] for coluna in por] + [valores]
+        for chave, horas in tabela['horas'].astype(float).groupby(grupos, observed=True):
+            chave = chave if isinstance(chave, tuple) else (chave,)
+            digests[chave[:-1] + (dimensao, chave[-1])] = TDigest.de_valores(horas.to_numpy())
+    return digests
+
+def sketches_solicitantes(base: pd.DataFrame, por: Sequence[str] = ()) -> Dict[tuple, HyperLogLog]:
+    """HyperLogLogs dos e-mails dos solicitantes, no geral e por squad leader
+    
+    As chaves são (*valores de ``por``, dimensão, valor); linhas sem e-mail
+    não entram.
+    """
+    emails = base['email'].map(normalizar_email)
+    base = base[emails != '']
+    sketches = {}
+    if base.empty:
+        return sketches
+    
+    hashes = pd.Series(HyperLogLog.hashes(emails[emails != '']), index=base.index)
+    for dimensao in DIMENSOES_SOLICITANTES:
+        if dimensao == 'geral':
+            valores = pd.Series('', index=base.index)
+        else:
+            valores = base[dimensao].astype(str).where(base[dimensao].notna(), '').str.strip()
+        manter = (valores != '') | (dimensao == 'geral')
+        if not manter.any():
+            continue
+        grupos = [base.loc[manter, coluna] for coluna in por] + [valores[manter]]
+        for chave, grupo in hashes[manter].groupby(grupos):
+            chave = chave if isinstance(chave, tuple) else (chave,)
+            sketches[chave[:-1] + (dimensao, chave[-1])] = HyperLogLog.de_hashes(grupo.to_numpy(dtype='uint64'))
+    return sketches
+
+def horarios_eventos(base: pd.DataFrame, por: Sequence[str] = (),
+                     por_conclusao: Optional[Sequence[str]] = None) -> Dict[tuple, int]:
+    """Chegadas e conclusões por horário da semana e prioridade
+    
+    ``base`` traz as datas já convertidas; a chegada conta no horário de
+    ``data_criacao`` e a conclusão (só tickets concluídos) no de
+    ``data_conclusao``. As chaves são (*valores de ``por``, evento, prioridade, horário);
+    ``por_conclusao`` agrupa as conclusões por outras colunas (ex.: o dia da conclusão).
+    """
+    prioridade = base['prioridade'].astype(object).where(base['prioridade'].notna(), '').astype(str)
+    concluido = base['status'].astype(str) == 'Concluída'
+    contagens = {}
+    for evento, datas, colunas in (('chegada', base['data_criacao'], por),
+                                   ('conclusao', base['data_conclusao'].where(concluido),
+                                    por if por_conclusao is None else por_conclusao)):
+        validas = datas.notna()
+        if not validas.any():
+            continue
+        horario = (datas[validas].dt.dayofweek * 24 + datas[validas].dt.hour).astype(int)
+        grupos = [base.loc[validas, coluna] for coluna in colunas] + [prioridade[validas], horario]
+        for chave, quantidade in horario.groupby(grupos).size().items():
+            contagens[chave[:-2] + (evento,) + chave[-2:]] = int(quantidade)
+    return contagens
+
+def conclusoes_no_periodo(storage, filtro: FiltroRelatorio) -> Dict[tuple, int]:
+    """Conclusões por horário da semana (evento, prioridade, horário) ocorridas no período do recorte
+    
+    O período do recorte é de criação, mas no mapa de calor a conclusão conta
+    no dia em que aconteceu (como no rollup): os tickets são lidos só com os
+    demais critérios e filtrados pela data de conclusão.
+    """
+    contagens = Counter()
+    for bloco in storage.ler_blocos('fila', predicado=replace(filtro, inicio=None, fim=None).predicado()):
+        conclusao = pd.to_datetime(bloco['data_conclusao'], errors='coerce')
+        no_periodo = conclusao.notna() & (bloco['status'] == 'Concluída')
+        if filtro.inicio:
+            no_periodo &= conclusao >= pd.Timestamp(filtro.inicio)
+        if filtro.fim:
+            no_periodo &= conclusao < pd.Timestamp(filtro.fim + timedelta(days=1))
+        if no_periodo.any():
+            contagens.update(horarios_eventos(pd.DataFrame({
+                'prioridade': bloco.loc[no_periodo, 'prioridade'], 'status': 'Concluída',
+                'data_criacao': pd.NaT, 'data_conclusao': conclusao[no_periodo]
+            })))
+    return dict(contagens)
+
+def mapa_horarios(contagens: Iterable[Tuple[Tuple[str, str, int], int]], evento: str = 'chegada',
+                  prioridades: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Matriz 7 × 24 (dia da semana × hora) a partir de contagens (evento, prioridade, horário)"""
+    if evento not in EVENTOS_HORARIOS:
+        raise ValueError(f"Evento inválido: {evento}")
+    matriz = [[0] * 24 for _ in DIAS_SEMANA]
+    for (evento_contagem, prioridade, horario), quantidade in contagens:
+        if evento_contagem == evento and (not prioridades or prioridade in prioridades):
+            matriz[horario // 24][horario % 24] += quantidade
+    return pd.DataFrame(matriz, index=DIAS_SEMANA, columns=range(24))
+
+# Colunas lidas por ``calcular_agregados`` (as únicas enviadas às partições processadas em paralelo)
+COLUNAS_AGREGACAO = ['data_criacao', 'data_conclusao', 'status', 'prioridade', 'dispositivos', 'squad_leader', 'email']
+
+def particionar_por_mes(df: pd.DataFrame) -> Dict[int, pd.DataFrame]:
+    """Partes do snapshot por mês de criação (chave ano * 12 + mês; -1 para datas inválidas)"""
+    criacao = df['data_criacao']
+    meses = (criacao.dt.year * 12 + criacao.dt.month - 1).fillna(-1).astype(int)
+    return {int(mes): parte for mes, parte in df[COLUNAS_AGREGACAO].groupby(meses.to_numpy(), sort=True)}
+
+def calcular_agregados(df: pd.DataFrame, data_limite: Optional[datetime] = None,
+                       calendario: Optional[CalendarioUteis] = None) -> AgregadosRelatorio:
+    """Calcula todos os agregados do relatório sobre um snapshot já tipado
+    
+    As horas úteis de resolução seguem ``calendario`` (expediente padrão sem ele).
+    """
+    data_limite = inicio_dia_timeline(data_limite)
+    agregados = AgregadosRelatorio(data_limite=data_limite, total_tickets=len(df))
+    if df.empty:
+        return agregados
+    
+    status = df['status'].astype(str)
+    agregados.por_status = status.value_counts().to_dict()
+    
+    # Tempo de resolução (apenas para tickets concluídos)
+    horas = ((df['data_conclusao'] - df['data_criacao']).dt.total_seconds() / 3600).where(status == 'Concluída')
+    agregados.soma_resolucao_horas = float(horas.sum())
+    agregados.qtd_resolucoes = int(horas.notna().sum())
+    agregados.resolucao = digests_resolucao(df.assign(horas=horas))
+    horas_uteis = pd.Series((calendario or CalendarioUteis()).horas_uteis(df['data_criacao'], df['data_conclusao']),
+                            index=df.index).where(horas.notna())
+    agregados.soma_resolucao_horas_uteis = float(horas_uteis.sum())
+    agregados.resolucao_uteis = digests_resolucao(df.assign(horas=horas_uteis), dimensoes=DIMENSOES_SLA)
+    agregados.solicitantes = sketches_solicitantes(df)
+    agregados.horarios = horarios_eventos(df)
+    
+    # Dispositivos
+    agregados.dispositivos = {d: int(n) for d, n in contar_dispositivos(df).items()}
+    
+    # Timeline do período recente
+    recentes = (df['data_criacao'] >= data_limite).to_numpy()
+    if recentes.any():
+        por_dia = df.loc[recentes].groupby([df.loc[recentes, 'data_criacao'].dt.date, status[recentes]]).size()
+        agregados.timeline = {chave: int(quantidade) for chave, quantidade in por_dia.items() if quantidade}
+    
+    return agregados
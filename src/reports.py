@@ -2,86 +2,223 @@
 Módulo para geração de relatórios
 """
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime, timedelta
+from datetime import datetime
+import hashlib
+import json
 import os
-from typing import Dict, List, Tuple
+import re
+import threading
+import time
+from contextlib import contextmanager
+from html import escape
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
 import plotly.express as px
 import plotly.graph_objects as go
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
 from plotly.subplots import make_subplots
 
+from artefatos import CatalogoArtefatos
+from cache_relatorios import CacheRelatorios, gravar_atomico
+from dataclasses import replace
+from report_engine import (AgregadosRelatorio, FiltroRelatorio, carregar_snapshot, conclusoes_no_periodo,
+                           particionar_por_mes)
+from report_engine import calcular_agregados as agregar_snapshot
+from rollup import RollupDiario
+from sla import CalendarioUteis
+from storage import CSVStorage
+
+# Prefixo dos arquivos de cada gráfico
+PREFIXOS_GRAFICOS = {
+    'status': 'status_distribution',
+    'dispositivos': 'dispositivos_top10',
+    'timeline': 'timeline_tickets',
+    'horarios': 'horarios_semana'
+}
+
+# Etapas cronometradas em ``ReportGenerator.tempos`` (ex.: ``cli.py relatorio --profile``)
+ETAPAS = ('carregar', 'agregar', 'renderizar', 'gravar')
+
+# Títulos das seções de gráficos no relatório completo
+TITULOS_GRAFICOS = {
+    'status': 'Distribuição por Status',
+    'dispositivos': 'Top 10 Dispositivos',
+    'timeline': 'Timeline de Tickets',
+    'horarios': 'Carga por Dia da Semana e Hora'
+}
+
+def _renderizar_grafico(figura: Dict, filepath: str) -> Tuple[str, str]:
+    """Grava uma figura (em formato dict) como HTML; roda nos processos do pool
+    
+    O arquivo avulso referencia o plotly.min.js compartilhado do diretório de
+    relatórios (gravado pelo processo principal). Retorna também o trecho HTML
+    (div + JSON da figura, sem plotly.js) usado no relatório completo.
+    """
+    fig = go.Figure(figura)
+    html = fig.to_html(include_plotlyjs='directory')
+    gravar_atomico(filepath, lambda f: f.write(html))
+    return filepath, fig.to_html(full_html=False, include_plotlyjs=False)
+
+def _fragmento_grafico(figura: Dict) -> str:
+    """Trecho HTML de uma figura (div + JSON, sem plotly.js); roda nos processos do pool"""
+    return go.Figure(figura).to_html(full_html=False, include_plotlyjs=False)
+
+def _nome_arquivo(texto: str) -> str:
+    """Nome de arquivo legível a partir de um texto livre (ex.: nome do squad leader)"""
+    return re.sub(r'[^\w-]+', '_', texto).strip('_') or 'sem_nome'
+
 class ReportGenerator:
     """Gerador de relatórios da fila de suporte"""
     
-    def __init__(self, fila_file: str, relatorios_dir: str):
+    def __init__(self, fila_file: str, relatorios_dir: str, storage=None, rollup=None,
+                 cache_itens: int = 64, report_workers: int = 3, max_artefatos_por_tipo: int = 20,
+                 max_bytes_artefatos: int = 200 * 1024 * 1024, analitico=None,
+                 min_linhas_paralelo: int = 200000, calendario: Optional[CalendarioUteis] = None):
         self.fila_file = fila_file
         self.relatorios_dir = relatorios_dir
+        self.storage = storage or CSVStorage(fila_file)
+        # Calendário comercial das horas úteis de resolução (o mesmo do rollup e do motor analítico)
+        self.calendario = calendario or CalendarioUteis()
+        # Compartilhe o rollup do FilaManager para evitar reconstruções
+        self.rollup = rollup or RollupDiario(self.storage, calendario=self.calendario)
+        # Motor DuckDB (analitico.MotorAnalitico) para os recortes que o rollup não cobre
+        self.analitico = analitico
         self.ensure_reports_dir()
+        self.cache = CacheRelatorios(os.path.join(relatorios_dir, 'cache'), max_itens=cache_itens)
+        self.catalogo = CatalogoArtefatos(relatorios_dir, max_por_tipo=max_artefatos_por_tipo,
+                                          max_bytes=max_bytes_artefatos)
+        # Processos usados para gravar os gráficos do relatório completo (1 = sem paralelismo)
+        self.report_workers = max(1, min(report_workers, os.cpu_count() or 1))
+        # A partir deste tamanho os agregados são calculados por mês, em paralelo no mesmo pool
+        self.min_linhas_paralelo = min_linhas_paralelo
+        self._pool = None
+        self._lock_pool = threading.Lock()
+        self.tempos: Dict[str, float] = dict.fromkeys(ETAPAS, 0.0)
     
     def ensure_reports_dir(self):
         """Garante que o diretório de relatórios existe"""
         if not os.path.exists(self.relatorios_dir):
             os.makedirs(self.relatorios_dir)
     
-    def carregar_dados(self) -> pd.DataFrame:
-        """Carrega os dados da fila"""
-        df = pd.read_csv(self.fila_file)
+    @contextmanager
+    def medir(self, etapa: str):
+        """Soma a duração do bloco ao tempo acumulado da etapa
         
-        # Converte datas
-        df['data_criacao'] = pd.to_datetime(df['data_criacao'], errors='coerce')
-        df['data_solicitacao'] = pd.to_datetime(df['data_solicitacao'], errors='coerce')
-        df['data_conclusao'] = pd.to_datetime(df['data_conclusao'], errors='coerce')
-        
-        return df
+        Os gráficos gravados pelo pool são serializados e gravados na mesma
+        chamada e contam como ``renderizar``; ``gravar`` cobre os arquivos dos
+        relatórios e dos gráficos avulsos gravados no processo principal.
+        """
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.tempos[etapa] += time.perf_counter() - inicio
     
-    def gerar_relatorio_geral(self) -> Dict:
-        """Gera relatório geral com estatísticas principais"""
-        df = self.carregar_dados()
-        
-        # Estatísticas básicas
-        total_tickets = len(df)
-        pendentes = len(df[df['status'] == 'Pendente'])
-        em_andamento = len(df[df['status'] == 'Em andamento'])
-        concluidos = len(df[df['status'] == 'Concluída'])
-        
-        # Tempo médio de resolução (apenas para tickets concluídos)
-        df_concluidos = df[df['status'] == 'Concluída'].copy()
-        if not df_concluidos.empty:
-            df_concluidos['tempo_resolucao'] = (df_concluidos['data_conclusao'] - df_concluidos['data_criacao']).dt.total_seconds() / 3600  # em horas
-            tempo_medio_resolucao = df_concluidos['tempo_resolucao'].mean()
-        else:
-            tempo_medio_resolucao = 0
-        
-        # Dispositivos mais solicitados
-        dispositivos_lista = []
-        for _, row in df.iterrows():
-            if pd.notna(row['dispositivos']):
-                dispositivos_lista.extend([d.strip() for d in str(row['dispositivos']).split(',')])
-        
-        dispositivos_count = pd.Series(dispositivos_lista).value_counts().head(10)
+    def zerar_tempos(self):
+        self.tempos = dict.fromkeys(ETAPAS, 0.0)
+    
+    def carregar_dados(self, filtro: Optional[FiltroRelatorio] = None) -> pd.DataFrame:
+        """Carrega os dados da fila (só as linhas do recorte, se houver)"""
+        with self.medir('carregar'):
+            return carregar_snapshot(self.storage, filtro)
+    
+    def _em_cache(self, tipo: str, gerar: Callable[[str], Any], **parametros) -> Any:
+        """Resultado em cache para a revisão atual dos dados, gerado só se necessário
         
-        # Tickets por período (últimos 30 dias)
-        data_limite = datetime.now() - timedelta(days=30)
-        df_recentes = df[df['data_criacao'] >= data_limite]
-        tickets_por_dia = df_recentes.groupby(df_recentes['data_criacao'].dt.date).size()
+        ``gerar`` recebe a chave do pedido, usada também para nomear os arquivos.
+        """
+        # O dia entra na chave porque sem período os gráficos usam a janela dos últimos 30 dias
+        parametros['dia'] = datetime.now().strftime('%Y-%m-%d')
+        parametros['calendario'] = self.calendario.parametros()
+        chave = self.cache.chave(self.storage.revisao(), tipo, parametros)
+        encontrado, valor = self.cache.obter(chave)
+        if encontrado and self._arquivos_existem(valor):
+            return valor
+        valor = gerar(chave)
+        self.cache.guardar(chave, valor)
+        return valor
+    
+    @classmethod
+    def _arquivos_existem(cls, valor: Any) -> bool:
+        """Um resultado em cache só vale se os arquivos gerados ainda existem"""
+        if isinstance(valor, dict):
+            return all(cls._arquivos_existem(v) for v in valor.values())
+        if isinstance(valor, str) and valor.endswith(('.html', '.json')):
+            return os.path.exists(valor)
+        return True
+    
+    def calcular_agregados(self, filtro: Optional[FiltroRelatorio] = None) -> AgregadosRelatorio:
+        """Agregados de todos os relatórios para o recorte pedido
+        
+        Recortes só de período são lidos do rollup diário (custo proporcional
+        aos dias do período). Status, prioridade e squad leader, que o rollup
+        não cruza com todas as métricas, são agregados no motor analítico
+        (DuckDB), se configurado; sem ele vão para o armazenamento como
+        predicado e só as linhas selecionadas são agregadas.
+        """
+        filtro = filtro or FiltroRelatorio()
+        if not filtro.apenas_periodo and self.analitico is not None:
+            with self.medir('carregar'):
+                self.analitico.snapshot()
+            with self.medir('agregar'):
+                return self.analitico.agregados(filtro, filtro.inicio_timeline())
+        if not filtro.apenas_periodo:
+            df = self.carregar_dados(filtro)
+            with self.medir('agregar'):
+                agregados = self._agregar(df, filtro.inicio_timeline())
+            if filtro.inicio or filtro.fim:
+                # No mapa de calor as conclusões contam no dia em que aconteceram, como no rollup
+                with self.medir('carregar'):
+                    conclusoes = conclusoes_no_periodo(self.storage, filtro)
+                agregados.horarios = {**{chave: quantidade for chave, quantidade in agregados.horarios.items()
+                                         if chave[0] != 'conclusao'}, **conclusoes}
+            return agregados
+        with self.medir('carregar'):
+            self.rollup.sincronizar()
+        with self.medir('agregar'):
+            return self.rollup.agregados(filtro.inicio_timeline(), inicio=filtro.inicio, fim=filtro.fim)
+    
+    def _agregar(self, df: pd.DataFrame, data_limite: datetime) -> AgregadosRelatorio:
+        """Agregados de um snapshot; históricos grandes são divididos por mês de criação
         
-        return {
-            'total_tickets': total_tickets,
-            'pendentes': pendentes,
-            'em_andamento': em_andamento,
-            'concluidos': concluidos,
-            'tempo_medio_resolucao_horas': round(tempo_medio_resolucao, 2),
-            'dispositivos_mais_solicitados': dispositivos_count.to_dict(),
-            'tickets_por_dia': tickets_por_dia.to_dict()
-        }
+        Cada mês é agregado em um processo do pool e as partes são combinadas
+        (contagens e somas somadas, digests e sketches mesclados). Abaixo de
+        ``min_linhas_paralelo`` linhas, ou sem workers, o cálculo é direto.
+        """
+        if self.report_workers == 1 or len(df) < self.min_linhas_paralelo:
+            return agregar_snapshot(df, data_limite, self.calendario)
+        tarefas = {mes: (parte, data_limite, self.calendario) for mes, parte in particionar_por_mes(df).items()}
+        return AgregadosRelatorio.combinar(list(self._executar(agregar_snapshot, tarefas).values()), data_limite)
     
-    def gerar_grafico_status(self) -> str:
+    @staticmethod
+    def _parametros(filtro: Optional[FiltroRelatorio]) -> Dict:
+        return filtro.parametros() if filtro else {}
+    
+    def gerar_relatorio_geral(self, agregados: Optional[AgregadosRelatorio] = None,
+                              filtro: Optional[FiltroRelatorio] = None) -> Dict:
+        """Gera relatório geral com estatísticas principais"""
+        if agregados is None:
+            return self._em_cache('geral', lambda chave: self.gerar_relatorio_geral(self.calcular_agregados(filtro)),
+                                  **self._parametros(filtro))
+        with self.medir('agregar'):
+            return agregados.resumo()
+    
+    def gerar_grafico_status(self, agregados: Optional[AgregadosRelatorio] = None,
+                             filtro: Optional[FiltroRelatorio] = None) -> str:
         """Gera gráfico de distribuição por status"""
-        df = self.carregar_dados()
-        
+        if agregados is None:
+            return self._em_cache('grafico_status', lambda chave: self._salvar_grafico(
+                self._figura_status(self.calcular_agregados(filtro)), 'status', chave), **self._parametros(filtro))
+        return self._salvar_grafico(self._figura_status(agregados), 'status')
+    
+    def _figura_status(self, agregados: AgregadosRelatorio) -> Optional[go.Figure]:
         # Conta tickets por status
-        status_counts = df['status'].value_counts()
+        status_counts = pd.Series(agregados.por_status, dtype=int).sort_values(ascending=False)
+        
+        if status_counts.empty:
+            return None
         
         # Cria gráfico com plotly
         fig = px.pie(
@@ -101,24 +238,22 @@ class ReportGenerator:
             showlegend=True
         )
         
-        # Salva o gráfico
-        filename = f"status_distribution_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
-        filepath = os.path.join(self.relatorios_dir, filename)
-        fig.write_html(filepath)
-        
-        return filepath
+        return fig
     
-    def gerar_grafico_dispositivos(self) -> str:
+    def gerar_grafico_dispositivos(self, agregados: Optional[AgregadosRelatorio] = None,
+                                   filtro: Optional[FiltroRelatorio] = None) -> str:
         """Gera gráfico dos dispositivos mais solicitados"""
-        df = self.carregar_dados()
-        
-        # Processa dispositivos
-        dispositivos_lista = []
-        for _, row in df.iterrows():
-            if pd.notna(row['dispositivos']):
-                dispositivos_lista.extend([d.strip() for d in str(row['dispositivos']).split(',')])
+        if agregados is None:
+            return self._em_cache('grafico_dispositivos', lambda chave: self._salvar_grafico(
+                self._figura_dispositivos(self.calcular_agregados(filtro)), 'dispositivos', chave),
+                **self._parametros(filtro))
+        return self._salvar_grafico(self._figura_dispositivos(agregados), 'dispositivos')
+    
+    def _figura_dispositivos(self, agregados: AgregadosRelatorio) -> Optional[go.Figure]:
+        dispositivos_count = pd.Series(agregados.dispositivos_mais_solicitados(10), dtype=int)
         
-        dispositivos_count = pd.Series(dispositivos_lista).value_counts().head(10)
+        if dispositivos_count.empty:
+            return None
         
         # Cria gráfico
         fig = px.bar(
@@ -135,29 +270,25 @@ class ReportGenerator:
             height=500
         )
         
-        # Salva o gráfico
-        filename = f"dispositivos_top10_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
-        filepath = os.path.join(self.relatorios_dir, filename)
-        fig.write_html(filepath)
-        
-        return filepath
+        return fig
     
-    def gerar_grafico_timeline(self) -> str:
+    def gerar_grafico_timeline(self, agregados: Optional[AgregadosRelatorio] = None,
+                               filtro: Optional[FiltroRelatorio] = None) -> str:
         """Gera gráfico de timeline dos tickets"""
-        df = self.carregar_dados()
-        
-        # Filtra últimos 30 dias
-        data_limite = datetime.now() - timedelta(days=30)
-        df_recentes = df[df['data_criacao'] >= data_limite]
+        if agregados is None:
+            return self._em_cache('grafico_timeline', lambda chave: self._salvar_grafico(
+                self._figura_timeline(self.calcular_agregados(filtro)), 'timeline', chave),
+                **self._parametros(filtro))
+        return self._salvar_grafico(self._figura_timeline(agregados), 'timeline')
+    
+    def _figura_timeline(self, agregados: AgregadosRelatorio) -> Optional[go.Figure]:
+        # Tickets por dia e status no período (últimos 30 dias se não houver recorte)
+        tickets_por_dia = agregados.timeline_df()
         
-        if df_recentes.empty:
+        if tickets_por_dia.empty:
             return None
         
-        # Agrupa por dia
-        tickets_por_dia = df_recentes.groupby([
-            df_recentes['data_criacao'].dt.date,
-            'status'
-        ]).size().reset_index(name='count')
+        primeiro, ultimo = tickets_por_dia['data_criacao'].min(), tickets_por_dia['data_criacao'].max()
         
         # Cria gráfico
         fig = px.line(
@@ -165,7 +296,7 @@ class ReportGenerator:
             x='data_criacao',
             y='count',
             color='status',
-            title="Timeline de Tickets (Últimos 30 dias)",
+            title=f"Timeline de Tickets ({primeiro.strftime('%d/%m/%Y')} a {ultimo.strftime('%d/%m/%Y')})",
             labels={'data_criacao': 'Data', 'count': 'Número de Tickets'}
         )
         
@@ -176,33 +307,161 @@ class ReportGenerator:
             yaxis_title="Número de Tickets"
         )
         
-        # Salva o gráfico
-        filename = f"timeline_tickets_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
-        filepath = os.path.join(self.relatorios_dir, filename)
-        fig.write_html(filepath)
-        
-        return filepath
+        return fig
+    
+    def gerar_grafico_horarios(self, agregados: Optional[AgregadosRelatorio] = None,
+                               filtro: Optional[FiltroRelatorio] = None) -> str:
+        """Gera o mapa de calor de chegadas e conclusões por dia da semana e hora"""
+        if agregados is None:
+            return self._em_cache('grafico_horarios', lambda chave: self._salvar_grafico(
+                self._figura_horarios(self.calcular_agregados(filtro)), 'horarios', chave),
+                **self._parametros(filtro))
+        return self._salvar_grafico(self._figura_horarios(agregados), 'horarios')
     
-    def gerar_relatorio_completo(self) -> Dict[str, str]:
-        """Gera relatório completo com todos os gráficos"""
-        relatorio = self.gerar_relatorio_geral()
+    def _figura_horarios(self, agregados: AgregadosRelatorio) -> Optional[go.Figure]:
+        # Histograma 7 × 24 (× prioridade) mantido no rollup: não lê os tickets
+        chegadas = agregados.mapa_horarios('chegada')
+        conclusoes = agregados.mapa_horarios('conclusao')
+        if not chegadas.values.any() and not conclusoes.values.any():
+            return None
         
-        # Gera gráficos
-        graficos = {
-            'status': self.gerar_grafico_status(),
-            'dispositivos': self.gerar_grafico_dispositivos(),
-            'timeline': self.gerar_grafico_timeline()
-        }
+        fig = make_subplots(rows=2, cols=1, subplot_titles=("Chegadas", "Conclusões"), vertical_spacing=0.12)
+        for linha, (mapa, cores) in enumerate(((chegadas, 'Purples'), (conclusoes, 'Greens')), start=1):
+            fig.add_trace(go.Heatmap(
+                z=mapa.values,
+                x=[f"{hora:02d}h" for hora in mapa.columns],
+                y=list(mapa.index),
+                colorscale=cores,
+                showscale=False,
+                hovertemplate="%{y} %{x}: %{z} tickets<extra></extra>"
+            ), row=linha, col=1)
+            fig.update_yaxes(autorange='reversed', row=linha, col=1)
+        
+        fig.update_layout(
+            title="Chegadas e Conclusões por Dia da Semana e Hora",
+            font=dict(size=12),
+            title_font_size=18,
+            height=600
+        )
         
-        # Gera relatório em HTML
-        html_content = self._gerar_html_relatorio(relatorio, graficos)
+        return fig
+    
+    def _salvar_grafico(self, fig: Optional[go.Figure], nome: str, chave: Optional[str] = None) -> Optional[str]:
+        """Salva o gráfico em HTML, reaproveitando o arquivo de um pedido idêntico
         
-        # Salva relatório HTML
-        filename = f"relatorio_completo_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
-        filepath = os.path.join(self.relatorios_dir, filename)
+        Sem ``chave`` (agregados passados pelo chamador) o arquivo é endereçado
+        pelo conteúdo da própria figura.
+        """
+        if fig is None:
+            return None
+        chave = chave or hashlib.sha1(fig.to_json().encode('utf-8')).hexdigest()
+        filepath = self.catalogo.caminho(PREFIXOS_GRAFICOS[nome], chave)
+        if not os.path.exists(filepath):
+            self._garantir_plotlyjs()
+            with self.medir('renderizar'):
+                html = fig.to_html(include_plotlyjs='directory')
+            self._gravar_texto(filepath, html)
+        self.catalogo.registrar(f'grafico_{nome}', filepath)
+        return filepath
+    
+    def _renderizar_graficos(self, figuras: Dict[str, Optional[go.Figure]], chave: str,
+                             apenas_faltantes: bool = False) -> Tuple[Dict, Dict]:
+        """Grava vários gráficos em paralelo no pool de processos
+        
+        As figuras são montadas uma vez no processo principal e enviadas como
+        dict; a serialização para HTML (a parte cara) roda nos workers.
+        Retorna os caminhos dos arquivos e os trechos HTML de cada gráfico. Com
+        ``apenas_faltantes`` os arquivos já existentes não são regravados (e
+        não há trecho HTML para eles).
+        """
+        caminhos = {nome: self.catalogo.caminho(PREFIXOS_GRAFICOS[nome], chave)
+                    for nome, fig in figuras.items() if fig is not None}
+        tarefas = {nome: (figuras[nome].to_dict(), caminho) for nome, caminho in caminhos.items()
+                   if not (apenas_faltantes and os.path.exists(caminho))}
+        if tarefas:
+            self._garantir_plotlyjs()
+        graficos = {nome: caminhos.get(nome) for nome in figuras}
+        return self._separar_resultados(graficos, self._executar(_renderizar_grafico, tarefas))
+    
+    def _executar(self, funcao: Callable, tarefas: Dict[Any, tuple]) -> Dict[Any, Any]:
+        """Executa ``funcao(*argumentos)`` para cada tarefa no pool de processos"""
+        if self.report_workers > 1 and len(tarefas) > 1:
+            try:
+                with self._lock_pool:
+                    if self._pool is None:
+                        self._pool = ProcessPoolExecutor(max_workers=self.report_workers)
+                    pool = self._pool
+                futuros = {chave: pool.submit(funcao, *argumentos) for chave, argumentos in tarefas.items()}
+            except (BrokenProcessPool, NotImplementedError, OSError):
+                # O pool não inicia (ambiente sem suporte a processos): executa no processo atual
+                self._pool = None
+            else:
+                # Erros das tarefas sobem para quem chamou, sem reexecutar
+                try:
+                    return {chave: futuro.result() for chave, futuro in futuros.items()}
+                except BrokenProcessPool:
+                    # Um processo do pool morreu: o próximo lote cria outro pool
+                    self._pool = None
+                    raise
+        
+        return {chave: funcao(*argumentos) for chave, argumentos in tarefas.items()}
+    
+    @staticmethod
+    def _separar_resultados(graficos: Dict, resultados: Dict) -> Tuple[Dict, Dict]:
+        fragmentos = {}
+        for nome, (caminho, fragmento) in resultados.items():
+            graficos[nome] = caminho
+            fragmentos[nome] = fragmento
+        return graficos, fragmentos
+    
+    def gerar_relatorio_completo(self, progresso: Optional[Callable[[str, float], None]] = None,
+                                 filtro: Optional[FiltroRelatorio] = None) -> Dict[str, str]:
+        """Gera relatório completo com todos os gráficos (reaproveitado enquanto os dados não mudam)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        ``progresso(etapa, fracao)``, se informado, recebe o andamento de cada
+        etapa; ``filtro`` restringe o relatório a um período, status, prioridades
+        e/ou squad leader.
+        """
+        progresso = progresso or (lambda etapa, fracao: None)
+        return self._em_cache('completo', lambda chave: self._gerar_relatorio_completo(chave, progresso, filtro),
+                              **self._parametros(filtro))
+    
+    def _gerar_relatorio_completo(self, chave: str, progresso: Callable[[str, float], None],
+                                  filtro: Optional[FiltroRelatorio] = None) -> Dict[str, str]:
+        # Os dados são lidos e agregados uma única vez para todas as seções
+        progresso('Agregando dados', 0.1)
+        agregados = self.calcular_agregados(filtro)
+        relatorio = self.gerar_relatorio_geral(agregados)
+        
+        # Os arquivos são nomeados pela chave do pedido: um pedido idêntico
+        # (mesma revisão, tipo e parâmetros) reaproveita o relatório já gravado
+        filepath = self.catalogo.caminho('relatorio_completo', chave)
+        existente = os.path.exists(filepath)
+        
+        # Monta as figuras e grava os gráficos em paralelo
+        progresso('Gerando gráficos', 0.4)
+        with self.medir('renderizar'):
+            graficos, fragmentos = self._renderizar_graficos({
+                'status': self._figura_status(agregados),
+                'dispositivos': self._figura_dispositivos(agregados),
+                'timeline': self._figura_timeline(agregados),
+                'horarios': self._figura_horarios(agregados)
+            }, chave, apenas_faltantes=existente)
+        
+        if not existente:
+            # Gera relatório em HTML, com os gráficos embutidos
+            progresso('Montando HTML', 0.8)
+            with self.medir('renderizar'):
+                html_content = self._gerar_html_relatorio(relatorio, graficos, fragmentos, filtro)
+            
+            # Salva relatório HTML
+            self._gravar_texto(filepath, html_content)
+        
+        descricao = (filtro or FiltroRelatorio()).descricao()
+        for nome, caminho in graficos.items():
+            if caminho:
+                self.catalogo.registrar(f'grafico_{nome}', caminho, descricao)
+        self.catalogo.registrar('completo', filepath, descricao)
         
         return {
             'relatorio_html': filepath,
@@ -210,15 +469,274 @@ class ReportGenerator:
             'dados': relatorio
         }
     
-    def _gerar_html_relatorio(self, dados: Dict, graficos: Dict) -> str:
-        """Gera HTML do relatório completo"""
+    def gerar_relatorios_por_squad(self, progresso: Optional[Callable[[str, float], None]] = None,
+                                   filtro: Optional[FiltroRelatorio] = None) -> Dict:
+        """Relatório completo de cada squad leader em um único lote (reaproveitado enquanto os dados não mudam)
+        
+        Os dados são lidos uma vez e divididos por squad leader; os gráficos de
+        todos os relatórios vão juntos para o pool de processos. Os arquivos
+        ficam em um diretório próprio, com uma página índice, e o retorno é o
+        manifesto do lote (arquivo e métricas de cada squad leader) para a
+        distribuição.
+        """
+        progresso = progresso or (lambda etapa, fracao: None)
+        return self._em_cache('lote_squads', lambda chave: self._gerar_lote_squads(chave, progresso, filtro),
+                              **self._parametros(filtro))
+    
+    def _gerar_lote_squads(self, chave: str, progresso: Callable[[str, float], None],
+                           filtro: Optional[FiltroRelatorio] = None) -> Dict:
+        filtro = filtro or FiltroRelatorio()
+        diretorio = self.catalogo.caminho('squads', chave, None)
+        os.makedirs(diretorio, exist_ok=True)
+        
+        progresso('Carregando dados', 0.05)
+        df = self.carregar_dados(filtro)
+        squads = df['squad_leader'].dropna().astype(str)
+        squads = squads[squads.str.strip() != '']
+        
+        progresso('Agregando por squad leader', 0.2)
+        resumos = {}
+        figuras = {}
+        for squad, indices in squads.groupby(squads).groups.items():
+            with self.medir('agregar'):
+                agregados = self._agregar(df.loc[indices], filtro.inicio_timeline())
+                resumos[squad] = agregados.resumo()
+            with self.medir('renderizar'):
+                for nome, figura in (('status', self._figura_status(agregados)),
+                                     ('dispositivos', self._figura_dispositivos(agregados)),
+                                     ('timeline', self._figura_timeline(agregados)),
+                                     ('horarios', self._figura_horarios(agregados))):
+                    if figura is not None:
+                        figuras[(squad, nome)] = (figura.to_dict(),)
+        
+        # Os gráficos de todos os squad leaders são serializados juntos no pool
+        progresso('Gerando gráficos', 0.4)
+        with self.medir('renderizar'):
+            fragmentos = self._executar(_fragmento_grafico, figuras)
+        
+        progresso('Montando HTML', 0.8)
+        plotlyjs = os.path.relpath(self._garantir_plotlyjs(), diretorio)
+        relatorios = []
+        nomes_usados = set()
+        for squad, resumo in resumos.items():
+            nome = _nome_arquivo(squad)
+            sufixo = 2
+            while nome in nomes_usados:
+                nome = f"{_nome_arquivo(squad)}_{sufixo}"
+                sufixo += 1
+            nomes_usados.add(nome)
+            
+            graficos = {grafico: fragmento for (dono, grafico), fragmento in fragmentos.items() if dono == squad}
+            with self.medir('renderizar'):
+                html = self._gerar_html_relatorio(resumo, {}, graficos, replace(filtro, squad_leader=squad), plotlyjs)
+            filepath = os.path.join(diretorio, f"{nome}.html")
+            self._gravar_texto(filepath, html)
+            relatorios.append({
+                'squad_leader': squad,
+                'arquivo': filepath,
+                'total_tickets': resumo['total_tickets'],
+                'pendentes': resumo['pendentes'],
+                'em_andamento': resumo['em_andamento'],
+                'concluidos': resumo['concluidos'],
+                'tempo_medio_resolucao_horas': resumo['tempo_medio_resolucao_horas'],
+                'tempo_medio_resolucao_horas_uteis': resumo['tempo_medio_resolucao_horas_uteis'],
+                'percentis_resolucao_horas': resumo['percentis_resolucao_horas'],
+                'bytes': len(html.encode('utf-8'))
+            })
+        
+        indice = os.path.join(diretorio, 'index.html')
+        self._gravar_texto(indice, self._gerar_html_indice(relatorios, filtro))
+        manifesto = {
+            'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'filtro': filtro.parametros(),
+            'descricao': filtro.descricao(),
+            'diretorio': diretorio,
+            'indice': indice,
+            'relatorios': relatorios
+        }
+        self._gravar_texto(os.path.join(diretorio, 'manifesto.json'),
+                           json.dumps(manifesto, ensure_ascii=False, indent=2, default=str))
+        
+        self.catalogo.registrar('lote_squads', diretorio, filtro.descricao())
+        progresso('Concluído', 1.0)
+        return manifesto
+    
+    def _garantir_plotlyjs(self) -> str:
+        """plotly.min.js compartilhado do diretório de relatórios (o mesmo dos gráficos avulsos)"""
+        filepath = os.path.join(self.catalogo.diretorio, 'plotly.min.js')
+        if not os.path.exists(filepath):
+            self._gravar_texto(filepath, get_plotlyjs())
+        return filepath
+    
+    def gravar_json(self, tipo: str, conteudo: Any, filtro: Optional[FiltroRelatorio] = None) -> str:
+        """Grava o resultado de um relatório em JSON (ex.: ``cli.py relatorio --formato json``)
+        
+        Como os HTMLs, o arquivo é nomeado pelo hash das entradas (revisão,
+        tipo e parâmetros), reaproveitado enquanto elas não mudam e registrado
+        no catálogo, sujeito à retenção.
+        """
+        return self._em_cache(f'json_{tipo}', lambda chave: self._gravar_json(chave, tipo, conteudo, filtro),
+                              **self._parametros(filtro))
+    
+    def _gravar_json(self, chave: str, tipo: str, conteudo: Any, filtro: Optional[FiltroRelatorio]) -> str:
+        filepath = self.catalogo.caminho(f'relatorio_{tipo}', chave, 'json')
+        if not os.path.exists(filepath):
+            self._gravar_texto(filepath, json.dumps(conteudo, ensure_ascii=False, indent=2, default=str))
+        self.catalogo.registrar(f'json_{tipo}', filepath, (filtro or FiltroRelatorio()).descricao())
+        return filepath
+    
+    def _gravar_texto(self, filepath: str, conteudo: str):
+        with self.medir('gravar'):
+            gravar_atomico(filepath, lambda f: f.write(conteudo))
+    
+    @staticmethod
+    def _gerar_html_indice(relatorios: List[Dict], filtro: FiltroRelatorio) -> str:
+        """Página índice do lote por squad leader, com links e as métricas principais"""
+        linhas = "".join(
+            f"<tr><td><a href=\"{quote(os.path.basename(item['arquivo']))}\">{escape(item['squad_leader'])}</a></td>"
+            f"<td>{item['total_tickets']}</td><td>{item['pendentes']}</td><td>{item['concluidos']}</td>"
+            f"<td>{item['tempo_medio_resolucao_horas']:.1f}h</td><td>{item['tempo_medio_resolucao_horas_uteis']:.1f}h</td></tr>"
+            for item in relatorios
+        )
+        return f"""
+        <!DOCTYPE html>
+        <html lang="pt-BR">
+        <head>
+            <meta charset="UTF-8">
+            <title>Relatórios por Squad Leader - Mavi</title>
+            <style>
+                body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; padding: 20px; color: #333; }}
+                h1 {{ color: #667eea; }}
+                table {{ border-collapse: collapse; min-width: 600px; }}
+                th, td {{ padding: 6px 12px; border-bottom: 1px solid #dee2e6; text-align: left; }}
+            </style>
+        </head>
+        <body>
+            <h1>Relatórios por Squad Leader</h1>
+            <p>Gerado em {datetime.now().strftime('%d/%m/%Y às %H:%M')} · {escape(filtro.descricao())}</p>
+            <table>
+                <tr><th>Squad Leader</th><th>Tickets</th><th>Pendentes</th><th>Concluídos</th><th>Tempo Médio</th><th>Horas Úteis</th></tr>
+                {linhas}
+            </table>
+        </body>
+        </html>
+        """
+    
+    @staticmethod
+    def _html_percentis(dados: Dict) -> str:
+        """Seção com os percentis do tempo de resolução (geral e por dimensão)"""
+        percentis = dados.get('percentis_resolucao_horas')
+        if not percentis:
+            return ''
+        
+        html = f"""
+                    <div class="section">
+                        <h2>Tempo de Resolução (horas)</h2>
+                        <p>Mediana: <strong>{percentis['p50']:.1f}h</strong> · p90: <strong>{percentis['p90']:.1f}h</strong>
+                        · p99: <strong>{percentis['p99']:.1f}h</strong></p>
+        """
+        rotulos = {'prioridade': 'Prioridade', 'squad_leader': 'Squad Leader', 'dispositivo': 'Dispositivo'}
+        for dimensao, rotulo in rotulos.items():
+            por_valor = dados['percentis_resolucao_por'].get(dimensao)
+            if not por_valor:
+                continue
+            linhas = ''.join(
+                f"<tr><td>{escape(str(valor))}</td><td>{p['p50']:.1f}</td><td>{p['p90']:.1f}</td><td>{p['p99']:.1f}</td><td>{p['n']}</td></tr>"
+                for valor, p in por_valor.items()
+            )
+            html += f"""
+                        <table class="percentis">
+                            <tr><th>{rotulo}</th><th>p50</th><th>p90</th><th>p99</th><th>Tickets</th></tr>
+                            {linhas}
+                        </table>
+            """
+        html += """
+                    </div>
+        """
+        return html
+    
+    @staticmethod
+    def _html_sla(dados: Dict) -> str:
+        """Seção com os percentis em horas úteis (expediente, fins de semana e feriados descontados)"""
+        percentis = dados.get('percentis_resolucao_horas_uteis')
+        if not percentis:
+            return ''
+        
+        linhas = ''.join(
+            f"<tr><td>{escape(str(valor))}</td><td>{p['p50']:.1f}</td><td>{p['p90']:.1f}</td><td>{p['p99']:.1f}</td><td>{p['n']}</td></tr>"
+            for valor, p in dados.get('percentis_resolucao_uteis_por_prioridade', {}).items()
+        )
+        tabela = f"""
+                        <table class="percentis">
+                            <tr><th>Prioridade</th><th>p50</th><th>p90</th><th>p99</th><th>Tickets</th></tr>
+                            {linhas}
+                        </table>
+        """ if linhas else ''
+        return f"""
+                    <div class="section">
+                        <h2>SLA em Horas Úteis</h2>
+                        <p>Mediana: <strong>{percentis['p50']:.1f}h</strong> · p90: <strong>{percentis['p90']:.1f}h</strong>
+                        · p99: <strong>{percentis['p99']:.1f}h</strong></p>
+                        <p><small>Só conta o horário comercial; fins de semana e feriados nacionais e da empresa ficam de fora.</small></p>
+                        {tabela}
+                    </div>
+        """
+    
+    @staticmethod
+    def _html_solicitantes(dados: Dict) -> str:
+        """Seção com solicitantes distintos e recorrência (geral e por squad leader)"""
+        solicitantes = dados.get('solicitantes')
+        if not solicitantes:
+            return ''
+        
+        linhas = ''.join(
+            f"<tr><td>{escape(str(squad))}</td><td>{m['unicos']}</td><td>{m['pedidos']}</td><td>{m['recorrencia']:.0%}</td></tr>"
+            for squad, m in dados.get('solicitantes_por_squad', {}).items()
+        )
+        tabela = f"""
+                        <table class="percentis">
+                            <tr><th>Squad Leader</th><th>Solicitantes</th><th>Pedidos</th><th>Recorrência</th></tr>
+                            {linhas}
+                        </table>
+        """ if linhas else ''
+        return f"""
+                    <div class="section">
+                        <h2>Solicitantes</h2>
+                        <p>Solicitantes únicos: <strong>~{solicitantes['unicos']}</strong> · Pedidos: <strong>{solicitantes['pedidos']}</strong>
+                        · Recorrência: <strong>{solicitantes['recorrencia']:.0%}</strong>
+                        · Dispositivos distintos: <strong>{dados.get('dispositivos_distintos', 0)}</strong></p>
+                        <p><small>Contagens de pessoas distintas são aproximadas (HyperLogLog, erro típico de 2%).</small></p>
+                        {tabela}
+                    </div>
+        """
+    
+    def _gerar_html_relatorio(self, dados: Dict, graficos: Dict, fragmentos: Optional[Dict] = None,
+                              filtro: Optional[FiltroRelatorio] = None, plotlyjs: Optional[str] = None) -> str:
+        """Gera HTML do relatório completo
+        
+        Com ``fragmentos`` cada gráfico entra como JSON da figura e o plotly.js
+        é embutido uma única vez no cabeçalho (arquivo autocontido) ou, com
+        ``plotlyjs``, referenciado pelo caminho relativo do arquivo compartilhado
+        (com a CDN do plotly.js se o arquivo não estiver ao lado).
+        """
+        if not fragmentos:
+            script_plotly = ''
+        elif plotlyjs:
+            # Fora do diretório do lote (ex.: arquivo baixado) o plotly.js vem da CDN
+            cdn = f"https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"
+            script_plotly = (f'<script type="text/javascript" src="{quote(plotlyjs)}"></script>'
+                             f'<script type="text/javascript">window.Plotly || document.write(\'<script src="{cdn}"><\\/script>\')</script>')
+        else:
+            script_plotly = f'<script type="text/javascript">{get_plotlyjs()}</script>'
+        recorte = f"<p>{escape(filtro.descricao())}</p>" if filtro else ''
+        titulo = f"Relatório de Suporte Mavi - {filtro.squad_leader}" if filtro and filtro.squad_leader else "Relatório de Suporte Mavi"
         html = f"""
         <!DOCTYPE html>
         <html lang="pt-BR">
         <head>
             <meta charset="UTF-8">
             <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Relatório de Suporte Mavi</title>
+            <title>{escape(titulo)}</title>
             <style>
                 body {{
                     font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
@@ -274,13 +792,25 @@ class ReportGenerator:
                     border-bottom: 2px solid #667eea;
                     padding-bottom: 10px;
                 }}
+                .percentis {{
+                    border-collapse: collapse;
+                    margin: 15px 0;
+                    min-width: 400px;
+                }}
+                .percentis th, .percentis td {{
+                    padding: 6px 12px;
+                    border-bottom: 1px solid #dee2e6;
+                    text-align: left;
+                }}
             </style>
+            {script_plotly}
         </head>
         <body>
             <div class="container">
                 <div class="header">
                     <h1>Relatório de Suporte Mavi</h1>
                     <p>Gerado em {datetime.now().strftime('%d/%m/%Y às %H:%M')}</p>
+                    {recorte}
                 </div>
                 
                 <div class="content">
@@ -307,6 +837,10 @@ class ReportGenerator:
                                 <div class="stat-number">{dados['tempo_medio_resolucao_horas']:.1f}h</div>
                                 <div class="stat-label">Tempo Médio de Resolução</div>
                             </div>
+                            <div class="stat-card">
+                                <div class="stat-number">{dados['tempo_medio_resolucao_horas_uteis']:.1f}h</div>
+                                <div class="stat-label">Tempo Médio em Horas Úteis</div>
+                            </div>
                         </div>
                     </div>
                     
@@ -316,15 +850,33 @@ class ReportGenerator:
         """
         
         for dispositivo, count in list(dados['dispositivos_mais_solicitados'].items())[:5]:
-            html += f"<li><strong>{dispositivo}:</strong> {count} solicitações</li>"
+            html += f"<li><strong>{escape(str(dispositivo))}:</strong> {count} solicitações</li>"
         
         html += """
                         </ul>
                     </div>
-                    
+        """
+        
+        html += self._html_percentis(dados)
+        html += self._html_sla(dados)
+        html += self._html_solicitantes(dados)
+        
+        for nome, fragmento in (fragmentos or {}).items():
+            html += f"""
+                    <div class="section">
+                        <h2>{TITULOS_GRAFICOS.get(nome, nome.title())}</h2>
+                        {fragmento}
+                    </div>
+            """
+        
+        if not fragmentos:
+            html += """
                     <div class="section">
                         <p><em>Para visualizações interativas detalhadas, consulte os arquivos de gráficos gerados separadamente.</em></p>
                     </div>
+            """
+        
+        html += """
                 </div>
             </div>
         </body>
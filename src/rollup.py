@@ -0,0 +1,491 @@
+"""
+Agregado diário materializado da fila (rollup), mantido de forma incremental
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from cache_relatorios import gravar_atomico
+from dispositivos import explodir_dispositivos
+from report_engine import (DIMENSOES_SLA, AgregadosRelatorio, digests_resolucao, horarios_eventos,
+                            inicio_dia_timeline, mapa_horarios, normalizar_email, sketches_solicitantes)
+from sketches import HyperLogLog, TDigest
+from sla import CalendarioUteis
+
+# Dia usado para tickets sem data de criação válida (entram só nos totais)
+SEM_DATA = ''
+
+def _dia(valor) -> str:
+    data = pd.to_datetime(valor, errors='coerce')
+    return SEM_DATA if pd.isna(data) else data.strftime('%Y-%m-%d')
+
+def _texto(valor) -> str:
+    return '' if valor is None or (isinstance(valor, float) and pd.isna(valor)) else str(valor)
+
+def _horas_resolucao(linha: Dict) -> Optional[float]:
+    """Horas entre criação e conclusão de um ticket concluído"""
+    if _texto(linha.get('status')) != 'Concluída':
+        return None
+    criacao = pd.to_datetime(linha.get('data_criacao'), errors='coerce')
+    conclusao = pd.to_datetime(linha.get('data_conclusao'), errors='coerce')
+    if pd.isna(criacao) or pd.isna(conclusao):
+        return None
+    return (conclusao - criacao).total_seconds() / 3600
+
+def _horario_semana(valor) -> Optional[int]:
+    """Horário da semana (segunda 00h = 0) de uma data, ou None se inválida"""
+    data = pd.to_datetime(valor, errors='coerce')
+    return None if pd.isna(data) else data.dayofweek * 24 + data.hour
+
+def _resolucao(linha: Dict) -> Optional[tuple]:
+    """O que um ticket resolvido contribui para os digests (None se não resolvido)"""
+    horas = _horas_resolucao(linha)
+    if horas is None:
+        return None
+    return (_dia(linha.get('data_criacao')), horas, _texto(linha.get('prioridade')),
+            _texto(linha.get('squad_leader')).strip(), _texto(linha.get('dispositivos')))
+
+def _solicitante(linha: Dict) -> Optional[tuple]:
+    """O que um ticket contribui para os sketches de solicitantes (None se sem e-mail)"""
+    email = normalizar_email(linha.get('email'))
+    if not email:
+        return None
+    return (_dia(linha.get('data_criacao')), email, _texto(linha.get('squad_leader')).strip())
+
+class RollupDiario:
+    """Contagens por dia × status × prioridade × dispositivo
+    
+    ``_tickets[dia][(status, prioridade)]`` guarda [tickets, soma das horas de
+    resolução, resoluções, soma das horas úteis] e ``_dispositivos[dia][(status,
+    prioridade, dispositivo)]`` a quantidade de pedidos do dispositivo e
+    ``_resolucao[dia][(dimensão, valor)]`` um t-digest das horas de resolução
+    por prioridade, dispositivo e squad leader (``_resolucao_uteis`` o mesmo
+    em horas úteis, no geral e por prioridade); ``_solicitantes[dia][(dimensão,
+    valor)]`` é um HyperLogLog dos e-mails, no geral e por squad leader;
+    ``_horarios[dia][(evento, prioridade, horário)]`` conta chegadas (no dia
+    de criação) e conclusões (no dia de conclusão, como as taxas da
+    previsão) por horário da semana, para o mapa de calor; ``_squads`` quantos
+    tickets cada squad leader tem, com ou sem e-mail. O FilaManager
+    aplica cada mudança com ``aplicar``; escritas de outros processos
+    (importação, outra réplica) são detectadas pela revisão do armazenamento
+    e levam a uma reconstrução completa. Com ``arquivo`` o rollup é gravado em
+    disco junto com a revisão e o calendário do SLA, evitando a varredura ao
+    reiniciar.
+    """
+    
+    def __init__(self, storage, arquivo: Optional[str] = None, intervalo_gravacao: float = 30.0,
+                 calendario: Optional[CalendarioUteis] = None):
+        self.storage = storage
+        self.arquivo = arquivo
+        self.intervalo_gravacao = intervalo_gravacao
+        self.calendario = calendario or CalendarioUteis()
+        self._lock = threading.RLock()
+        self._tickets: Dict[str, Dict[tuple, list]] = {}
+        self._dispositivos: Dict[str, Dict[tuple, int]] = {}
+        self._resolucao: Dict[str, Dict[tuple, TDigest]] = {}
+        self._resolucao_uteis: Dict[str, Dict[tuple, TDigest]] = {}
+        self._solicitantes: Dict[str, Dict[tuple, HyperLogLog]] = {}
+        self._horarios: Dict[str, Dict[tuple, int]] = {}
+        self._squads: Dict[str, int] = {}
+        self._dias: List[str] = []
+        self.revisao = None
+        self._ultima_gravacao = 0.0
+        self._carregar_arquivo()
+    
+    @staticmethod
+    def _normalizar(revisao):
+        """Revisão no formato em que é gravada em JSON (tuplas viram listas)"""
+        return json.loads(json.dumps(revisao))
+    
+    def sincronizar(self, tentativas: int = 3):
+        """Reconstrói o rollup se o armazenamento mudou fora do FilaManager
+        
+        A leitura e a reconstrução rodam fora da transação, sem bloquear as
+        escritas; a transação só confere se a revisão continua a mesma da
+        leitura e troca o estado. Se houve escrita no meio, a reconstrução é
+        refeita; esgotadas as ``tentativas`` (escritas contínuas), a última
+        roda dentro da transação.
+        """
+        if self._normalizar(self.storage.revisao()) == self.revisao:
+            return
+        for _ in range(tentativas):
+            revisao = self._normalizar(self.storage.revisao())
+            novo = RollupDiario(self.storage, calendario=self.calendario)
+            novo._reconstruir(self.storage.ler('fila'))
+            with self.storage.transacao(), self._lock:
+                atual = self._normalizar(self.storage.revisao())
+                if atual == self.revisao:
+                    return
+                if atual == revisao:
+                    self._trocar_estado(novo, revisao)
+                    return
+        with self.storage.transacao(), self._lock:
+            revisao = self._normalizar(self.storage.revisao())
+            if revisao != self.revisao:
+                self._reconstruir(self.storage.ler('fila'))
+                self.revisao = revisao
+                self.salvar()
+    
+    def _trocar_estado(self, novo: 'RollupDiario', revisao):
+        """Adota o estado reconstruído em ``novo`` (chamado com o lock)"""
+        for atributo in ('_tickets', '_dispositivos', '_resolucao', '_resolucao_uteis', '_solicitantes',
+                         '_horarios', '_squads', '_dias'):
+            setattr(self, atributo, getattr(novo, atributo))
+        self.revisao = revisao
+        self.salvar()
+    
+    def _reconstruir(self, df: pd.DataFrame):
+        self._tickets = {}
+        self._dispositivos = {}
+        self._resolucao = {}
+        self._resolucao_uteis = {}
+        self._solicitantes = {}
+        self._horarios = {}
+        self._squads = {}
+        if not df.empty:
+            criacao = pd.to_datetime(df['data_criacao'], errors='coerce')
+            conclusao = pd.to_datetime(df['data_conclusao'], errors='coerce')
+            base = pd.DataFrame({
+                'dia': criacao.dt.strftime('%Y-%m-%d').fillna(SEM_DATA),
+                'dia_conclusao': conclusao.dt.strftime('%Y-%m-%d').fillna(SEM_DATA),
+                'status': df['status'].fillna('').astype(str),
+                'prioridade': df['prioridade'].fillna('').astype(str),
+                'squad_leader': df['squad_leader'],
+                'dispositivos': df['dispositivos'],
+                'email': df['email'],
+                'data_criacao': criacao,
+                'data_conclusao': conclusao
+            })
+            horas = (conclusao - criacao).dt.total_seconds() / 3600
+            horas = horas.where(base['status'] == 'Concluída')
+            base['horas'] = horas
+            base['horas_uteis'] = pd.Series(self.calendario.horas_uteis(criacao, conclusao),
+                                            index=base.index).where(horas.notna())
+            base['resolvido'] = horas.notna().astype(int)
+            
+            por_ticket = base.groupby(['dia', 'status', 'prioridade']).agg(
+                tickets=('dia', 'size'), soma=('horas', 'sum'), resolucoes=('resolvido', 'sum'),
+                soma_uteis=('horas_uteis', 'sum')
+            )
+            for (dia, status, prioridade), linha in zip(por_ticket.index, por_ticket.itertuples(index=False)):
+                self._tickets.setdefault(dia, {})[(status, prioridade)] = [
+                    int(linha.tickets), float(linha.soma), int(linha.resolucoes), float(linha.soma_uteis)
+                ]
+            
+            explodido = explodir_dispositivos(base, ['dia', 'status', 'prioridade'])
+            por_dispositivo = explodido.groupby(['dia', 'status', 'prioridade', 'dispositivo']).size()
+            for (dia, status, prioridade, dispositivo), quantidade in por_dispositivo.items():
+                self._dispositivos.setdefault(dia, {})[(status, prioridade, dispositivo)] = int(quantidade)
+            
+            for (dia, dimensao, valor), digest in digests_resolucao(base, por=['dia']).items():
+                self._resolucao.setdefault(dia, {})[(dimensao, valor)] = digest
+            
+            uteis = base.assign(horas=base['horas_uteis'])
+            for (dia, dimensao, valor), digest in digests_resolucao(uteis, por=['dia'], dimensoes=DIMENSOES_SLA).items():
+                self._resolucao_uteis.setdefault(dia, {})[(dimensao, valor)] = digest
+            
+            for (dia, dimensao, valor), sketch in sketches_solicitantes(base, por=['dia']).items():
+                self._solicitantes.setdefault(dia, {})[(dimensao, valor)] = sketch
+            
+            horarios = horarios_eventos(base, por=['dia'], por_conclusao=['dia_conclusao'])
+            for (dia, evento, prioridade, horario), quantidade in horarios.items():
+                self._horarios.setdefault(dia, {})[(evento, prioridade, horario)] = quantidade
+            
+            squads = df['squad_leader'].fillna('').astype(str).str.strip()
+            self._squads = {squad: int(n) for squad, n in squads[squads != ''].value_counts().items()}
+        self._dias = sorted(set(self._tickets) | set(self._dispositivos) | set(self._horarios))
+    
+    def _incluir_dia(self, dia: str):
+        posicao = bisect_left(self._dias, dia)
+        if posicao == len(self._dias) or self._dias[posicao] != dia:
+            self._dias.insert(posicao, dia)
+    
+    def _somar(self, linha: Dict, sinal: int, resolucao: bool = True, solicitante: bool = True) -> bool:
+        """Soma (sinal=1) ou retira (sinal=-1) um ticket das contagens
+        
+        Retorna False se o ticket precisaria sair de um digest de resolução ou
+        de um sketch de solicitantes, o que nenhum dos dois suporta (ticket
+        concluído reaberto, ticket removido, e-mail corrigido).
+        """
+        dia = _dia(linha.get('data_criacao'))
+        status = _texto(linha.get('status'))
+        prioridade = _texto(linha.get('prioridade'))
+        self._incluir_dia(dia)
+        
+        celula = self._tickets.setdefault(dia, {}).setdefault((status, prioridade), [0, 0.0, 0, 0.0])
+        celula[0] += sinal
+        horas = _horas_resolucao(linha)
+        if horas is not None:
+            horas_uteis = float(self.calendario.horas_uteis([linha.get('data_criacao')],
+                                                            [linha.get('data_conclusao')])[0])
+            celula[1] += sinal * horas
+            celula[2] += sinal
+            celula[3] += sinal * horas_uteis
+        if celula[0] <= 0:
+            del self._tickets[dia][(status, prioridade)]
+        
+        dispositivos = self._dispositivos.setdefault(dia, {})
+        for dispositivo in _texto(linha.get('dispositivos')).split(','):
+            dispositivo = dispositivo.strip()
+            if not dispositivo:
+                continue
+            chave = (status, prioridade, dispositivo)
+            dispositivos[chave] = dispositivos.get(chave, 0) + sinal
+            if dispositivos[chave] <= 0:
+                del dispositivos[chave]
+        
+        eventos = [('chegada', dia, _horario_semana(linha.get('data_criacao')))]
+        if status == 'Concluída':
+            eventos.append(('conclusao', _dia(linha.get('data_conclusao')),
+                            _horario_semana(linha.get('data_conclusao'))))
+        for evento, dia_evento, horario in eventos:
+            if horario is None:
+                continue
+            self._incluir_dia(dia_evento)
+            horarios = self._horarios.setdefault(dia_evento, {})
+            chave = (evento, prioridade, horario)
+            horarios[chave] = horarios.get(chave, 0) + sinal
+            if horarios[chave] <= 0:
+                del horarios[chave]
+        
+        squad_leader = _texto(linha.get('squad_leader')).strip()
+        if squad_leader:
+            self._squads[squad_leader] = self._squads.get(squad_leader, 0) + sinal
+            if self._squads[squad_leader] <= 0:
+                del self._squads[squad_leader]
+        
+        consistente = True
+        if solicitante and _solicitante(linha) is not None:
+            consistente = self._somar_solicitante(linha, dia, sinal)
+        if not resolucao or horas is None:
+            return consistente
+        if sinal < 0:
+            return False
+        digests = self._resolucao.setdefault(dia, {})
+        chaves = [('geral', ''), ('prioridade', prioridade)]
+        if squad_leader:
+            chaves.append(('squad_leader', squad_leader))
+        chaves.extend(('dispositivo', d.strip()) for d in _texto(linha.get('dispositivos')).split(',') if d.strip())
+        for chave in chaves:
+            digests.setdefault(chave, TDigest()).adicionar(horas)
+        digests_uteis = self._resolucao_uteis.setdefault(dia, {})
+        for chave in chaves[:2]:
+            digests_uteis.setdefault(chave, TDigest()).adicionar(horas_uteis)
+        return consistente
+    
+    def _somar_solicitante(self, linha: Dict, dia: str, sinal: int) -> bool:
+        if sinal < 0:
+            return False
+        _, email, squad_leader = _solicitante(linha)
+        hashes = HyperLogLog.hashes([email])
+        sketches = self._solicitantes.setdefault(dia, {})
+        chaves = [('geral', '')] + ([('squad_leader', squad_leader)] if squad_leader else [])
+        for chave in chaves:
+            sketches.setdefault(chave, HyperLogLog()).adicionar_hashes(hashes)
+        return True
+    
+    def aplicar(self, mudancas: List[Tuple[Optional[Dict], Optional[Dict]]], revisao_anterior, revisao_nova):
+        """Aplica as escritas de uma transação do FilaManager
+        
+        Cada mudança é um par (linha antiga, linha nova) de um ticket da fila;
+        ``None`` indica que o ticket não existia (inserção) ou deixou de
+        existir. A atualização só é feita se o rollup refletia exatamente a
+        revisão anterior à transação; caso contrário ele será reconstruído.
+        """
+        with self._lock:
+            if self.revisao != self._normalizar(revisao_anterior):
+                return
+            consistente = True
+            for antiga, nova in mudancas:
+                # Edições que não mudam a resolução nem o solicitante (ex.: observações) não tocam os sketches
+                resolucao = antiga is None or nova is None or _resolucao(antiga) != _resolucao(nova)
+                solicitante = antiga is None or nova is None or _solicitante(antiga) != _solicitante(nova)
+                if antiga is not None:
+                    consistente &= self._somar(antiga, -1, resolucao, solicitante)
+                if nova is not None:
+                    consistente &= self._somar(nova, 1, resolucao, solicitante)
+            # Sem como retirar um ticket dos sketches, força a reconstrução na próxima sincronização
+            self.revisao = self._normalizar(revisao_nova) if consistente else None
+            if time.monotonic() - self._ultima_gravacao >= self.intervalo_gravacao:
+                self.salvar()
+    
+    def salvar(self):
+        """Grava o rollup e a revisão correspondente no arquivo configurado"""
+        if not self.arquivo:
+            return
+        with self._lock:
+            conteudo = {
+                'revisao': self.revisao,
+                'calendario': self.calendario.parametros(),
+                'tickets': [[dia, s, p] + celula for dia, celulas in self._tickets.items()
+                            for (s, p), celula in celulas.items()],
+                'dispositivos': [[dia, s, p, d, n] for dia, celulas in self._dispositivos.items()
+                                 for (s, p, d), n in celulas.items()],
+                'resolucao': [[dia, dimensao, valor, digest.para_lista()] for dia, digests in self._resolucao.items()
+                              for (dimensao, valor), digest in digests.items()],
+                'resolucao_uteis': [[dia, dimensao, valor, digest.para_lista()]
+                                    for dia, digests in self._resolucao_uteis.items()
+                                    for (dimensao, valor), digest in digests.items()],
+                'solicitantes': [[dia, dimensao, valor, sketch.para_lista()]
+                                 for dia, sketches in self._solicitantes.items()
+                                 for (dimensao, valor), sketch in sketches.items()],
+                'horarios_eventos': self._horarios_para_lista(),
+                'squads': self._squads
+            }
+            diretorio = os.path.dirname(self.arquivo)
+            if diretorio and not os.path.exists(diretorio):
+                os.makedirs(diretorio)
+            gravar_atomico(self.arquivo, lambda f: json.dump(conteudo, f, ensure_ascii=False))
+            self._ultima_gravacao = time.monotonic()
+    
+    def _horarios_para_lista(self) -> list:
+        """[dia, evento, prioridade, [horário, quantidade, horário, quantidade, ...]] (sem repetir as chaves)"""
+        agrupados = defaultdict(list)
+        for dia, celulas in self._horarios.items():
+            for (evento, prioridade, horario), quantidade in celulas.items():
+                agrupados[(dia, evento, prioridade)].extend((horario, quantidade))
+        return [list(chave) + [pares] for chave, pares in agrupados.items()]
+    
+    def _carregar_arquivo(self):
+        if not self.arquivo or not os.path.exists(self.arquivo):
+            return
+        try:
+            with open(self.arquivo, encoding='utf-8') as f:
+                conteudo = json.load(f)
+        except (OSError, ValueError):
+            return
+        # Arquivos gravados antes das horas úteis ou com outro calendário são reconstruídos
+        if conteudo.get('calendario') != self.calendario.parametros():
+            return
+        for dia, status, prioridade, tickets, soma, resolucoes, soma_uteis in conteudo.get('tickets', []):
+            self._tickets.setdefault(dia, {})[(status, prioridade)] = [tickets, soma, resolucoes, soma_uteis]
+        for dia, status, prioridade, dispositivo, quantidade in conteudo.get('dispositivos', []):
+            self._dispositivos.setdefault(dia, {})[(status, prioridade, dispositivo)] = quantidade
+        for dia, dimensao, valor, estado in conteudo.get('resolucao', []):
+            self._resolucao.setdefault(dia, {})[(dimensao, valor)] = TDigest.de_lista(estado)
+        for dia, dimensao, valor, estado in conteudo.get('resolucao_uteis', []):
+            self._resolucao_uteis.setdefault(dia, {})[(dimensao, valor)] = TDigest.de_lista(estado)
+        for dia, dimensao, valor, estado in conteudo.get('solicitantes', []):
+            self._solicitantes.setdefault(dia, {})[(dimensao, valor)] = HyperLogLog.de_lista(estado)
+        for dia, evento, prioridade, pares in conteudo.get('horarios_eventos', []):
+            celulas = self._horarios.setdefault(dia, {})
+            for horario, quantidade in zip(pares[::2], pares[1::2]):
+                celulas[(evento, prioridade, horario)] = quantidade
+        self._squads = dict(conteudo.get('squads', {}))
+        self._dias = sorted(set(self._tickets) | set(self._dispositivos) | set(self._horarios))
+        # Arquivos gravados antes dos sketches, do mapa de horários ou dos squads são reconstruídos
+        # ('horarios', o formato anterior, contava as conclusões no dia de criação)
+        completo = all(chave in conteudo for chave in ('resolucao', 'resolucao_uteis', 'solicitantes',
+                                                       'horarios_eventos', 'squads'))
+        self.revisao = conteudo.get('revisao') if completo else None
+    
+    def _dias_no_intervalo(self, inicio: Optional[date], fim: Optional[date]) -> List[str]:
+        """Dias com dados no intervalo (inclusivo); sem intervalo inclui os tickets sem data"""
+        if inicio is None and fim is None:
+            return list(self._dias)
+        primeiro = bisect_left(self._dias, inicio.strftime('%Y-%m-%d')) if inicio else 0
+        ultimo = bisect_right(self._dias, fim.strftime('%Y-%m-%d')) if fim else len(self._dias)
+        return [dia for dia in self._dias[primeiro:ultimo] if dia != SEM_DATA]
+    
+    def serie_diaria(self, inicio: Optional[date] = None, fim: Optional[date] = None,
+                     por: str = 'status') -> pd.DataFrame:
+        """Tickets criados por dia, separados por status ou prioridade"""
+        posicao = {'status': 0, 'prioridade': 1}[por]
+        linhas = []
+        with self._lock:
+            for dia in self._dias_no_intervalo(inicio, fim):
+                if dia == SEM_DATA:
+                    continue
+                por_grupo = Counter()
+                for chave, celula in self._tickets.get(dia, {}).items():
+                    por_grupo[chave[posicao]] += celula[0]
+                data = datetime.strptime(dia, '%Y-%m-%d').date()
+                linhas.extend((data, grupo, quantidade) for grupo, quantidade in sorted(por_grupo.items()))
+        return pd.DataFrame(linhas, columns=['data_criacao', por, 'count'])
+    
+    def contar_dispositivos(self, inicio: Optional[date] = None, fim: Optional[date] = None) -> pd.Series:
+        """Pedidos por dispositivo no intervalo, do mais para o menos solicitado"""
+        contagem = Counter()
+        with self._lock:
+            for dia in self._dias_no_intervalo(inicio, fim):
+                for (_, _, dispositivo), quantidade in self._dispositivos.get(dia, {}).items():
+                    contagem[dispositivo] += quantidade
+        return pd.Series(dict(contagem.most_common()), dtype=int)
+    
+    def mapa_horarios(self, inicio: Optional[date] = None, fim: Optional[date] = None, evento: str = 'chegada',
+                      prioridades: Optional[List[str]] = None) -> pd.DataFrame:
+        """Mapa de calor dia da semana × hora das chegadas ou conclusões no intervalo (sem ler os tickets)"""
+        contagens = Counter()
+        with self._lock:
+            for dia in self._dias_no_intervalo(inicio, fim):
+                contagens.update(self._horarios.get(dia, {}))
+        return mapa_horarios(contagens.items(), evento, prioridades)
+    
+    def totais(self) -> Tuple[int, Optional[str], Optional[str]]:
+        """Total de tickets e o primeiro e o último dia de criação, sem ler a fila"""
+        with self._lock:
+            total = sum(celula[0] for celulas in self._tickets.values() for celula in celulas.values())
+            # Dias só com conclusões (ou cujos tickets saíram) não contam
+            dias = [dia for dia in self._dias if dia != SEM_DATA and self._tickets.get(dia)]
+            return total, (dias[0] if dias else None), (dias[-1] if dias else None)
+    
+    def dia_inicial_recentes(self, n: int) -> Optional[str]:
+        """Dia a partir do qual há pelo menos ``n`` tickets criados (None se o total não chega a n)"""
+        with self._lock:
+            total = 0
+            for dia in reversed(self._dias):
+                if dia == SEM_DATA:
+                    continue
+                total += sum(celula[0] for celula in self._tickets.get(dia, {}).values())
+                if total >= n:
+                    return dia
+            return None
+    
+    def squad_leaders(self) -> List[str]:
+        """Squad leaders com pelo menos um ticket nos dados"""
+        with self._lock:
+            return sorted(self._squads)
+    
+    def agregados(self, data_limite: Optional[datetime] = None, inicio: Optional[date] = None,
+                  fim: Optional[date] = None) -> AgregadosRelatorio:
+        """Agregados do relatório (resumo, dispositivos e timeline) lidos do rollup"""
+        data_limite = inicio_dia_timeline(data_limite)
+        agregados = AgregadosRelatorio(data_limite=data_limite)
+        por_status = Counter()
+        digests = defaultdict(list)
+        digests_uteis = defaultdict(list)
+        sketches = defaultdict(list)
+        horarios = Counter()
+        with self._lock:
+            for dia in self._dias_no_intervalo(inicio, fim):
+                horarios.update(self._horarios.get(dia, {}))
+                for (status, _), (tickets, soma, resolucoes, soma_uteis) in self._tickets.get(dia, {}).items():
+                    por_status[status] += tickets
+                    agregados.soma_resolucao_horas += soma
+                    agregados.qtd_resolucoes += resolucoes
+                    agregados.soma_resolucao_horas_uteis += soma_uteis
+                for chave, digest in self._resolucao.get(dia, {}).items():
+                    digests[chave].append(digest)
+                for chave, digest in self._resolucao_uteis.get(dia, {}).items():
+                    digests_uteis[chave].append(digest)
+                for chave, sketch in self._solicitantes.get(dia, {}).items():
+                    sketches[chave].append(sketch)
+            # Percentis do período: mescla dos digests diários
+            agregados.resolucao = {chave: TDigest.combinar(lista) for chave, lista in digests.items()}
+            agregados.resolucao_uteis = {chave: TDigest.combinar(lista) for chave, lista in digests_uteis.items()}
+            agregados.solicitantes = {chave: HyperLogLog.combinar(lista) for chave, lista in sketches.items()}
+            # A timeline conta dias inteiros a partir da data limite, como o snapshot e o DuckDB
+            timeline = self.serie_diaria(max(data_limite.date(), inicio) if inicio else data_limite.date(), fim)
+        agregados.por_status = dict(por_status)
+        agregados.total_tickets = sum(por_status.values())
+        agregados.dispositivos = self.contar_dispositivos(inicio, fim).to_dict()
+        agregados.timeline = {(d, s): int(n) for d, s, n in timeline.itertuples(index=False)}
+        agregados.horarios = dict(horarios)
+        return agregados
@@ -0,0 +1,202 @@
+"""
+Módulo de escalonamento da fila de suporte por prioridade com envelhecimento
+"""
+import heapq
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, List, Optional
+
+class _Fenwick:
+    """Árvore de Fenwick que cresce por append (contagem de tickets ativos)"""
+    
+    def __init__(self):
+        self.arvore = [0]
+    
+    def append(self, valor: int):
+        """Acrescenta uma posição ao final em O(log n)"""
+        i = len(self.arvore)
+        inicio = i - (i & -i)
+        self.arvore.append(self.prefixo(i - 1) - self.prefixo(inicio) + valor)
+    
+    def adicionar(self, indice: int, delta: int):
+        """Soma delta na posição indice (base 0)"""
+        i = indice + 1
+        while i < len(self.arvore):
+            self.arvore[i] += delta
+            i += i & -i
+    
+    def prefixo(self, n: int) -> int:
+        """Soma das n primeiras posições"""
+        total = 0
+        while n > 0:
+            total += self.arvore[n]
+            n -= n & -n
+        return total
+
+class _ClassePrioridade:
+    """Tickets de uma prioridade em ordem de criação"""
+    
+    def __init__(self):
+        self.criacao: List[float] = []
+        self.ids: List[str] = []
+        self.ativos = _Fenwick()
+    
+    def inserir(self, ticket_id: str, criacao: float) -> int:
+        self.criacao.append(criacao)
+        self.ids.append(ticket_id)
+        self.ativos.append(1)
+        return len(self.ids) - 1
+    
+    def contar_antes(self, limite: float, inclusive: bool = False) -> int:
+        """Quantidade de tickets ativos criados antes do limite"""
+        corte = bisect_right(self.criacao, limite) if inclusive else bisect_left(self.criacao, limite)
+        return self.ativos.prefixo(corte)
+
+class EscalonadorFila:
+    """Fila de prioridade com envelhecimento (aging)
+    
+    Cada ticket recebe um prazo virtual: data de criação + atraso da sua
+    prioridade em ``envelhecimento_horas``. Com {'Urgente': 0, 'Normal': 24}
+    um ticket Normal que espera 24h passa à frente de um Urgente recém-criado,
+    evitando que prioridades baixas fiquem paradas indefinidamente. O prazo é
+    fixo para cada ticket, então remoção, próximo ticket, posição e a inserção
+    de tickets novos (criação mais recente que a da classe) custam O(log n)
+    amortizado. Um ticket com criação anterior à do último da classe (ex.:
+    reaberto) reconstrói a classe, em O(n). Entradas obsoletas do heap são
+    descartadas ao chegar ao topo e o heap é compactado quando elas passam
+    de ``FRACAO_OBSOLETOS`` das entradas.
+    """
+    
+    FRACAO_OBSOLETOS = 0.5
+    
+    def __init__(self, envelhecimento_horas: Optional[Dict[str, float]] = None,
+                 prioridade_padrao: str = 'Normal'):
+        self.envelhecimento_horas = dict(envelhecimento_horas or {'Urgente': 0, 'Alta': 4, 'Normal': 24})
+        self.prioridade_padrao = prioridade_padrao
+        # Classes em ordem de atraso: em caso de empate a mais urgente vem antes
+        ordem_classes = sorted(self.envelhecimento_horas, key=lambda p: self.envelhecimento_horas[p])
+        self._ordem_classes = {prioridade: i for i, prioridade in enumerate(ordem_classes)}
+        self._classes: Dict[str, _ClassePrioridade] = {}
+        self._tickets: Dict[str, tuple] = {}
+        self._heap: List[tuple] = []
+        self._sequencia = 0
+    
+    def __len__(self) -> int:
+        return len(self._tickets)
+    
+    def __contains__(self, ticket_id: str) -> bool:
+        return ticket_id in self._tickets
+    
+    def _atraso(self, classe_nome: str) -> float:
+        return self.envelhecimento_horas.get(classe_nome, 0) * 3600
+    
+    def _classe(self, prioridade: str) -> str:
+        """Prioridades desconhecidas são tratadas como a prioridade padrão"""
+        return prioridade if prioridade in self.envelhecimento_horas else self.prioridade_padrao
+    
+    def inserir(self, ticket_id: str, prioridade: str, data_criacao: datetime):
+        """Adiciona um ticket pendente ao escalonador"""
+        if ticket_id in self._tickets:
+            self.remover(ticket_id)
+        
+        classe_nome = self._classe(prioridade)
+        classe = self._classes.setdefault(classe_nome, _ClassePrioridade())
+        criacao = data_criacao.timestamp()
+        
+        if classe.criacao and criacao < classe.criacao[-1]:
+            # Inserção fora de ordem (ticket reaberto): reconstrói a classe
+            self._reconstruir_classe(classe_nome, extra=(ticket_id, criacao))
+        else:
+            indice = classe.inserir(ticket_id, criacao)
+            self._tickets[ticket_id] = (classe_nome, indice, criacao + self._atraso(classe_nome))
+        
+        self._sequencia += 1
+        prazo = self._tickets[ticket_id][2]
+        heapq.heappush(self._heap, (prazo, self._ordem_classes.get(classe_nome, 0), self._sequencia, ticket_id))
+        self._compactar_heap()
+    
+    def _entradas_validas(self) -> List[tuple]:
+        """Entrada atual do heap de cada ticket (a de inserção mais recente com o prazo vigente)"""
+        validas = {}
+        for entrada in self._heap:
+            info = self._tickets.get(entrada[3])
+            if info is not None and info[2] == entrada[0]:
+                atual = validas.get(entrada[3])
+                if atual is None or entrada[2] > atual[2]:
+                    validas[entrada[3]] = entrada
+        return list(validas.values())
+    
+    def _compactar_heap(self):
+        """Refaz o heap só com as entradas válidas se as obsoletas passarem do limite"""
+        obsoletas = len(self._heap) - len(self._tickets)
+        if len(self._heap) <= 64 or obsoletas <= self.FRACAO_OBSOLETOS * len(self._heap):
+            return
+        self._heap = self._entradas_validas()
+        heapq.heapify(self._heap)
+    
+    def _reconstruir_classe(self, classe_nome: str, extra: Optional[tuple] = None):
+        """Recria a classe só com os tickets ativos, em ordem de criação"""
+        antiga = self._classes[classe_nome]
+        ativos = [(c, t) for i, (c, t) in enumerate(zip(antiga.criacao, antiga.ids))
+                  if self._tickets.get(t, (None, None))[:2] == (classe_nome, i)]
+        if extra is not None:
+            ativos.append((extra[1], extra[0]))
+        # Ordenação estável: criações iguais mantêm a ordem de inserção, como no heap
+        ativos.sort(key=lambda ativo: ativo[0])
+        
+        nova = _ClassePrioridade()
+        atraso = self._atraso(classe_nome)
+        for criacao, ticket_id in ativos:
+            indice = nova.inserir(ticket_id, criacao)
+            self._tickets[ticket_id] = (classe_nome, indice, criacao + atraso)
+        self._classes[classe_nome] = nova
+    
+    def remover(self, ticket_id: str) -> bool:
+        """Remove um ticket (concluído, em andamento...) do escalonador"""
+        info = self._tickets.pop(ticket_id, None)
+        if info is None:
+            return False
+        classe_nome, indice, _ = info
+        classe = self._classes[classe_nome]
+        classe.ativos.adicionar(indice, -1)
+        # Compacta a classe quando a maior parte das entradas já saiu da fila
+        if len(classe.ids) > 64 and classe.ativos.prefixo(len(classe.ids)) * 2 < len(classe.ids):
+            self._reconstruir_classe(classe_nome)
+        # A entrada no heap é descartada de forma preguiçosa em proximo() ou na compactação
+        self._compactar_heap()
+        return True
+    
+    def proximo(self) -> Optional[str]:
+        """Retorna o próximo ticket a ser atendido sem removê-lo"""
+        while self._heap:
+            prazo, _, _, ticket_id = self._heap[0]
+            info = self._tickets.get(ticket_id)
+            if info is not None and info[2] == prazo:
+                return ticket_id
+            heapq.heappop(self._heap)
+        return None
+    
+    def posicao(self, ticket_id: str) -> int:
+        """Posição do ticket na ordem de atendimento (1 = próximo), ou -1"""
+        info = self._tickets.get(ticket_id)
+        if info is None:
+            return -1
+        classe_nome, indice, prazo = info
+        posicao = 1 + self._classes[classe_nome].ativos.prefixo(indice)
+        
+        ordem_propria = self._ordem_classes.get(classe_nome, 0)
+        for nome, classe in self._classes.items():
+            if nome == classe_nome:
+                continue
+            # Empates de prazo favorecem a classe mais urgente
+            inclusive = self._ordem_classes.get(nome, 0) < ordem_propria
+            posicao += classe.contar_antes(prazo - self._atraso(nome), inclusive=inclusive)
+        return posicao
+    
+    def ordem_atendimento(self) -> List[str]:
+        """Lista completa de tickets na ordem de atendimento
+        
+        Ordena as entradas válidas do heap por (prazo, classe, sequência), em
+        O(n log n), sem consultar a posição de cada ticket.
+        """
+        return [entrada[3] for entrada in sorted(self._entradas_validas())]
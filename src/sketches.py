@@ -0,0 +1,222 @@
+"""
+Sketches mescláveis para métricas aproximadas (t-digest para percentis e
+HyperLogLog para contagens de distintos)
+"""
+import base64
+import math
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+class TDigest:
+    """t-digest (variante com mescla) para percentis aproximados
+    
+    Guarda centróides (média, peso) com resolução maior nas caudas, onde
+    ficam p90/p99. Dois digests podem ser combinados sem perder precisão
+    além da compressão, então os percentis de um período saem da mescla dos
+    digests de cada dia, sem ordenar as linhas originais.
+    """
+    
+    def __init__(self, compressao: float = 200):
+        self.compressao = compressao
+        self._medias = np.empty(0)
+        self._pesos = np.empty(0)
+        self._buffer: List[float] = []
+        self.total = 0.0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+    
+    def __len__(self) -> int:
+        return int(self.total)
+    
+    @classmethod
+    def de_valores(cls, valores: Iterable[float], compressao: float = 200) -> 'TDigest':
+        """Digest de um conjunto de valores (construção vetorizada)"""
+        digest = cls(compressao)
+        valores = np.asarray(valores, dtype=float)
+        valores = valores[~np.isnan(valores)]
+        if len(valores):
+            digest._medias = valores
+            digest._pesos = np.ones(len(valores))
+            digest.total = float(len(valores))
+            digest.minimo = float(valores.min())
+            digest.maximo = float(valores.max())
+            digest._compactar()
+        return digest
+    
+    @classmethod
+    def combinar(cls, digests: Iterable['TDigest'], compressao: Optional[float] = None) -> 'TDigest':
+        """Mescla vários digests em um novo (os originais não são alterados)"""
+        digests = [digest for digest in digests if digest.total]
+        resultado = cls(compressao or (digests[0].compressao if digests else 200))
+        if not digests:
+            return resultado
+        for digest in digests:
+            digest._compactar()
+        resultado._medias = np.concatenate([digest._medias for digest in digests])
+        resultado._pesos = np.concatenate([digest._pesos for digest in digests])
+        resultado.total = sum(digest.total for digest in digests)
+        resultado.minimo = min(digest.minimo for digest in digests)
+        resultado.maximo = max(digest.maximo for digest in digests)
+        resultado._compactar()
+        return resultado
+    
+    def mesclar(self, outro: 'TDigest') -> 'TDigest':
+        return TDigest.combinar([self, outro], self.compressao)
+    
+    def adicionar(self, valor: float):
+        """Acrescenta uma observação (os centróides são recalculados em lote)"""
+        self._buffer.append(valor)
+        self.total += 1
+        self.minimo = min(self.minimo, valor)
+        self.maximo = max(self.maximo, valor)
+        if len(self._buffer) >= 5 * self.compressao:
+            self._compactar()
+    
+    def _compactar(self):
+        """Agrupa os centróides ordenados em faixas de tamanho 1 na escala k1
+        
+        k(q) = compressao / 2π · asin(2q - 1) cresce rápido perto de q = 0 e
+        q = 1, então as caudas ficam com centróides pequenos (ou unitários) e
+        o centro com centróides grandes. O agrupamento é vetorizado.
+        """
+        if self._buffer:
+            self._medias = np.concatenate([self._medias, self._buffer])
+            self._pesos = np.concatenate([self._pesos, np.ones(len(self._buffer))])
+            self._buffer = []
+        if len(self._medias) <= 1:
+            return
+        
+        ordem = np.argsort(self._medias, kind='mergesort')
+        medias = self._medias[ordem]
+        pesos = self._pesos[ordem]
+        anteriores = np.cumsum(pesos) - pesos
+        k = self.compressao / (2 * np.pi) * np.arcsin(np.clip(2 * anteriores / self.total - 1, -1, 1))
+        faixas = np.floor(k)
+        inicios = np.flatnonzero(np.concatenate([[True], faixas[1:] != faixas[:-1]]))
+        self._pesos = np.add.reduceat(pesos, inicios)
+        self._medias = np.add.reduceat(medias * pesos, inicios) / self._pesos
+    
+    def quantil(self, q: float) -> float:
+        """Valor aproximado do quantil ``q`` (0 a 1); NaN se vazio"""
+        self._compactar()
+        if self.total == 0:
+            return math.nan
+        if len(self._medias) == 1:
+            return float(self._medias[0])
+        centros = np.cumsum(self._pesos) - self._pesos / 2
+        posicoes = np.concatenate([[0.0], centros, [self.total]])
+        valores = np.concatenate([[self.minimo], self._medias, [self.maximo]])
+        return float(np.interp(q * self.total, posicoes, valores))
+    
+    def para_lista(self) -> list:
+        """Estado serializável em JSON (centróides em base64)"""
+        self._compactar()
+        return [self.minimo, self.maximo,
+                base64.b64encode(self._medias.astype('<f8').tobytes()).decode('ascii'),
+                base64.b64encode(self._pesos.astype('<f8').tobytes()).decode('ascii')]
+    
+    @classmethod
+    def de_lista(cls, estado: list, compressao: float = 200) -> 'TDigest':
+        digest = cls(compressao)
+        digest.minimo, digest.maximo = estado[0], estado[1]
+        digest._medias = np.frombuffer(base64.b64decode(estado[2]), dtype='<f8').astype(float)
+        digest._pesos = np.frombuffer(base64.b64decode(estado[3]), dtype='<f8').astype(float)
+        digest.total = float(digest._pesos.sum())
+        return digest
+
+def _comprimento_bits(valores: np.ndarray) -> np.ndarray:
+    """``int.bit_length`` vetorizado para uint64"""
+    valores = valores.copy()
+    bits = np.zeros(len(valores), dtype=np.int64)
+    for deslocamento in (32, 16, 8, 4, 2, 1):
+        altos = valores >= (np.uint64(1) << np.uint64(deslocamento))
+        bits[altos] += deslocamento
+        valores[altos] >>= np.uint64(deslocamento)
+    return bits + (valores > 0)
+
+class HyperLogLog:
+    """HyperLogLog para contar valores distintos com memória fixa
+    
+    ``2 ** precisao`` registradores de um byte (4 KB com a precisão padrão,
+    erro típico de 1,6%). A mescla é o máximo registrador a registrador, então
+    o total de distintos de um período ou de um squad sai da mescla dos
+    sketches diários. ``total`` conta os itens adicionados (com repetições).
+    """
+    
+    def __init__(self, precisao: int = 12):
+        self.precisao = precisao
+        self.registradores = np.zeros(1 << precisao, dtype=np.uint8)
+        self.total = 0
+    
+    def __len__(self) -> int:
+        return self.estimativa()
+    
+    @staticmethod
+    def hashes(valores: Iterable) -> np.ndarray:
+        """Hash de 64 bits estável entre processos (o ``hash`` do Python não é)"""
+        return pd.util.hash_array(np.asarray(list(valores), dtype=object))
+    
+    @classmethod
+    def de_hashes(cls, hashes: np.ndarray, precisao: int = 12) -> 'HyperLogLog':
+        sketch = cls(precisao)
+        sketch.adicionar_hashes(hashes)
+        return sketch
+    
+    @classmethod
+    def de_valores(cls, valores: Iterable, precisao: int = 12) -> 'HyperLogLog':
+        return cls.de_hashes(cls.hashes(valores), precisao)
+    
+    def adicionar_hashes(self, hashes: np.ndarray):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if not len(hashes):
+            return
+        restantes = np.uint64(64 - self.precisao)
+        indices = (hashes >> restantes).astype(np.intp)
+        resto = hashes & ((np.uint64(1) << restantes) - np.uint64(1))
+        # Posição do primeiro bit 1 nos bits restantes
+        posicoes = (int(restantes) - _comprimento_bits(resto) + 1).astype(np.uint8)
+        np.maximum.at(self.registradores, indices, posicoes)
+        self.total += len(hashes)
+    
+    def adicionar(self, valor):
+        self.adicionar_hashes(self.hashes([valor]))
+    
+    @classmethod
+    def combinar(cls, sketches: Iterable['HyperLogLog']) -> 'HyperLogLog':
+        """Mescla vários sketches em um novo (os originais não são alterados)"""
+        sketches = list(sketches)
+        resultado = cls(sketches[0].precisao if sketches else 12)
+        for sketch in sketches:
+            np.maximum(resultado.registradores, sketch.registradores, out=resultado.registradores)
+            resultado.total += sketch.total
+        return resultado
+    
+    def mesclar(self, outro: 'HyperLogLog') -> 'HyperLogLog':
+        return HyperLogLog.combinar([self, outro])
+    
+    def estimativa(self) -> int:
+        """Quantidade aproximada de valores distintos"""
+        m = len(self.registradores)
+        alfa = 0.7213 / (1 + 1.079 / m)
+        estimativa = alfa * m * m / np.sum(np.ldexp(1.0, -self.registradores.astype(np.int64)))
+        vazios = int(np.count_nonzero(self.registradores == 0))
+        # Correção para cardinalidades pequenas (contagem linear)
+        if estimativa <= 2.5 * m and vazios:
+            estimativa = m * math.log(m / vazios)
+        return int(round(estimativa))
+    
+    def para_lista(self) -> list:
+        """Estado serializável em JSON (só os registradores preenchidos, em base64)"""
+        indices = np.flatnonzero(self.registradores).astype('<u2')
+        return [self.total, base64.b64encode(indices.tobytes()).decode('ascii'),
+                base64.b64encode(self.registradores[indices].tobytes()).decode('ascii')]
+    
+    @classmethod
+    def de_lista(cls, estado: list, precisao: int = 12) -> 'HyperLogLog':
+        sketch = cls(precisao)
+        sketch.total = estado[0]
+        indices = np.frombuffer(base64.b64decode(estado[1]), dtype='<u2').astype(np.intp)
+        sketch.registradores[indices] = np.frombuffer(base64.b64decode(estado[2]), dtype=np.uint8)
+        return sketch
@@ -0,0 +1,154 @@
+"""
+Calendário comercial e horas úteis (SLA) calculadas de forma vetorizada
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Feriados nacionais de data fixa (mês, dia)
+FERIADOS_FIXOS = {
+    (1, 1): 'Confraternização Universal',
+    (4, 21): 'Tiradentes',
+    (5, 1): 'Dia do Trabalho',
+    (9, 7): 'Independência do Brasil',
+    (10, 12): 'Nossa Senhora Aparecida',
+    (11, 2): 'Finados',
+    (11, 15): 'Proclamação da República',
+    (12, 25): 'Natal'
+}
+
+# Feriados móveis em dias a partir do domingo de Páscoa
+FERIADOS_MOVEIS = {-2: 'Sexta-feira Santa'}
+
+# Pontos facultativos nacionais (em geral sem expediente), também relativos à Páscoa
+PONTOS_FACULTATIVOS = {-48: 'Carnaval', -47: 'Carnaval', 60: 'Corpus Christi'}
+
+def pascoa(ano: int) -> date:
+    """Domingo de Páscoa no calendário gregoriano (algoritmo de Meeus/Jones/Butcher)"""
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    mes = (h + l - 7 * m + 90) // 25
+    dia = (h + l - 7 * m + 33 * mes + 19) % 32
+    return date(ano, mes, dia)
+
+def feriados_nacionais(ano: int, pontos_facultativos: bool = True) -> Dict[date, str]:
+    """Feriados nacionais do ano (e os pontos facultativos de Carnaval e Corpus Christi)"""
+    feriados = {date(ano, mes, dia): nome for (mes, dia), nome in FERIADOS_FIXOS.items()}
+    # Feriado nacional desde a Lei 14.759/2023
+    if ano >= 2024:
+        feriados[date(ano, 11, 20)] = 'Dia Nacional de Zumbi e da Consciência Negra'
+    domingo = pascoa(ano)
+    moveis = {**FERIADOS_MOVEIS, **(PONTOS_FACULTATIVOS if pontos_facultativos else {})}
+    feriados.update({domingo + timedelta(days=dias): nome for dias, nome in moveis.items()})
+    return feriados
+
+def _hora(texto: str) -> float:
+    """'HH:MM' em horas (ex.: '08:30' = 8.5)"""
+    horas, _, minutos = texto.strip().partition(':')
+    return int(horas) + int(minutos or 0) / 60
+
+@dataclass(frozen=True)
+class CalendarioUteis:
+    """Expediente, dias úteis da semana e feriados contados no SLA
+    
+    ``dias_semana`` segue o ``weekmask`` do NumPy (segunda a domingo, 1 =
+    dia útil). Os feriados nacionais são gerados para os anos presentes em
+    cada cálculo; ``feriados_empresa`` acrescenta as datas próprias da empresa.
+    """
+    inicio_expediente: float = 9.0
+    fim_expediente: float = 18.0
+    dias_semana: str = '1111100'
+    feriados_nacionais: bool = True
+    pontos_facultativos: bool = True
+    feriados_empresa: Tuple[date, ...] = ()
+    
+    def __post_init__(self):
+        if not 0 <= self.inicio_expediente < self.fim_expediente <= 24:
+            raise ValueError(f"Expediente inválido: {self.inicio_expediente}h às {self.fim_expediente}h")
+        if len(self.dias_semana) != 7 or set(self.dias_semana) - {'0', '1'} or '1' not in self.dias_semana:
+            raise ValueError(f"Dias úteis inválidos: {self.dias_semana}")
+    
+    @classmethod
+    def de_texto(cls, expediente: str = '09:00-18:00', dias_semana: str = '1111100', feriados_empresa: str = '',
+                 pontos_facultativos: bool = True) -> 'CalendarioUteis':
+        """Calendário a partir da configuração ('HH:MM-HH:MM' e datas ISO separadas por vírgula)"""
+        inicio, _, fim = expediente.partition('-')
+        try:
+            feriados = tuple(sorted(date.fromisoformat(dia.strip()) for dia in feriados_empresa.split(',') if dia.strip()))
+            return cls(_hora(inicio), _hora(fim), dias_semana, pontos_facultativos=pontos_facultativos,
+                       feriados_empresa=feriados)
+        except ValueError as e:
+            raise ValueError(f"Calendário de SLA inválido: {e}") from e
+    
+    @property
+    def horas_por_dia(self) -> float:
+        return self.fim_expediente - self.inicio_expediente
+    
+    def parametros(self) -> Dict:
+        """Identificação do calendário (entra nas chaves de cache e no rollup gravado)"""
+        return {
+            'expediente': [self.inicio_expediente, self.fim_expediente],
+            'dias_semana': self.dias_semana,
+            'feriados_nacionais': self.feriados_nacionais,
+            'pontos_facultativos': self.pontos_facultativos,
+            'feriados_empresa': [dia.isoformat() for dia in self.feriados_empresa]
+        }
+    
+    def feriados(self, anos: Iterable[int]) -> Dict[date, str]:
+        """Feriados (nacionais e da empresa) dos anos pedidos"""
+        anos = set(anos)
+        feriados = {}
+        if self.feriados_nacionais:
+            for ano in sorted(anos):
+                feriados.update(feriados_nacionais(ano, self.pontos_facultativos))
+        feriados.update({dia: 'Feriado da empresa' for dia in self.feriados_empresa if dia.year in anos})
+        return dict(sorted(feriados.items()))
+    
+    def horas_uteis(self, inicio, fim) -> np.ndarray:
+        """Horas de expediente entre cada par (inicio, fim); NaN se faltar uma das datas
+        
+        As horas úteis decorridas até um instante são os dias úteis inteiros
+        anteriores vezes a jornada mais a parte do expediente já cumprida no
+        dia. A diferença entre fim e início usa ``np.busday_count`` para os
+        dias inteiros e só aritmética de arrays para as frações, sem laço por
+        ticket. Uma conclusão anterior à criação dá horas negativas, como no
+        tempo corrido.
+        """
+        inicio = np.asarray(pd.to_datetime(inicio, errors='coerce'), dtype='datetime64[ns]').ravel()
+        fim = np.asarray(pd.to_datetime(fim, errors='coerce'), dtype='datetime64[ns]').ravel()
+        horas = np.full(len(inicio), np.nan)
+        validos = ~(np.isnat(inicio) | np.isnat(fim))
+        if not validos.any():
+            return horas
+        
+        inicio, fim = inicio[validos], fim[validos]
+        dia_inicio, dia_fim = inicio.astype('datetime64[D]'), fim.astype('datetime64[D]')
+        anos = np.concatenate([dia_inicio, dia_fim]).astype('datetime64[Y]').astype(int) + 1970
+        calendario = _calendario_numpy(self, int(anos.min()), int(anos.max()))
+        dias = np.busday_count(dia_inicio, dia_fim, busdaycal=calendario)
+        horas[validos] = (dias * self.horas_por_dia + self._cumpridas(fim, dia_fim, calendario)
+                          - self._cumpridas(inicio, dia_inicio, calendario))
+        return horas
+    
+    def _cumpridas(self, instantes: np.ndarray, dias: np.ndarray, calendario: np.busdaycalendar) -> np.ndarray:
+        """Horas de expediente já cumpridas no dia de cada instante (0 em dias sem expediente)"""
+        hora = (instantes - dias) / np.timedelta64(1, 'h')
+        cumpridas = np.clip(hora - self.inicio_expediente, 0, self.horas_por_dia)
+        return np.where(np.is_busday(dias, busdaycal=calendario), cumpridas, 0.0)
+
+@lru_cache(maxsize=32)
+def _calendario_numpy(calendario: CalendarioUteis, primeiro_ano: int, ultimo_ano: int) -> np.busdaycalendar:
+    """``np.busdaycalendar`` com os feriados dos anos do intervalo (reaproveitado entre chamadas)"""
+    feriados = calendario.feriados(range(primeiro_ano, ultimo_ano + 1))
+    return np.busdaycalendar(weekmask=calendario.dias_semana,
+                             holidays=np.array(list(feriados), dtype='datetime64[D]'))
@@ -0,0 +1,374 @@
+"""
+Módulo de armazenamento da fila de suporte (CSV local ou SQLite compartilhado)
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterator, List, Optional, Set, Tuple
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: o lock entre processos não está disponível
+    fcntl = None
+
+COLUNAS_FILA = [
+    'id', 'data_criacao', 'data_solicitacao', 'nome', 'email',
+    'telefone', 'squad_leader', 'dispositivos', 'necessidade',
+    'status', 'prioridade', 'data_conclusao', 'observacoes'
+]
+
+TABELAS = ('fila', 'espera')
+
+@dataclass(frozen=True)
+class Predicado:
+    """Restrições empurradas para o armazenamento na leitura em blocos
+    
+    ``inicio`` e ``fim`` limitam ``data_criacao`` ao intervalo [inicio, fim)
+    comparando o texto gravado ('AAAA-MM-DD HH:MM:SS', ordenável); ``valores``
+    são pares (coluna, valores aceitos).
+    """
+    inicio: Optional[str] = None
+    fim: Optional[str] = None
+    valores: Tuple[Tuple[str, Tuple[str, ...]], ...] = ()
+    
+    def mascara(self, bloco: pd.DataFrame) -> pd.Series:
+        """Linhas de um bloco lido como texto que atendem ao predicado"""
+        mascara = pd.Series(True, index=bloco.index)
+        if self.inicio:
+            mascara &= bloco['data_criacao'].fillna('') >= self.inicio
+        if self.fim:
+            mascara &= bloco['data_criacao'].fillna('') < self.fim
+        for coluna, aceitos in self.valores:
+            mascara &= bloco[coluna].isin(aceitos)
+        return mascara
+    
+    def sql(self) -> Tuple[str, List[str]]:
+        """Cláusula WHERE (sem a palavra-chave) e parâmetros equivalentes"""
+        condicoes, parametros = [], []
+        if self.inicio:
+            condicoes.append("data_criacao >= ?")
+            parametros.append(self.inicio)
+        if self.fim:
+            condicoes.append("data_criacao < ?")
+            parametros.append(self.fim)
+        for coluna, aceitos in self.valores:
+            if coluna not in COLUNAS_FILA:
+                raise ValueError(f"Coluna inválida: {coluna}")
+            condicoes.append(f"{coluna} IN ({', '.join('?' for _ in aceitos)})")
+            parametros.extend(aceitos)
+        return ' AND '.join(condicoes) or '1', parametros
+
+class CSVStorage:
+    """Armazenamento em arquivos CSV (modo de uma única réplica)"""
+    
+    def __init__(self, fila_file: str, lista_espera_file: Optional[str] = None):
+        self.fila_file = fila_file
+        self.lista_espera_file = lista_espera_file or os.path.join(
+            os.path.dirname(fila_file), 'fila_espera.csv'
+        )
+        self._lock = threading.RLock()
+        self._lock_file = None
+        self._profundidade = 0
+        
+        data_dir = os.path.dirname(self.fila_file)
+        if data_dir and not os.path.exists(data_dir):
+            os.makedirs(data_dir)
+        if not os.path.exists(self.fila_file):
+            pd.DataFrame(columns=COLUNAS_FILA).to_csv(self.fila_file, index=False)
+    
+    def _arquivo(self, tabela: str) -> str:
+        return self.fila_file if tabela == 'fila' else self.lista_espera_file
+    
+    def versao(self) -> Hashable:
+        """Versão dos dados: mtime e tamanho dos arquivos"""
+        assinatura = []
+        for arquivo in (self.fila_file, self.lista_espera_file):
+            try:
+                st = os.stat(arquivo)
+                assinatura.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                assinatura.append(None)
+        return tuple(assinatura)
+    
+    def revisao(self) -> Hashable:
+        """Revisão persistente dos dados (igual à versão: mtime e tamanho dos arquivos)"""
+        return self.versao()
+    
+    @contextmanager
+    def transacao(self):
+        """Seção exclusiva para leitura-modificação-escrita (lock de arquivo entre processos)"""
+        with self._lock:
+            if self._profundidade == 0 and fcntl is not None:
+                self._lock_file = open(self.fila_file + '.lock', 'w')
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._profundidade += 1
+            try:
+                yield
+            finally:
+                self._profundidade -= 1
+                if self._profundidade == 0 and self._lock_file is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+    
+    def ler(self, tabela: str = 'fila') -> pd.DataFrame:
+        """Lê todos os registros de uma tabela
+        
+        O ID é lido como texto: IDs hexadecimais como "00596355" ou "44225E26"
+        seriam convertidos em número pelo pandas.
+        """
+        arquivo = self._arquivo(tabela)
+        if not os.path.exists(arquivo):
+            return pd.DataFrame(columns=COLUNAS_FILA)
+        return pd.read_csv(arquivo, dtype={'id': str})
+    
+    def ler_blocos(self, tabela: str = 'fila', tamanho: int = 50000,
+                   predicado: Optional[Predicado] = None) -> Iterator[pd.DataFrame]:
+        """Lê uma tabela em blocos de até ``tamanho`` linhas, com os valores como texto
+        
+        Com ``predicado`` cada bloco é filtrado assim que lido, então só as
+        linhas selecionadas ficam em memória.
+        """
+        arquivo = self._arquivo(tabela)
+        if not os.path.exists(arquivo):
+            return
+        for bloco in pd.read_csv(arquivo, dtype=str, chunksize=tamanho):
+            if predicado is not None:
+                bloco = bloco[predicado.mascara(bloco)]
+            if not bloco.empty:
+                yield bloco
+    
+    def obter(self, ticket_id: str, tabela: str = 'fila') -> Optional[Dict]:
+        """Retorna um registro pelo ID"""
+        df = self.ler(tabela)
+        linhas = df[df['id'].astype(str) == ticket_id]
+        if linhas.empty:
+            return None
+        return linhas.iloc[0].to_dict()
+    
+    def ids(self, tabela: str = 'fila') -> Set[str]:
+        """Conjunto de IDs existentes (lê apenas a coluna id)"""
+        arquivo = self._arquivo(tabela)
+        if not os.path.exists(arquivo):
+            return set()
+        return set(pd.read_csv(arquivo, usecols=['id'], dtype=str)['id'])
+    
+    def anexar(self, linhas: List[Dict], tabela: str = 'fila'):
+        """Acrescenta registros ao final do arquivo sem reescrevê-lo"""
+        self.anexar_lote(pd.DataFrame(linhas), tabela)
+    
+    def anexar_lote(self, df: pd.DataFrame, tabela: str = 'fila'):
+        """Caminho de gravação em lote: acrescenta um DataFrame inteiro ao arquivo"""
+        arquivo = self._arquivo(tabela)
+        df_novas = df.reindex(columns=COLUNAS_FILA)
+        with self.transacao():
+            cabecalho = not os.path.exists(arquivo)
+            df_novas.to_csv(arquivo, mode='a', header=cabecalho, index=False)
+    
+    def atualizar(self, ticket_id: str, campos: Dict, tabela: str = 'fila') -> bool:
+        """Atualiza campos de um registro"""
+        with self.transacao():
+            df = self.ler(tabela)
+            mask = df['id'].astype(str) == ticket_id
+            if not mask.any():
+                return False
+            for coluna, valor in campos.items():
+                df[coluna] = df[coluna].astype(object)
+                df.loc[mask, coluna] = valor
+            df.to_csv(self._arquivo(tabela), index=False)
+            return True
+    
+    def remover(self, ids: List[str], tabela: str = 'fila'):
+        """Remove registros pelo ID"""
+        with self.transacao():
+            df = self.ler(tabela)
+            df[~df['id'].astype(str).isin(ids)].to_csv(self._arquivo(tabela), index=False)
+
+class SQLiteStorage:
+    """Armazenamento SQLite em modo WAL, compartilhável entre réplicas
+    
+    Várias instâncias do Streamlit podem apontar para o mesmo arquivo em um
+    volume compartilhado. ``versao()`` usa ``PRAGMA data_version``, que muda
+    quando outra conexão grava no banco, para que cada réplica invalide seus
+    índices em memória apenas quando houve escrita de fato.
+    """
+    
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        data_dir = os.path.dirname(db_file)
+        if data_dir and not os.path.exists(data_dir):
+            os.makedirs(data_dir)
+        
+        self._lock = threading.RLock()
+        self._profundidade = 0
+        self._escritas_locais = 0
+        self._conn = sqlite3.connect(db_file, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._criar_tabelas()
+    
+    def _criar_tabelas(self):
+        colunas = ', '.join(
+            f"{coluna} TEXT PRIMARY KEY" if coluna == 'id' else f"{coluna} TEXT" for coluna in COLUNAS_FILA
+        )
+        with self._lock:
+            for tabela in TABELAS:
+                self._conn.execute(f"CREATE TABLE IF NOT EXISTS {tabela} ({colunas})")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_fila_status ON fila (status)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_fila_criacao ON fila (data_criacao)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_fila_squad ON fila (squad_leader)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor INTEGER)")
+            self._conn.execute("INSERT OR IGNORE INTO meta (chave, valor) VALUES ('revisao', 0)")
+    
+    def versao(self) -> Hashable:
+        """Versão dos dados: data_version do SQLite + escritas desta conexão"""
+        with self._lock:
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            return (data_version, self._escritas_locais)
+    
+    def revisao(self) -> int:
+        """Revisão persistente dos dados, incrementada a cada escrita (sobrevive a reinícios)"""
+        with self._lock:
+            return self._conn.execute("SELECT valor FROM meta WHERE chave = 'revisao'").fetchone()[0]
+    
+    def _registrar_escrita(self):
+        self._conn.execute("UPDATE meta SET valor = valor + 1 WHERE chave = 'revisao'")
+        self._escritas_locais += 1
+    
+    @contextmanager
+    def transacao(self):
+        """Transação de escrita exclusiva (BEGIN IMMEDIATE) entre réplicas"""
+        with self._lock:
+            if self._profundidade == 0:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._profundidade += 1
+            try:
+                yield
+            except BaseException:
+                self._profundidade -= 1
+                if self._profundidade == 0:
+                    self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._profundidade -= 1
+                if self._profundidade == 0:
+                    self._conn.execute("COMMIT")
+    
+    @staticmethod
+    def _valor(valor):
+        """Valores vazios são gravados como NULL (equivalente ao NaN do CSV)"""
+        if valor is None or (isinstance(valor, float) and pd.isna(valor)) or valor == '':
+            return None
+        return str(valor)
+    
+    def ler(self, tabela: str = 'fila') -> pd.DataFrame:
+        """Lê todos os registros de uma tabela"""
+        with self._lock:
+            return pd.read_sql_query(f"SELECT {', '.join(COLUNAS_FILA)} FROM {tabela} ORDER BY rowid", self._conn)
+    
+    def ler_blocos(self, tabela: str = 'fila', tamanho: int = 50000,
+                   predicado: Optional[Predicado] = None) -> Iterator[pd.DataFrame]:
+        """Lê uma tabela em blocos de até ``tamanho`` linhas
+        
+        Pagina pelo rowid, então o lock da conexão é liberado entre os blocos.
+        O ``predicado`` vira cláusula WHERE: com os índices de data de criação,
+        status e squad leader só as linhas selecionadas são lidas.
+        """
+        condicao, parametros = (predicado or Predicado()).sql()
+        ultimo = -1
+        while True:
+            with self._lock:
+                bloco = pd.read_sql_query(
+                    f"SELECT rowid AS _rowid, {', '.join(COLUNAS_FILA)} FROM {tabela} "
+                    f"WHERE rowid > ? AND {condicao} ORDER BY rowid LIMIT ?",
+                    self._conn, params=[ultimo] + parametros + [tamanho]
+                )
+            if bloco.empty:
+                return
+            ultimo = int(bloco['_rowid'].iloc[-1])
+            yield bloco.drop(columns='_rowid')
+            if len(bloco) < tamanho:
+                return
+    
+    def contar(self, tabela: str = 'fila') -> int:
+        """Quantidade de registros de uma tabela"""
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+    
+    def obter(self, ticket_id: str, tabela: str = 'fila') -> Optional[Dict]:
+        """Retorna um registro pelo ID"""
+        with self._lock:
+            cursor = self._conn.execute(f"SELECT {', '.join(COLUNAS_FILA)} FROM {tabela} WHERE id = ?", (ticket_id,))
+            linha = cursor.fetchone()
+        return dict(zip(COLUNAS_FILA, linha)) if linha else None
+    
+    def ids(self, tabela: str = 'fila') -> Set[str]:
+        """Conjunto de IDs existentes"""
+        with self._lock:
+            return {linha[0] for linha in self._conn.execute(f"SELECT id FROM {tabela}")}
+    
+    def anexar(self, linhas: List[Dict], tabela: str = 'fila'):
+        """Insere registros"""
+        valores = [tuple(self._valor(linha.get(coluna)) for coluna in COLUNAS_FILA) for linha in linhas]
+        self._inserir(valores, tabela)
+    
+    def anexar_lote(self, df: pd.DataFrame, tabela: str = 'fila'):
+        """Caminho de gravação em lote: insere um DataFrame com um único executemany"""
+        df_novas = df.reindex(columns=COLUNAS_FILA).astype(object)
+        df_novas = df_novas.where(df_novas.notna() & (df_novas != ''), None)
+        valores = [tuple(None if v is None else str(v) for v in linha)
+                   for linha in df_novas.itertuples(index=False, name=None)]
+        self._inserir(valores, tabela)
+    
+    def _inserir(self, valores: List[tuple], tabela: str):
+        marcadores = ', '.join('?' for _ in COLUNAS_FILA)
+        with self.transacao():
+            self._conn.executemany(f"INSERT INTO {tabela} ({', '.join(COLUNAS_FILA)}) VALUES ({marcadores})", valores)
+            self._registrar_escrita()
+    
+    def atualizar(self, ticket_id: str, campos: Dict, tabela: str = 'fila') -> bool:
+        """Atualiza campos de um registro"""
+        atribuicoes = ', '.join(f"{coluna} = ?" for coluna in campos)
+        with self.transacao():
+            cursor = self._conn.execute(
+                f"UPDATE {tabela} SET {atribuicoes} WHERE id = ?",
+                [self._valor(valor) for valor in campos.values()] + [ticket_id]
+            )
+            self._registrar_escrita()
+            return cursor.rowcount > 0
+    
+    def remover(self, ids: List[str], tabela: str = 'fila'):
+        """Remove registros pelo ID"""
+        with self.transacao():
+            self._conn.executemany(f"DELETE FROM {tabela} WHERE id = ?", [(ticket_id,) for ticket_id in ids])
+            self._registrar_escrita()
+    
+    def importar_csv(self, csv_file: str, tabela: str = 'fila', chunksize: int = 50000) -> int:
+        """Copia um arquivo CSV existente para o banco (migração inicial)"""
+        total = 0
+        for chunk in pd.read_csv(csv_file, dtype=str, chunksize=chunksize):
+            self.anexar_lote(chunk, tabela)
+            total += len(chunk)
+        return total
+
+def criar_storage(backend: str, fila_file: str, lista_espera_file: Optional[str] = None,
+                  sqlite_file: Optional[str] = None):
+    """Cria o armazenamento configurado ('csv' ou 'sqlite')"""
+    if backend == 'csv':
+        return CSVStorage(fila_file, lista_espera_file)
+    if backend == 'sqlite':
+        storage = SQLiteStorage(sqlite_file)
+        # Na primeira execução migra os dados existentes do CSV
+        with storage.transacao():
+            if storage.contar('fila') == 0 and storage.contar('espera') == 0:
+                if os.path.exists(fila_file):
+                    storage.importar_csv(fila_file, 'fila')
+                if lista_espera_file and os.path.exists(lista_espera_file):
+                    storage.importar_csv(lista_espera_file, 'espera')
+        return storage
+    raise ValueError(f"Backend de armazenamento inválido: {backend}")
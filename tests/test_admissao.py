@@ -0,0 +1,135 @@
+"""
+Limites de admissão da fila e modos de overflow (rejeitar, espera, mesclar)
+"""
+import pandas as pd
+import pytest
+
+from database import FilaCheiaError, FilaManager
+
+def solicitacao(i, prioridade='Normal', dispositivos='Notebook'):
+    return {'nome': f"Pessoa {i}", 'email': f"pessoa{i}@mavi.com", 'squad_leader': 'Ana',
+            'dispositivos': dispositivos, 'necessidade': f"Pedido {i}", 'prioridade': prioridade}
+
+def criar(tmp_path, **kwargs):
+    return FilaManager(str(tmp_path / 'fila.csv'), **kwargs)
+
+def test_rejeitar_acima_do_limite_total(tmp_path):
+    fila = criar(tmp_path, max_fila_size=2)
+    fila.adicionar_solicitacao(solicitacao(1))
+    fila.adicionar_solicitacao(solicitacao(2))
+    assert fila.fila_cheia()
+    with pytest.raises(FilaCheiaError) as erro:
+        fila.adicionar_solicitacao(solicitacao(3))
+    assert erro.value.limite == 2
+    assert len(fila.obter_dados_completos()) == 2
+
+def test_limite_por_prioridade(tmp_path):
+    fila = criar(tmp_path, limites_por_prioridade={'Urgente': 1})
+    fila.adicionar_solicitacao(solicitacao(1, 'Urgente'))
+    with pytest.raises(FilaCheiaError) as erro:
+        fila.adicionar_solicitacao(solicitacao(2, 'Urgente'))
+    assert erro.value.prioridade == 'Urgente'
+    # Outras prioridades continuam entrando
+    fila.adicionar_solicitacao(solicitacao(3, 'Normal'))
+    assert fila.obter_situacao_fila()['pendentes_por_prioridade'] == {'Urgente': 1, 'Normal': 1}
+
+def test_concluir_libera_vaga(tmp_path):
+    fila = criar(tmp_path, max_fila_size=1)
+    ticket_id = fila.adicionar_solicitacao(solicitacao(1))
+    fila.atualizar_status(ticket_id, 'Concluída')
+    assert not fila.fila_cheia()
+    fila.adicionar_solicitacao(solicitacao(2))
+
+def test_espera_promove_por_prioridade(tmp_path):
+    fila = criar(tmp_path, max_fila_size=1, modo_overflow='espera')
+    primeiro = fila.adicionar_solicitacao(solicitacao(1))
+    normal = fila.adicionar_solicitacao(solicitacao(2, 'Normal'))
+    urgente = fila.adicionar_solicitacao(solicitacao(3, 'Urgente'))
+    assert fila.em_espera(normal) and fila.em_espera(urgente)
+    assert fila.obter_situacao_fila()['em_espera'] == 2
+    assert fila.obter_posicao_fila(normal) == -1
+    
+    # A vaga aberta vai para o Urgente, mesmo tendo chegado depois
+    fila.atualizar_status(primeiro, 'Concluída')
+    assert not fila.em_espera(urgente)
+    assert fila.obter_posicao_fila(urgente) == 1
+    assert fila.obter_posicao_espera(normal) == 1
+    
+    fila.atualizar_status(urgente, 'Em andamento')
+    assert fila.obter_proximo_ticket() == normal
+    assert fila.obter_situacao_fila()['em_espera'] == 0
+
+def test_mesclar_anexa_ao_ticket_equivalente(tmp_path):
+    fila = criar(tmp_path, max_fila_size=1, modo_overflow='mesclar')
+    existente = fila.adicionar_solicitacao(solicitacao(1, dispositivos='Monitor, Mouse'))
+    mesclado = fila.adicionar_solicitacao(solicitacao(2, dispositivos='mouse,monitor'))
+    assert mesclado == existente
+    df = fila.obter_dados_completos()
+    assert len(df) == 1
+    assert 'pessoa2@mavi.com' in df['observacoes'].iloc[0]
+    
+    # Sem ticket equivalente a solicitação é rejeitada
+    with pytest.raises(FilaCheiaError):
+        fila.adicionar_solicitacao(solicitacao(3, dispositivos='Webcam'))
+
+def test_modo_overflow_invalido(tmp_path):
+    with pytest.raises(ValueError):
+        criar(tmp_path, modo_overflow='descartar')
+
+def test_reabertura_com_fila_cheia_rejeitada(tmp_path):
+    fila = criar(tmp_path, max_fila_size=1)
+    concluido = fila.adicionar_solicitacao(solicitacao(1))
+    fila.atualizar_status(concluido, 'Concluída')
+    fila.adicionar_solicitacao(solicitacao(2))
+    with pytest.raises(FilaCheiaError):
+        fila.atualizar_status(concluido, 'Pendente')
+    assert fila.storage.obter(concluido)['status'] == 'Concluída'
+
+def test_reabertura_em_espera_mantem_a_linha_na_fila(tmp_path):
+    fila = criar(tmp_path, max_fila_size=1, modo_overflow='espera')
+    concluido = fila.adicionar_solicitacao(solicitacao(1))
+    fila.atualizar_status(concluido, 'Concluída')
+    ocupante = fila.adicionar_solicitacao(solicitacao(2))
+    
+    assert fila.atualizar_status(concluido, 'Pendente', 'Voltou a falhar') is True
+    linha = fila.storage.obter(concluido)
+    assert linha['status'] == 'Em espera'
+    assert pd.isna(linha['data_conclusao']) or linha['data_conclusao'] == ''
+    assert fila.em_espera(concluido)
+    fila.rollup.sincronizar()
+    assert fila.rollup.totais()[0] == 2
+    
+    # Reiniciar reconstrói a espera a partir da referência
+    fila = criar(tmp_path, max_fila_size=1, modo_overflow='espera')
+    assert fila.obter_posicao_espera(concluido) == 1
+    
+    fila.atualizar_status(ocupante, 'Concluída')
+    linha = fila.storage.obter(concluido)
+    assert linha['status'] == 'Pendente'
+    assert pd.isna(linha['data_conclusao']) or linha['data_conclusao'] == ''
+    assert not fila.em_espera(concluido)
+    assert fila.obter_proximo_ticket() == concluido
+    assert len(fila.storage.ler('espera')) == 0
+    assert len(fila.obter_dados_completos()) == 2
+
+def test_ticket_em_espera_concluido_sai_da_espera(tmp_path):
+    fila = criar(tmp_path, max_fila_size=1, modo_overflow='espera')
+    concluido = fila.adicionar_solicitacao(solicitacao(1))
+    fila.atualizar_status(concluido, 'Concluída')
+    ocupante = fila.adicionar_solicitacao(solicitacao(2))
+    fila.atualizar_status(concluido, 'Pendente')
+    
+    fila.atualizar_status(concluido, 'Concluída')
+    assert not fila.em_espera(concluido)
+    fila.atualizar_status(ocupante, 'Concluída')
+    assert fila.storage.obter(concluido)['status'] == 'Concluída'
+
+def test_reabertura_mesclada_retorna_o_ticket_que_a_recebeu(tmp_path):
+    fila = criar(tmp_path, max_fila_size=1, modo_overflow='mesclar')
+    concluido = fila.adicionar_solicitacao(solicitacao(1))
+    fila.atualizar_status(concluido, 'Concluída')
+    pendente = fila.adicionar_solicitacao(solicitacao(2))
+    
+    assert fila.atualizar_status(concluido, 'Pendente', 'Tela piscando') == pendente
+    assert fila.storage.obter(concluido)['status'] == 'Concluída'
+    assert f"Reabertura do ticket {concluido}" in fila.storage.obter(pendente)['observacoes']
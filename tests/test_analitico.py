@@ -0,0 +1,85 @@
+"""
+Console SQL (DuckDB): só um SELECT por vez, sem acesso a arquivos nem à configuração
+"""
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('duckdb')
+
+from analitico import CONSULTAS_SALVAS, MotorAnalitico
+from storage import COLUNAS_FILA, CSVStorage
+
+@pytest.fixture
+def motor(tmp_path):
+    storage = CSVStorage(str(tmp_path / 'fila.csv'))
+    inicio = datetime(2024, 3, 1, 9)
+    storage.anexar([{**dict.fromkeys(COLUNAS_FILA, ''), 'id': f"A{i:04d}", 'email': f"p{i % 40}@mavi.com",
+                     'data_criacao': f"{inicio + timedelta(hours=5 * i):%Y-%m-%d %H:%M:%S}",
+                     'status': ['Pendente', 'Concluída'][i % 2], 'prioridade': ['Normal', 'Urgente'][i % 3 == 0],
+                     'squad_leader': ['Ana', 'Bruno'][i % 2], 'dispositivos': 'Notebook, Mouse',
+                     'data_conclusao': f"{inicio + timedelta(hours=5 * i + 3):%Y-%m-%d %H:%M:%S}" if i % 2 else ''}
+                    for i in range(200)])
+    return MotorAnalitico(storage, str(tmp_path / 'analitico'), limite_linhas=50)
+
+@pytest.mark.parametrize('sql', [
+    "COPY tickets TO '{externo}/vazado.csv'",
+    "COPY (SELECT * FROM tickets) TO '{externo}/vazado.parquet' (FORMAT PARQUET)",
+    "ATTACH '{externo}/outro.db' AS outro",
+    "SET enable_external_access = true",
+    "SET allowed_directories = ['/']",
+    "RESET lock_configuration",
+    "CREATE TABLE copia AS SELECT * FROM tickets",
+    "INSTALL httpfs",
+    "SELECT 1; COPY tickets TO '{externo}/vazado.csv'",
+    "SELECT count(*) FROM tickets; SELECT 2",
+])
+def test_rejeita_o_que_nao_e_um_unico_select(motor, tmp_path, sql):
+    externo = tmp_path / 'externo'
+    externo.mkdir()
+    with pytest.raises(ValueError):
+        motor.consultar(sql.format(externo=externo))
+    assert list(externo.iterdir()) == []
+
+@pytest.mark.parametrize('sql', [
+    "SELECT * FROM read_csv('{fila}')",
+    "SELECT * FROM read_text('/etc/hostname')",
+    "SELECT * FROM read_parquet('{externo}/*.parquet')",
+    "SELECT * FROM tickets, (SELECT current_setting('allowed_directories'))) AS x; ATTACH 'y.db' AS y; SELECT * FROM (SELECT 1",
+])
+def test_select_nao_le_arquivos_fora_do_snapshot(motor, tmp_path, sql):
+    (tmp_path / 'externo').mkdir()
+    with pytest.raises(ValueError):
+        motor.consultar(sql.format(fila=tmp_path / 'fila.csv', externo=tmp_path / 'externo'))
+
+def test_consulta_com_limite(motor):
+    resultado, truncado = motor.consultar("SELECT status, count(*) AS n FROM tickets GROUP BY status ORDER BY status "
+                                          "-- comentário no fim")
+    assert dict(zip(resultado['status'], resultado['n'])) == {'Concluída': 100, 'Pendente': 100}
+    assert not truncado
+    
+    resultado, truncado = motor.consultar("SELECT id FROM tickets ORDER BY id;")
+    assert len(resultado) == 50 and truncado
+    assert motor.consultar("SELECT id FROM tickets", limite=500)[0]['id'].nunique() == 200
+
+def test_consulta_interrompida_pelo_tempo(motor):
+    with pytest.raises(TimeoutError):
+        motor.consultar("SELECT count(*) FROM range(1000000000) a, range(1000) b", timeout=0.5)
+
+def test_consultas_salvas(motor):
+    for nome in CONSULTAS_SALVAS:
+        resultado, _ = motor.consulta_salva(nome)
+        assert not resultado.empty, nome
+    with pytest.raises(ValueError):
+        motor.consulta_salva('inexistente')
+
+def test_snapshot_acompanha_a_revisao(motor, tmp_path):
+    primeiro = motor.snapshot()
+    assert motor.snapshot() == primeiro
+    motor.storage.anexar([{**dict.fromkeys(COLUNAS_FILA, ''), 'id': 'NOVO', 'status': 'Pendente',
+                           'data_criacao': '2024-04-01 10:00:00'}])
+    segundo = motor.snapshot()
+    assert segundo != primeiro and not os.path.exists(primeiro)
+    assert motor.consultar("SELECT count(*) AS n FROM tickets")[0]['n'].iloc[0] == 201
+    assert [nome for nome in os.listdir(tmp_path / 'analitico')] == [os.path.basename(segundo)]
@@ -0,0 +1,98 @@
+"""
+Catálogo de artefatos: retenção por tipo e por bytes e registro concorrente entre processos
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from artefatos import CatalogoArtefatos
+from report_engine import FiltroRelatorio
+from reports import ReportGenerator
+from storage import COLUNAS_FILA, CSVStorage
+
+def gravar(diretorio, nome, tamanho=10):
+    caminho = os.path.join(diretorio, nome)
+    with open(caminho, 'w') as f:
+        f.write('x' * tamanho)
+    return caminho
+
+def registrar_varios(diretorio, processo, quantidade):
+    catalogo = CatalogoArtefatos(diretorio, max_por_tipo=1000)
+    for i in range(quantidade):
+        catalogo.registrar('completo', gravar(diretorio, f"rel_{processo}_{i}.html"))
+
+def test_retencao_por_tipo(tmp_path):
+    catalogo = CatalogoArtefatos(str(tmp_path), max_por_tipo=2)
+    caminhos = [gravar(str(tmp_path), f"status_{i}.html") for i in range(3)]
+    for caminho in caminhos:
+        catalogo.registrar('grafico_status', caminho)
+    catalogo.registrar('completo', gravar(str(tmp_path), 'completo.html'))
+    
+    assert not os.path.exists(caminhos[0])
+    assert all(os.path.exists(caminho) for caminho in caminhos[1:])
+    assert [entrada['arquivo'] for entrada in catalogo.listar('grafico_status')] == caminhos[:0:-1]
+    assert len(catalogo.listar('completo')) == 1
+
+def test_reuso_renova_o_arquivo(tmp_path):
+    catalogo = CatalogoArtefatos(str(tmp_path), max_por_tipo=2)
+    primeiro, segundo = gravar(str(tmp_path), 'a.html'), gravar(str(tmp_path), 'b.html')
+    catalogo.registrar('completo', primeiro)
+    catalogo.registrar('completo', segundo)
+    # Reaproveitar o primeiro o torna o mais recente; o próximo novo descarta o segundo
+    catalogo.registrar('completo', primeiro)
+    catalogo.registrar('completo', gravar(str(tmp_path), 'c.html'))
+    assert os.path.exists(primeiro)
+    assert not os.path.exists(segundo)
+
+def test_retencao_por_bytes_e_diretorios(tmp_path):
+    catalogo = CatalogoArtefatos(str(tmp_path), max_bytes=250)
+    lote = tmp_path / 'lote_squads'
+    lote.mkdir()
+    gravar(str(lote), 'ana.html', 100)
+    gravar(str(lote), 'bruno.html', 100)
+    catalogo.registrar('lote', str(lote))
+    assert catalogo.listar()[0]['bytes'] == 200
+    
+    # O recém-registrado nunca é removido, mesmo sozinho acima do limite
+    catalogo.registrar('completo', gravar(str(tmp_path), 'grande.html', 300))
+    assert not lote.exists()
+    assert [entrada['tipo'] for entrada in catalogo.listar()] == ['completo']
+
+def test_arquivos_fora_do_catalogo_nao_sao_tocados(tmp_path):
+    avulso = gravar(str(tmp_path), 'avulso.html', 1000)
+    catalogo = CatalogoArtefatos(str(tmp_path), max_bytes=100)
+    catalogo.registrar('completo', gravar(str(tmp_path), 'novo.html'))
+    assert os.path.exists(avulso)
+
+def test_indice_compartilhado_entre_instancias(tmp_path):
+    app = CatalogoArtefatos(str(tmp_path))
+    agendador = CatalogoArtefatos(str(tmp_path))
+    agendador.registrar('diario', gravar(str(tmp_path), 'diario.html'))
+    app.registrar('completo', gravar(str(tmp_path), 'completo.html'))
+    assert {entrada['tipo'] for entrada in agendador.listar()} == {'diario', 'completo'}
+
+def test_registro_concorrente_entre_processos(tmp_path):
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(registrar_varios, [str(tmp_path)] * 4, range(4), [25] * 4))
+    # Nenhum registro se perde com os processos relendo e gravando o índice ao mesmo tempo
+    assert len(CatalogoArtefatos(str(tmp_path)).listar()) == 100
+    assert not [nome for nome in os.listdir(tmp_path) if nome.endswith('.tmp')]
+
+def test_relatorio_json_nomeado_pelas_entradas(tmp_path):
+    storage = CSVStorage(str(tmp_path / 'fila.csv'))
+    storage.anexar([{**dict.fromkeys(COLUNAS_FILA, ''), 'id': 'J1', 'data_criacao': '2024-03-04 10:00:00',
+                     'status': 'Pendente', 'prioridade': 'Normal', 'dispositivos': 'Mouse'}])
+    gerador = ReportGenerator(storage.fila_file, str(tmp_path / 'relatorios'), storage=storage, report_workers=0)
+    filtro = FiltroRelatorio(status=['Pendente'])
+    
+    caminho = gerador.gravar_json('geral', {'total_tickets': 1}, filtro)
+    assert os.path.basename(caminho).startswith('relatorio_geral_') and caminho.endswith('.json')
+    assert json.load(open(caminho, encoding='utf-8')) == {'total_tickets': 1}
+    assert [entrada['arquivo'] for entrada in gerador.catalogo.listar('json_geral')] == [caminho]
+    
+    # Mesmas entradas, mesmo arquivo; outro recorte ou outra revisão, outro arquivo
+    assert gerador.gravar_json('geral', {'total_tickets': 1}, filtro) == caminho
+    assert gerador.gravar_json('geral', {'total_tickets': 1}) != caminho
+    storage.anexar([{**dict.fromkeys(COLUNAS_FILA, ''), 'id': 'J2', 'status': 'Pendente'}])
+    assert gerador.gravar_json('geral', {'total_tickets': 2}, filtro) != caminho
+    assert len(gerador.catalogo.listar('json_geral')) == 3
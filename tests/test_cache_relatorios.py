@@ -0,0 +1,92 @@
+"""
+Cache de relatórios por revisão dos dados: chave, LRU, disco e gravação concorrente
+"""
+import os
+import threading
+
+from cache_relatorios import CacheRelatorios, gravar_atomico
+
+def test_chave_depende_da_revisao_e_dos_parametros():
+    chave = CacheRelatorios.chave(3, 'geral', {'inicio': '2024-01-01', 'fim': None})
+    assert chave == CacheRelatorios.chave(3, 'geral', {'fim': None, 'inicio': '2024-01-01'})
+    assert chave != CacheRelatorios.chave(4, 'geral', {'inicio': '2024-01-01', 'fim': None})
+    assert chave != CacheRelatorios.chave(3, 'completo', {'inicio': '2024-01-01', 'fim': None})
+    assert chave != CacheRelatorios.chave(3, 'geral', {'inicio': '2024-02-01', 'fim': None})
+    # Revisões em tupla (CSV: mtime e tamanho) também são aceitas
+    assert CacheRelatorios.chave(((1, 2), None), 'geral') == CacheRelatorios.chave(((1, 2), None), 'geral')
+
+def test_lru_em_memoria():
+    cache = CacheRelatorios(max_itens=2)
+    cache.guardar('a', 1)
+    cache.guardar('b', 2)
+    assert cache.obter('a') == (True, 1)
+    cache.guardar('c', 3)
+    # 'b' era o menos usado
+    assert cache.obter('b') == (False, None)
+    assert cache.obter('a') == (True, 1)
+    assert cache.obter('c') == (True, 3)
+
+def test_disco_sobrevive_a_reinicio(tmp_path):
+    diretorio = str(tmp_path / 'cache')
+    CacheRelatorios(diretorio).guardar('chave', {'total': 10})
+    assert CacheRelatorios(diretorio).obter('chave') == (True, {'total': 10})
+
+def test_limite_do_disco(tmp_path):
+    cache = CacheRelatorios(str(tmp_path), max_itens=1, max_itens_disco=3)
+    for i in range(6):
+        cache.guardar(f"k{i}", i)
+    assert len([nome for nome in os.listdir(tmp_path) if nome.endswith('.pkl')]) == 3
+
+def test_arquivo_corrompido_e_erro_de_cache(tmp_path):
+    cache = CacheRelatorios(str(tmp_path), max_itens=1)
+    (tmp_path / 'ruim.pkl').write_bytes(b'nao e pickle')
+    assert cache.obter('ruim') == (False, None)
+
+def test_gravacoes_concorrentes_da_mesma_chave(tmp_path):
+    cache = CacheRelatorios(str(tmp_path))
+    valores = [list(range(i, i + 20000)) for i in range(8)]
+    threads = [threading.Thread(target=cache.guardar, args=('mesma', valor)) for valor in valores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    encontrado, valor = CacheRelatorios(str(tmp_path)).obter('mesma')
+    assert encontrado and valor in valores
+    assert not [nome for nome in os.listdir(tmp_path) if nome.endswith('.tmp')]
+
+def test_gravar_atomico_preserva_o_arquivo_em_erro(tmp_path):
+    caminho = str(tmp_path / 'indice.json')
+    gravar_atomico(caminho, lambda f: f.write('{"a": 1}'))
+    
+    def falhar(f):
+        f.write('{"parcial"')
+        raise RuntimeError('falha no meio da gravação')
+    try:
+        gravar_atomico(caminho, falhar)
+    except RuntimeError:
+        pass
+    assert open(caminho, encoding='utf-8').read() == '{"a": 1}'
+    assert os.listdir(tmp_path) == ['indice.json']
+
+def test_relatorio_em_cache_ate_a_proxima_escrita(tmp_path):
+    from reports import ReportGenerator
+    from storage import COLUNAS_FILA, SQLiteStorage
+    
+    storage = SQLiteStorage(str(tmp_path / 'fila.db'))
+    linha = {**dict.fromkeys(COLUNAS_FILA, ''), 'id': 'A', 'data_criacao': '2024-03-04 10:00:00',
+             'status': 'Pendente', 'prioridade': 'Normal', 'dispositivos': 'Notebook'}
+    storage.anexar([linha])
+    gerador = ReportGenerator(str(tmp_path / 'fila.csv'), str(tmp_path / 'relatorios'), storage=storage,
+                              report_workers=1)
+    chamadas = []
+    
+    def gerar(chave):
+        chamadas.append(chave)
+        return len(storage.ler())
+    assert gerador._em_cache('contagem', gerar) == 1
+    assert gerador._em_cache('contagem', gerar) == 1
+    assert len(chamadas) == 1
+    
+    storage.anexar([dict(linha, id='B')])
+    assert gerador._em_cache('contagem', gerar) == 2
+    assert len(chamadas) == 2 and chamadas[0] != chamadas[1]
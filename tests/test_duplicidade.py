@@ -0,0 +1,60 @@
+"""
+Detecção de reenvio: mesma solicitação dentro da janela retorna o ticket já criado
+"""
+import pandas as pd
+
+from database import FilaManager
+
+def solicitacao(email='ana@mavi.com', dispositivos='Notebook, Mouse', necessidade='Troca do notebook'):
+    return {'nome': 'Ana', 'email': email, 'squad_leader': 'Ana', 'dispositivos': dispositivos,
+            'necessidade': necessidade, 'prioridade': 'Normal'}
+
+def criar(tmp_path, janela=600, **kwargs):
+    return FilaManager(str(tmp_path / 'fila.csv'), janela_duplicidade_segundos=janela, **kwargs)
+
+def test_reenvio_retorna_o_mesmo_ticket(tmp_path):
+    fila = criar(tmp_path)
+    ticket_id = fila.adicionar_solicitacao(solicitacao())
+    # Caixa, espaços e ordem dos dispositivos não distinguem o envio
+    reenvio = solicitacao(email=' ANA@mavi.com', dispositivos='mouse,notebook', necessidade='Troca  do notebook ')
+    assert fila.buscar_duplicata(reenvio) == ticket_id
+    assert fila.adicionar_solicitacao(reenvio) == ticket_id
+    assert len(fila.obter_dados_completos()) == 1
+
+def test_conteudo_diferente_cria_outro_ticket(tmp_path):
+    fila = criar(tmp_path)
+    primeiro = fila.adicionar_solicitacao(solicitacao())
+    assert fila.adicionar_solicitacao(solicitacao(necessidade='Troca do monitor')) != primeiro
+    assert fila.adicionar_solicitacao(solicitacao(email='bruno@mavi.com')) != primeiro
+    assert len(fila.obter_dados_completos()) == 3
+
+def test_envio_fora_da_janela(tmp_path):
+    fila = criar(tmp_path, janela=60)
+    ticket_id = fila.adicionar_solicitacao(solicitacao())
+    agora = pd.Timestamp.now().timestamp()
+    dados = solicitacao()
+    hash_conteudo = fila._hash_conteudo(dados['email'], dados['dispositivos'], dados['necessidade'])
+    assert fila._buscar_envio_recente(hash_conteudo, agora + 30) == ticket_id
+    assert fila._buscar_envio_recente(hash_conteudo, agora + 61) is None
+    # Baldes expirados saem do índice
+    fila._buscar_envio_recente(hash_conteudo, agora + 600)
+    assert not fila._envios_recentes
+
+def test_janela_desligada(tmp_path):
+    fila = criar(tmp_path, janela=0)
+    assert fila.buscar_duplicata(solicitacao()) is None
+    fila.adicionar_solicitacao(solicitacao())
+    fila.adicionar_solicitacao(solicitacao())
+    assert len(fila.obter_dados_completos()) == 2
+
+def test_indice_reconstruido_ao_reiniciar(tmp_path):
+    ticket_id = criar(tmp_path).adicionar_solicitacao(solicitacao())
+    assert criar(tmp_path).adicionar_solicitacao(solicitacao()) == ticket_id
+
+def test_reenvio_de_solicitacao_em_espera(tmp_path):
+    fila = criar(tmp_path, max_fila_size=1, modo_overflow='espera')
+    fila.adicionar_solicitacao(solicitacao(email='bruno@mavi.com'))
+    em_espera = fila.adicionar_solicitacao(solicitacao())
+    assert fila.em_espera(em_espera)
+    assert fila.adicionar_solicitacao(solicitacao()) == em_espera
+    assert fila.obter_situacao_fila()['em_espera'] == 1
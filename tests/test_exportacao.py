@@ -0,0 +1,92 @@
+"""
+Exportação por streaming: mesmo conteúdo da leitura completa, em blocos, e arquivos reaproveitados por revisão
+"""
+import os
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import pytest
+
+import exportacao
+from exportacao import ExportadorDados, blocos_filtrados, gerar_csv
+from report_engine import FiltroRelatorio
+from storage import COLUNAS_FILA, CSVStorage, SQLiteStorage
+
+INICIO = datetime(2024, 3, 1, 8)
+
+def linha(i):
+    return {**dict.fromkeys(COLUNAS_FILA, ''), 'id': f"E{i:05d}",
+            'data_criacao': (INICIO + timedelta(hours=7 * i)).strftime('%Y-%m-%d %H:%M:%S'),
+            'nome': f"Pessoa {i}", 'email': f"p{i}@mavi.com", 'squad_leader': ['Ana', 'Bruno'][i % 2],
+            'status': ['Pendente', 'Em andamento', 'Concluída'][i % 3],
+            'prioridade': ['Normal', 'Alta', 'Urgente'][i % 3], 'dispositivos': 'Notebook, Mouse',
+            'necessidade': 'Troca; "urgente", com vírgula'}
+
+@pytest.fixture(params=['csv', 'sqlite'])
+def storage(request, tmp_path):
+    if request.param == 'csv':
+        storage = CSVStorage(str(tmp_path / 'fila.csv'), str(tmp_path / 'fila_espera.csv'))
+    else:
+        storage = SQLiteStorage(str(tmp_path / 'fila.db'))
+    storage.anexar([linha(i) for i in range(300)])
+    return storage
+
+def esperado(storage, filtro, colunas):
+    df = pd.concat(list(storage.ler_blocos('fila')), ignore_index=True)
+    datas = df.assign(data_criacao=pd.to_datetime(df['data_criacao']))
+    return df.loc[filtro.aplicar(datas).index, colunas].reset_index(drop=True)
+
+def test_blocos_filtrados_igual_ao_filtro_completo(storage):
+    filtro = FiltroRelatorio(inicio=date(2024, 3, 5), fim=date(2024, 3, 20), status=['Pendente', 'Concluída'],
+                             squad_leader='Ana')
+    colunas = ['id', 'data_criacao', 'status', 'squad_leader']
+    blocos = list(blocos_filtrados(storage, colunas, filtro, tamanho=8))
+    assert len(blocos) > 1
+    assert all(len(bloco) <= 8 for bloco in blocos)
+    resultado = pd.concat(blocos, ignore_index=True)
+    pd.testing.assert_frame_equal(resultado, esperado(storage, filtro, colunas))
+
+def test_csv_em_pedacos(storage):
+    pedacos = list(gerar_csv(blocos_filtrados(storage, ['id', 'necessidade'], tamanho=100), ['id', 'necessidade']))
+    assert pedacos[0] == 'id,necessidade\n'
+    assert len(pedacos) == 4
+    df = pd.read_csv(pd.io.common.StringIO(''.join(pedacos)), dtype=str)
+    assert len(df) == 300
+    assert df['necessidade'].iloc[0] == 'Troca; "urgente", com vírgula'
+
+def test_exportar_csv_reaproveita_por_revisao(storage, tmp_path):
+    exportador = ExportadorDados(storage, str(tmp_path / 'exportacoes'))
+    filtro = FiltroRelatorio(prioridades=['Urgente'])
+    caminho = exportador.exportar('csv', ['id', 'prioridade', 'email'], filtro)
+    df = pd.read_csv(caminho, dtype=str)
+    pd.testing.assert_frame_equal(df, esperado(storage, filtro, ['id', 'prioridade', 'email']))
+    
+    # Mesmo pedido, mesmos dados: o arquivo não é refeito
+    modificado = os.stat(caminho).st_mtime_ns
+    assert exportador.exportar('csv', ['id', 'prioridade', 'email'], filtro) == caminho
+    assert os.stat(caminho).st_mtime_ns == modificado
+    
+    storage.anexar([linha(1000)])
+    assert exportador.exportar('csv', ['id', 'prioridade', 'email'], filtro) != caminho
+    assert not [nome for nome in os.listdir(tmp_path / 'exportacoes') if nome.endswith('.tmp')]
+
+def test_exportar_xlsx_divide_planilhas(storage, tmp_path, monkeypatch):
+    pytest.importorskip('xlsxwriter')
+    pytest.importorskip('openpyxl')
+    monkeypatch.setattr(exportacao, 'LIMITE_LINHAS_XLSX', 101)
+    caminho = ExportadorDados(storage, str(tmp_path)).exportar('xlsx', ['id', 'status'])
+    
+    planilhas = pd.read_excel(caminho, sheet_name=None, dtype=str)
+    assert list(planilhas) == ['Tickets', 'Tickets (2)', 'Tickets (3)']
+    assert all(list(df.columns) == ['id', 'status'] for df in planilhas.values())
+    juntas = pd.concat(planilhas.values(), ignore_index=True)
+    assert list(juntas['id']) == [f"E{i:05d}" for i in range(300)]
+
+def test_exportacao_vazia_e_parametros_invalidos(storage, tmp_path):
+    exportador = ExportadorDados(storage, str(tmp_path))
+    caminho = exportador.exportar('csv', ['id', 'status'], FiltroRelatorio(squad_leader='Ninguém'))
+    assert open(caminho, encoding='utf-8').read() == 'id,status\n'
+    with pytest.raises(ValueError):
+        exportador.exportar('pdf')
+    with pytest.raises(ValueError):
+        exportador.exportar('csv', ['coluna_inexistente'])
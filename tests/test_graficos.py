@@ -0,0 +1,33 @@
+"""
+Gráficos renderizados no pool de processos e gravados sem temporários parciais
+"""
+import os
+from datetime import datetime, timedelta
+
+from reports import ReportGenerator
+from storage import COLUNAS_FILA, CSVStorage
+
+def test_graficos_em_paralelo(tmp_path):
+    hoje = datetime.now().replace(hour=10, minute=0, second=0, microsecond=0)
+    dias = [hoje - timedelta(days=i % 20) for i in range(60)]
+    storage = CSVStorage(str(tmp_path / 'fila.csv'))
+    storage.anexar([{**dict.fromkeys(COLUNAS_FILA, ''), 'id': f"T{i}", 'email': f"p{i}@mavi.com",
+                     'data_criacao': dias[i].strftime('%Y-%m-%d %H:%M:%S'), 'prioridade': 'Normal',
+                     'status': ['Pendente', 'Concluída'][i % 2], 'dispositivos': 'Notebook, Mouse',
+                     'data_conclusao': (dias[i] + timedelta(hours=5)).strftime('%Y-%m-%d %H:%M:%S') if i % 2 else ''}
+                    for i in range(60)])
+    diretorio = tmp_path / 'relatorios'
+    gerador = ReportGenerator(storage.fila_file, str(diretorio), storage=storage, report_workers=2)
+    try:
+        resultado = gerador.gerar_relatorio_completo()
+    finally:
+        if gerador._pool is not None:
+            gerador._pool.shutdown()
+    
+    graficos = [caminho for caminho in resultado['graficos'].values() if caminho]
+    assert len(graficos) == 4
+    for caminho in graficos:
+        assert 'src="plotly.min.js"' in open(caminho, encoding='utf-8').read()
+    assert (diretorio / 'plotly.min.js').stat().st_size > 1_000_000
+    assert os.path.getsize(resultado['relatorio_html']) > 0
+    assert not [nome for nome in os.listdir(diretorio) if nome.endswith('.tmp')]
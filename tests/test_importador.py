@@ -0,0 +1,79 @@
+"""
+Importação de históricos: mapeamento de colunas, validação por linha e datas mistas
+"""
+import pandas as pd
+import pytest
+
+from importador import _converter_datas, importar_historico, mapear_colunas
+from storage import CSVStorage
+
+CABECALHO = 'Ticket ID,Criado em,E-mail,Situação,Priority,Resolved at,Celular,Dispositivo\n'
+
+def gravar(tmp_path, linhas, cabecalho=CABECALHO):
+    caminho = tmp_path / 'historico.csv'
+    caminho.write_text(cabecalho + ''.join(linha + '\n' for linha in linhas), encoding='utf-8')
+    return str(caminho)
+
+@pytest.fixture
+def storage(tmp_path):
+    return CSVStorage(str(tmp_path / 'fila.csv'))
+
+def test_mapear_colunas_por_alias_e_mapeamento():
+    colunas = mapear_colunas(['Ticket ID', 'Criado em', 'E-mail', 'Situação', 'Coluna X'], {'coluna x': 'observacoes'})
+    assert colunas == {'Ticket ID': 'id', 'Criado em': 'data_criacao', 'E-mail': 'email',
+                       'Situação': 'status', 'Coluna X': 'observacoes'}
+
+def test_converter_datas_mistas():
+    datas = _converter_datas(pd.Series(['2024-03-04 10:30:00', '05/03/2024 08:00', '2024-03-06',
+                                        '07-03-2024', ' ', 'ontem', 'March 8, 2024']))
+    assert list(datas.iloc[:4].dt.strftime('%Y-%m-%d %H:%M')) == [
+        '2024-03-04 10:30', '2024-03-05 08:00', '2024-03-06 00:00', '2024-03-07 00:00']
+    assert datas.iloc[4:6].isna().all()
+    assert datas.iloc[6] == pd.Timestamp('2024-03-08')
+
+def test_importacao_valida_cada_linha(tmp_path, storage):
+    caminho = gravar(tmp_path, [
+        'T1,2024-03-04 10:00:00,ana@mavi.com,Resolvido,high,2024-03-05 10:00:00,(11) 98765-4321,Notebook',
+        'T2,04/03/2024 11:00,bruno@mavi.com,open,,,,Monitor',
+        'T3,data ruim,carla@mavi.com,open,normal,,,Mouse',
+        'T4,2024-03-04 12:00:00,sem-arroba,open,normal,,,Mouse',
+        'T5,2024-03-04 12:00:00,diego@mavi.com,arquivado,normal,,,Mouse',
+        'T6,2024-03-04 12:00:00,eva@mavi.com,done,normal,2024-03-01 12:00:00,,Mouse',
+        'T1,2024-03-04 12:00:00,fabio@mavi.com,open,normal,,123,Mouse',
+        ',2024-03-04 13:00:00,gabi@mavi.com,em andamento,urgente,,,Webcam'
+    ])
+    erros_file = str(tmp_path / 'erros.csv')
+    resultado = importar_historico(caminho, storage, erros_file=erros_file, chunksize=3)
+    
+    assert resultado['linhas_lidas'] == 8
+    assert resultado['importadas'] == 3
+    assert resultado['rejeitadas'] == 5
+    erros = pd.read_csv(erros_file)
+    assert set(zip(erros['linha'], erros['campo'])) == {
+        (4, 'data_criacao'), (5, 'email'), (6, 'status'), (7, 'data_conclusao'), (8, 'id'), (8, 'telefone')}
+    
+    df = storage.ler('fila').set_index('id')
+    assert df.loc['T1', 'status'] == 'Concluída' and df.loc['T1', 'prioridade'] == 'Alta'
+    assert df.loc['T2', 'data_criacao'] == '2024-03-04 11:00:00'
+    assert df.loc['T2', 'prioridade'] == 'Normal'
+    gerado = df[df['email'] == 'gabi@mavi.com']
+    assert len(gerado) == 1 and len(gerado.index[0]) == 8
+    assert gerado['status'].iloc[0] == 'Em andamento'
+
+def test_ids_ja_existentes_sao_rejeitados(tmp_path, storage):
+    caminho = gravar(tmp_path, ['T1,2024-03-04 10:00:00,ana@mavi.com,open,normal,,,Notebook'])
+    assert importar_historico(caminho, storage)['importadas'] == 1
+    resultado = importar_historico(caminho, storage)
+    assert resultado['importadas'] == 0
+    assert resultado['amostra_erros'][0]['erro'] == 'ID duplicado'
+
+def test_simulacao_nao_grava(tmp_path, storage):
+    caminho = gravar(tmp_path, ['T1,2024-03-04 10:00:00,ana@mavi.com,open,normal,,,Notebook'])
+    resultado = importar_historico(caminho, storage, simular=True)
+    assert resultado['importadas'] == 1 and resultado['simulacao']
+    assert storage.ler('fila').empty
+
+def test_colunas_obrigatorias(tmp_path, storage):
+    caminho = gravar(tmp_path, ['T1,ana@mavi.com'], cabecalho='id,email\n')
+    with pytest.raises(ValueError, match='data_criacao'):
+        importar_historico(caminho, storage)
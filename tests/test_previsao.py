@@ -0,0 +1,117 @@
+"""
+Previsão da fila: taxas por horário da semana, ETA por posição e projeção do backlog
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from previsao import (HORARIOS_SEMANA, PrevisaoFila, TaxasFila, calcular_taxas, estimar_conclusoes,
+                      formatar_eta, projetar_backlog)
+from storage import COLUNAS_FILA, CSVStorage
+
+# Segunda-feira
+AGORA = datetime(2024, 3, 4, 10, 30)
+
+def taxas_constantes(chegadas=0.0, atendimentos=0.0):
+    return TaxasFila(chegadas=np.full(HORARIOS_SEMANA, chegadas), atendimentos=np.full(HORARIOS_SEMANA, atendimentos),
+                     calculado_em=AGORA, semanas=8)
+
+def taxas_comerciais(atendimentos=4.0):
+    """Atendimentos só de segunda a sexta, das 9h às 17h"""
+    horario = np.arange(HORARIOS_SEMANA)
+    uteis = (horario // 24 < 5) & (horario % 24 >= 9) & (horario % 24 < 17)
+    return TaxasFila(chegadas=np.zeros(HORARIOS_SEMANA), atendimentos=np.where(uteis, atendimentos, 0.0),
+                     calculado_em=AGORA, semanas=8)
+
+def historico(semanas=8):
+    """Em cada dia útil, das 9h às 17h: 3 chegadas e 2 conclusões por hora"""
+    linhas = []
+    dia = AGORA.replace(hour=0, minute=0) - timedelta(weeks=semanas)
+    while dia < AGORA.replace(hour=0, minute=0):
+        for hora in range(9, 17) if dia.weekday() < 5 else ():
+            for i in range(3):
+                criacao = dia + timedelta(hours=hora, minutes=10 * i)
+                concluido = i < 2
+                linhas.append({**dict.fromkeys(COLUNAS_FILA, ''), 'id': f"{criacao:%y%m%d%H%M}",
+                               'data_criacao': f"{criacao:%Y-%m-%d %H:%M:%S}", 'prioridade': 'Normal',
+                               'status': 'Concluída' if concluido else 'Pendente',
+                               'data_conclusao': f"{criacao + timedelta(minutes=30):%Y-%m-%d %H:%M:%S}"
+                                                 if concluido else ''})
+        dia += timedelta(days=1)
+    return linhas
+
+def test_taxas_por_horario_da_semana():
+    linhas = historico()
+    # Um ticket fora da janela e uma data de conclusão sem o status Concluída não contam
+    linhas.append({**linhas[0], 'id': 'ANTIGO', 'data_criacao': '2023-01-02 09:00:00', 'status': 'Concluída',
+                   'data_conclusao': '2023-01-02 10:00:00'})
+    linhas.append({**linhas[0], 'id': 'REABERTO', 'data_criacao': '2024-03-01 02:00:00', 'status': 'Pendente',
+                   'data_conclusao': '2024-03-01 03:00:00'})
+    df = pd.DataFrame(linhas)
+    taxas = calcular_taxas([df.iloc[:500], df.iloc[500:]], AGORA, semanas=8)
+    
+    segunda_10h, segunda_20h, sabado_10h = 10, 20, 5 * 24 + 10
+    assert taxas.chegadas[segunda_10h] == pytest.approx(3)
+    assert taxas.atendimentos[segunda_10h] == pytest.approx(2)
+    assert taxas.chegadas[segunda_20h] == 0 and taxas.atendimentos[sabado_10h] == 0
+    # Sexta 2h: uma chegada (o reaberto) em 8 ocorrências desse horário
+    assert taxas.chegadas[4 * 24 + 2] == pytest.approx(1 / 8)
+    assert taxas.atendimentos[4 * 24 + 3] == 0
+    assert taxas.calculado_em == datetime(2024, 3, 4, 10)
+
+def test_eta_com_taxa_constante():
+    # 2 atendimentos por hora: a meia hora até as 11h atende 1
+    previsoes = estimar_conclusoes(taxas_constantes(atendimentos=2), [1, 2, 3, 21], AGORA)
+    assert previsoes == [datetime(2024, 3, 4, 11), datetime(2024, 3, 4, 11, 30), datetime(2024, 3, 4, 12),
+                         datetime(2024, 3, 4, 21)]
+
+def test_eta_respeita_o_expediente():
+    sexta_16h = datetime(2024, 3, 8, 16)
+    previsoes = estimar_conclusoes(taxas_comerciais(4), [2, 4, 5, 36], sexta_16h)
+    # Sem atendimento à noite e no fim de semana, o quinto fica para segunda
+    assert previsoes[:3] == [datetime(2024, 3, 8, 16, 30), datetime(2024, 3, 8, 17), datetime(2024, 3, 11, 9, 15)]
+    assert previsoes[3] == datetime(2024, 3, 11, 17)
+    assert all(anterior <= seguinte for anterior, seguinte in zip(previsoes, previsoes[1:]))
+
+def test_eta_alem_do_horizonte():
+    previsoes = estimar_conclusoes(taxas_comerciais(1), [1, 40, 41], datetime(2024, 3, 4, 9),
+                                   horizonte_horas=HORARIOS_SEMANA)
+    assert previsoes[:2] == [datetime(2024, 3, 4, 10), datetime(2024, 3, 8, 17)]
+    assert previsoes[2] is None
+    assert estimar_conclusoes(taxas_constantes(), [1], AGORA) == [None]
+
+def test_projecao_do_backlog():
+    # Atendendo mais do que chega, a fila esvazia e não fica negativa
+    projecao = projetar_backlog(taxas_constantes(chegadas=1, atendimentos=3), 10, datetime(2024, 3, 4, 10), horas=12)
+    assert list(projecao['horario'])[:2] == [pd.Timestamp('2024-03-04 11:00'), pd.Timestamp('2024-03-04 12:00')]
+    assert list(projecao['pendentes']) == pytest.approx([8, 6, 4, 2, 0, 0, 0, 0, 0, 0, 0, 0])
+    
+    # Chegando mais do que é atendido, cresce a partir do primeiro horário parcial
+    projecao = projetar_backlog(taxas_constantes(chegadas=3, atendimentos=1), 5, AGORA, horas=3)
+    assert list(projecao['pendentes']) == pytest.approx([6, 8, 10])
+
+def test_previsao_fila_le_uma_vez_por_hora(tmp_path):
+    storage = CSVStorage(str(tmp_path / 'fila.csv'))
+    storage.anexar(historico())
+    leituras = []
+    ler_blocos = storage.ler_blocos
+    storage.ler_blocos = lambda *args, **kwargs: leituras.append(kwargs.get('predicado')) or ler_blocos(*args, **kwargs)
+    previsao = PrevisaoFila(storage, semanas=4)
+    
+    eta = previsao.estimar([1, 2], AGORA)
+    assert eta == [datetime(2024, 3, 4, 11), datetime(2024, 3, 4, 11, 30)]
+    previsao.estimar([5], AGORA + timedelta(minutes=20))
+    assert len(previsao.projetar(3, 24, AGORA)) == 24
+    assert len(leituras) == 1
+    # Só as últimas 2 × semanas de criação são lidas
+    assert leituras[0].inicio == '2024-01-08 10:00:00'
+    
+    previsao.estimar([1], AGORA + timedelta(hours=1))
+    assert len(leituras) == 2
+
+def test_formatar_eta():
+    assert formatar_eta(None) == "Sem previsão"
+    assert formatar_eta(datetime(2024, 3, 4, 13, 30), AGORA) == "04/03 13:30 (~3h)"
+    assert formatar_eta(datetime(2024, 3, 7, 10, 30), AGORA) == "07/03 10:30 (~3 dias)"
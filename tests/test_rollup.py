@@ -0,0 +1,188 @@
+"""
+Rollup atualizado transação a transação comparado com a reconstrução completa
+"""
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import analitico
+from database import FilaManager
+from report_engine import FiltroRelatorio
+from reports import ReportGenerator
+from rollup import RollupDiario
+from storage import COLUNAS_FILA, CSVStorage, SQLiteStorage
+
+DISPOSITIVOS = ['Notebook', 'Monitor', 'Mouse', 'Teclado', 'Headset', 'Webcam']
+
+def linha_historica(rng, i, agora):
+    criacao = agora - timedelta(seconds=rng.randrange(90 * 24 * 3600))
+    status = rng.choice(['Pendente', 'Em andamento', 'Concluída', 'Concluída'])
+    conclusao = criacao + timedelta(seconds=rng.randrange(600, 5 * 24 * 3600))
+    return {
+        'id': f"H{i:07d}",
+        'data_criacao': criacao.strftime('%Y-%m-%d %H:%M:%S'),
+        'data_solicitacao': criacao.strftime('%Y-%m-%d'),
+        'nome': 'Colaborador',
+        'email': f"pessoa{rng.randrange(200)}@mavi.com",
+        'telefone': '',
+        'squad_leader': rng.choice(['Ana', 'Bruno', 'Carla', '']),
+        'dispositivos': ', '.join(rng.sample(DISPOSITIVOS, rng.randint(1, 3))),
+        'necessidade': 'Troca de equipamento',
+        'status': status,
+        'prioridade': rng.choice(['Normal', 'Normal', 'Alta', 'Urgente']),
+        'data_conclusao': conclusao.strftime('%Y-%m-%d %H:%M:%S') if status == 'Concluída' else '',
+        'observacoes': ''
+    }
+
+@pytest.fixture(params=['csv', 'sqlite'])
+def fila_manager(request, tmp_path):
+    rng = random.Random(7)
+    agora = datetime.now()
+    linhas = [linha_historica(rng, i, agora) for i in range(600)]
+    fila_file = str(tmp_path / 'fila.csv')
+    if request.param == 'csv':
+        storage = CSVStorage(fila_file, str(tmp_path / 'fila_espera.csv'))
+    else:
+        storage = SQLiteStorage(str(tmp_path / 'fila.db'))
+    with storage.transacao():
+        storage.anexar(linhas, 'fila')
+    return FilaManager(fila_file, max_fila_size=150, modo_overflow='espera', storage=storage)
+
+def assert_rollups_iguais(incremental: RollupDiario, completo: RollupDiario):
+    assert incremental._dias == completo._dias
+    assert incremental._squads == completo._squads
+    for atributo in ('_dispositivos', '_horarios'):
+        assert _sem_vazios(getattr(incremental, atributo)) == _sem_vazios(getattr(completo, atributo))
+    tickets_incremental, tickets_completo = _sem_vazios(incremental._tickets), _sem_vazios(completo._tickets)
+    assert tickets_incremental.keys() == tickets_completo.keys()
+    for dia, celulas in tickets_completo.items():
+        assert tickets_incremental[dia].keys() == celulas.keys()
+        for chave, celula in celulas.items():
+            assert tickets_incremental[dia][chave] == pytest.approx(celula)
+    
+    resumo_incremental, resumo_completo = incremental.agregados().resumo(), completo.agregados().resumo()
+    for campo in ('total_tickets', 'pendentes', 'em_andamento', 'concluidos', 'tempo_medio_resolucao_horas',
+                  'tempo_medio_resolucao_horas_uteis', 'dispositivos_mais_solicitados', 'tickets_por_dia',
+                  'dispositivos_distintos'):
+        assert resumo_incremental[campo] == pytest.approx(resumo_completo[campo]), campo
+    for percentil in ('p50', 'p90'):
+        assert resumo_incremental['percentis_resolucao_horas'][percentil] == pytest.approx(
+            resumo_completo['percentis_resolucao_horas'][percentil], rel=0.05)
+    assert resumo_incremental['solicitantes'] == resumo_completo['solicitantes']
+
+def _sem_vazios(por_dia):
+    return {dia: celulas for dia, celulas in por_dia.items() if celulas}
+
+def test_incremental_igual_a_reconstrucao(fila_manager):
+    rng = random.Random(11)
+    rollup = fila_manager.rollup
+    rollup.sincronizar()
+    
+    for i in range(120):
+        operacao = rng.random()
+        pendentes = sorted(fila_manager._pendentes_info)
+        if operacao < 0.4 or not pendentes:
+            fila_manager.adicionar_solicitacao({
+                'nome': 'Novo', 'email': f"novo{rng.randrange(30)}@mavi.com",
+                'squad_leader': rng.choice(['Ana', 'Diego']),
+                'dispositivos': ', '.join(rng.sample(DISPOSITIVOS, 2)),
+                'necessidade': f"Pedido {i}", 'prioridade': rng.choice(['Normal', 'Alta', 'Urgente'])
+            })
+        else:
+            # Concluir libera vagas e promove tickets da lista de espera
+            fila_manager.atualizar_status(rng.choice(pendentes), rng.choice(['Em andamento', 'Concluída']),
+                                          observacoes=f"Passo {i}")
+    
+    # Todas as escritas foram aplicadas sem reconstrução
+    assert rollup.revisao == RollupDiario._normalizar(fila_manager.storage.revisao())
+    completo = RollupDiario(fila_manager.storage)
+    completo.sincronizar()
+    assert_rollups_iguais(rollup, completo)
+
+def test_escrita_externa_leva_a_reconstrucao(fila_manager):
+    rollup = fila_manager.rollup
+    rollup.sincronizar()
+    storage = fila_manager.storage
+    with storage.transacao():
+        storage.anexar([dict.fromkeys(COLUNAS_FILA, '') | {
+            'id': 'EXTERNO1', 'data_criacao': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'status': 'Pendente', 'prioridade': 'Normal', 'dispositivos': 'Monitor'
+        }], 'fila')
+    
+    total_antes = rollup.totais()[0]
+    rollup.sincronizar()
+    assert rollup.totais()[0] == total_antes + 1
+    completo = RollupDiario(storage)
+    completo.sincronizar()
+    assert_rollups_iguais(rollup, completo)
+
+def test_recentes_le_so_os_ultimos_dias(fila_manager):
+    esperado = fila_manager.obter_dados_completos().sort_values('data_criacao', ascending=False).head(10)
+    recentes = fila_manager.obter_recentes(10)
+    assert list(recentes['id'].astype(str)) == list(esperado['id'].astype(str))
+    
+    dia = fila_manager.rollup.dia_inicial_recentes(10)
+    assert 10 <= (fila_manager.obter_dados_completos()['data_criacao'] >= dia).sum() < 100
+    assert fila_manager.rollup.dia_inicial_recentes(10 ** 6) is None
+    assert len(fila_manager.obter_recentes(10 ** 6)) == 600
+
+def test_squads_da_reconstrucao(fila_manager):
+    fila_manager.rollup.sincronizar()
+    assert fila_manager.rollup.squad_leaders() == ['Ana', 'Bruno', 'Carla']
+
+def test_squad_sem_email_entra_e_sai(tmp_path):
+    fila_manager = FilaManager(str(tmp_path / 'fila.csv'))
+    rollup = fila_manager.rollup
+    ana = fila_manager.adicionar_solicitacao({'nome': 'Com e-mail', 'email': 'ana@mavi.com', 'squad_leader': 'Ana',
+                                              'dispositivos': 'Mouse', 'necessidade': 'Troca', 'prioridade': 'Normal'})
+    # Um squad cujos tickets não têm e-mail também entra na lista
+    eva = fila_manager.adicionar_solicitacao({'nome': 'Sem e-mail', 'email': '', 'squad_leader': 'Eva',
+                                              'dispositivos': 'Monitor', 'necessidade': 'Troca', 'prioridade': 'Normal'})
+    assert rollup.revisao == RollupDiario._normalizar(fila_manager.storage.revisao())
+    assert rollup.squad_leaders() == ['Ana', 'Eva']
+    completo = RollupDiario(fila_manager.storage)
+    completo.sincronizar()
+    assert completo.squad_leaders() == ['Ana', 'Eva']
+    
+    fila_manager.storage.remover([eva])
+    rollup.sincronizar()
+    assert rollup.squad_leaders() == ['Ana']
+    assert ana in fila_manager.storage.ids()
+
+def test_conclusoes_no_dia_em_que_aconteceram(tmp_path):
+    def ticket(ticket_id, criacao, prioridade, conclusao=''):
+        return {**dict.fromkeys(COLUNAS_FILA, ''), 'id': ticket_id, 'data_criacao': criacao, 'prioridade': prioridade,
+                'status': 'Concluída' if conclusao else 'Pendente', 'data_conclusao': conclusao,
+                'dispositivos': 'Mouse'}
+    storage = CSVStorage(str(tmp_path / 'fila.csv'))
+    storage.anexar([
+        ticket('A', '2024-03-04 10:00:00', 'Normal', '2024-03-08 15:00:00'),  # segunda -> sexta
+        ticket('B', '2024-03-06 09:00:00', 'Normal'),
+        ticket('C', '2024-02-20 08:00:00', 'Alta', '2024-03-05 11:00:00')  # criado antes, concluído na terça
+    ])
+    rollup = RollupDiario(storage)
+    rollup.sincronizar()
+    
+    def mapa(inicio, fim, evento):
+        return rollup.mapa_horarios(date.fromisoformat(inicio), date.fromisoformat(fim), evento)
+    assert mapa('2024-03-08', '2024-03-08', 'conclusao').loc['Sex', 15] == 1
+    assert mapa('2024-03-08', '2024-03-08', 'conclusao').values.sum() == 1
+    assert mapa('2024-03-04', '2024-03-04', 'conclusao').values.sum() == 0
+    assert mapa('2024-03-04', '2024-03-04', 'chegada').loc['Seg', 10] == 1
+    assert mapa('2024-03-05', '2024-03-08', 'conclusao').values.sum() == 2
+    # Dias só com conclusões não mudam o período de criação
+    assert rollup.totais() == (3, '2024-02-20', '2024-03-06')
+    
+    # Rollup, snapshot e DuckDB contam as conclusões do período da mesma forma
+    esperado = {('chegada', 'Normal', 2 * 24 + 9): 1, ('conclusao', 'Alta', 24 + 11): 1,
+                ('conclusao', 'Normal', 4 * 24 + 15): 1}
+    periodo = FiltroRelatorio(inicio=date(2024, 3, 5), fim=date(2024, 3, 8))
+    com_prioridades = FiltroRelatorio(inicio=date(2024, 3, 5), fim=date(2024, 3, 8), prioridades=['Normal', 'Alta'])
+    gerador = ReportGenerator(storage.fila_file, str(tmp_path / 'relatorios'), storage=storage, rollup=rollup,
+                              report_workers=0)
+    assert gerador.calcular_agregados(periodo).horarios == esperado
+    assert gerador.calcular_agregados(com_prioridades).horarios == esperado
+    if analitico.duckdb is not None:
+        gerador.analitico = analitico.MotorAnalitico(storage, str(tmp_path / 'analitico'))
+        assert gerador.calcular_agregados(com_prioridades).horarios == esperado
@@ -0,0 +1,105 @@
+"""
+Ordem do escalonador comparada com a ordenação direta pelo prazo virtual
+"""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from scheduler import EscalonadorFila
+
+ENVELHECIMENTO = {'Urgente': 0, 'Alta': 4, 'Normal': 24}
+ORDEM_CLASSES = {'Urgente': 0, 'Alta': 1, 'Normal': 2}
+
+def ordem_esperada(tickets):
+    """Prazo (criação + atraso), empates para a classe mais urgente e depois a criação"""
+    def chave(ticket_id):
+        prioridade, criacao = tickets[ticket_id]
+        prazo = criacao + timedelta(hours=ENVELHECIMENTO[prioridade])
+        return prazo, ORDEM_CLASSES[prioridade], criacao
+    return sorted(tickets, key=chave)
+
+def test_envelhecimento_passa_normal_a_frente():
+    escalonador = EscalonadorFila(ENVELHECIMENTO)
+    agora = datetime(2024, 3, 4, 12)
+    escalonador.inserir('URGENTE', 'Urgente', agora)
+    escalonador.inserir('NORMAL', 'Normal', agora - timedelta(hours=25))
+    escalonador.inserir('ALTA', 'Alta', agora - timedelta(hours=4, minutes=30))
+    assert escalonador.ordem_atendimento() == ['NORMAL', 'ALTA', 'URGENTE']
+    assert escalonador.proximo() == 'NORMAL'
+    assert escalonador.posicao('URGENTE') == 3
+    assert escalonador.posicao('INEXISTENTE') == -1
+
+def test_prioridade_desconhecida_usa_a_padrao():
+    escalonador = EscalonadorFila(ENVELHECIMENTO)
+    agora = datetime(2024, 3, 4, 12)
+    escalonador.inserir('A', 'Baixíssima', agora)
+    escalonador.inserir('B', 'Normal', agora + timedelta(minutes=1))
+    assert escalonador.ordem_atendimento() == ['A', 'B']
+
+@pytest.mark.parametrize('seed', range(5))
+def test_ordem_igual_a_forca_bruta(seed):
+    rng = random.Random(seed)
+    escalonador = EscalonadorFila(ENVELHECIMENTO)
+    tickets = {}
+    base = datetime(2024, 1, 1)
+    minutos = list(range(60 * 24 * 30))
+    rng.shuffle(minutos)
+    for passo in range(3000):
+        operacao = rng.random()
+        if tickets and operacao < 0.35:
+            ticket_id = rng.choice(sorted(tickets))
+            assert escalonador.remover(ticket_id)
+            del tickets[ticket_id]
+        elif tickets and operacao < 0.45:
+            # Reinserção com outra prioridade (ex.: prioridade alterada)
+            ticket_id = rng.choice(sorted(tickets))
+            prioridade = rng.choice(list(ENVELHECIMENTO))
+            tickets[ticket_id] = (prioridade, tickets[ticket_id][1])
+            escalonador.inserir(ticket_id, prioridade, tickets[ticket_id][1])
+        else:
+            # Criações em minutos distintos e fora de ordem (tickets reabertos); atrasos em
+            # horas inteiras produzem empates de prazo entre classes
+            ticket_id = f"T{passo}"
+            tickets[ticket_id] = (rng.choice(list(ENVELHECIMENTO)), base + timedelta(minutes=minutos.pop()))
+            escalonador.inserir(ticket_id, *tickets[ticket_id])
+        
+        if passo % 50 == 0 or passo == 2999:
+            esperada = ordem_esperada(tickets)
+            assert len(escalonador) == len(tickets)
+            assert escalonador.ordem_atendimento() == esperada
+            assert [escalonador.posicao(t) for t in esperada] == list(range(1, len(esperada) + 1))
+            assert escalonador.proximo() == (esperada[0] if esperada else None)
+
+def test_heap_compactado_com_muitas_remocoes():
+    escalonador = EscalonadorFila(ENVELHECIMENTO)
+    base = datetime(2024, 1, 1)
+    for i in range(5000):
+        escalonador.inserir(f"T{i}", 'Normal', base + timedelta(minutes=i))
+        if i >= 10:
+            escalonador.remover(f"T{i - 10}")
+    assert len(escalonador) == 10
+    assert len(escalonador._heap) <= 2 * 64
+    assert escalonador.proximo() == 'T4990'
+
+@pytest.mark.parametrize('seed', range(3))
+def test_empates_de_criacao_consistentes_com_posicao(seed):
+    # Criações em horas cheias: empates dentro da classe e entre classes
+    rng = random.Random(seed)
+    escalonador = EscalonadorFila(ENVELHECIMENTO)
+    base = datetime(2024, 1, 1)
+    ativos = set()
+    for passo in range(1500):
+        if ativos and rng.random() < 0.4:
+            ticket_id = rng.choice(sorted(ativos))
+            escalonador.remover(ticket_id)
+            ativos.discard(ticket_id)
+        else:
+            ticket_id = f"T{rng.randrange(400)}"
+            escalonador.inserir(ticket_id, rng.choice(list(ENVELHECIMENTO)), base + timedelta(hours=rng.randrange(48)))
+            ativos.add(ticket_id)
+        if passo % 50 == 0:
+            ordem = escalonador.ordem_atendimento()
+            assert sorted(ordem) == sorted(ativos)
+            assert [escalonador.posicao(t) for t in ordem] == list(range(1, len(ordem) + 1))
+            assert escalonador.proximo() == (ordem[0] if ordem else None)
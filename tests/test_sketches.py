@@ -0,0 +1,151 @@
+"""
+Precisão dos sketches: percentis do t-digest e distintos do HyperLogLog, inclusive mesclando os diários
+"""
+import json
+import math
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from report_engine import QUANTIS_SLA
+from rollup import RollupDiario
+from sketches import HyperLogLog, TDigest
+from storage import COLUNAS_FILA, CSVStorage
+
+QUANTIS = (0.01, 0.5, 0.9, 0.99, 0.999)
+
+def erro_de_posicao(ordenados, estimativa, q):
+    """Distância entre o quantil pedido e a posição real da estimativa nos dados"""
+    return abs(np.searchsorted(ordenados, estimativa) / len(ordenados) - q)
+
+@pytest.fixture(scope='module')
+def horas():
+    # Tempos de resolução: assimétricos, com cauda longa
+    return np.random.default_rng(3).lognormal(2, 1, 100000)
+
+def test_percentis_do_digest(horas):
+    digest = TDigest.de_valores(horas)
+    ordenados = np.sort(horas)
+    for q in QUANTIS:
+        assert erro_de_posicao(ordenados, digest.quantil(q), q) < 0.001, q
+    assert digest.quantil(0) == ordenados[0]
+    assert digest.quantil(1) == ordenados[-1]
+    # A memória não cresce com os dados
+    assert len(digest._medias) <= digest.compressao
+
+def test_mescla_dos_digests_diarios(horas):
+    diarios = [TDigest.de_valores(dia) for dia in np.array_split(horas, 90)]
+    estados = [digest.para_lista() for digest in diarios]
+    mesclado = TDigest.combinar(diarios)
+    ordenados = np.sort(horas)
+    assert len(mesclado) == len(horas)
+    for q in QUANTIS:
+        assert erro_de_posicao(ordenados, mesclado.quantil(q), q) < 0.001, q
+    # Os digests de cada dia continuam os mesmos
+    assert [digest.para_lista() for digest in diarios] == estados
+
+def test_adicionar_um_a_um(horas):
+    digest = TDigest()
+    for valor in horas[:20000]:
+        digest.adicionar(valor)
+    ordenados = np.sort(horas[:20000])
+    for q in QUANTIS[:4]:
+        assert erro_de_posicao(ordenados, digest.quantil(q), q) < 0.002, q
+
+def test_estado_serializado(horas):
+    digest = TDigest.de_valores(horas[:5000])
+    copia = TDigest.de_lista(json.loads(json.dumps(digest.para_lista())))
+    assert len(copia) == 5000
+    for q in QUANTIS:
+        assert copia.quantil(q) == pytest.approx(digest.quantil(q))
+
+def test_digest_vazio_e_unitario():
+    assert math.isnan(TDigest().quantil(0.5))
+    assert math.isnan(TDigest.combinar([]).quantil(0.5))
+    assert TDigest.de_valores([4.0, float('nan')]).quantil(0.9) == 4.0
+
+def test_percentis_do_relatorio_por_prioridade(tmp_path):
+    rng = np.random.default_rng(5)
+    inicio = datetime(2024, 1, 1)
+    linhas = []
+    for i in range(6000):
+        criacao = inicio + timedelta(minutes=int(rng.integers(0, 90 * 24 * 60)))
+        conclusao = criacao + timedelta(minutes=int(rng.lognormal(6, 1.2)) + 1)
+        linhas.append({**dict.fromkeys(COLUNAS_FILA, ''), 'id': f"R{i:05d}", 'status': 'Concluída',
+                       'prioridade': ['Normal', 'Alta', 'Urgente'][i % 3], 'dispositivos': 'Notebook',
+                       'data_criacao': criacao.strftime('%Y-%m-%d %H:%M:%S'),
+                       'data_conclusao': conclusao.strftime('%Y-%m-%d %H:%M:%S')})
+    storage = CSVStorage(str(tmp_path / 'fila.csv'))
+    storage.anexar(linhas)
+    rollup = RollupDiario(storage)
+    rollup.sincronizar()
+    
+    # Percentis do rollup (mescla de ~90 digests diários) contra os exatos
+    df = pd.DataFrame(linhas)
+    df['horas'] = (pd.to_datetime(df['data_conclusao']) - pd.to_datetime(df['data_criacao'])).dt.total_seconds() / 3600
+    percentis = rollup.agregados().percentis_resolucao('prioridade')
+    for prioridade, grupo in df.groupby('prioridade'):
+        ordenados = np.sort(grupo['horas'])
+        assert percentis[prioridade]['n'] == len(grupo)
+        for nome, q in QUANTIS_SLA.items():
+            assert erro_de_posicao(ordenados, percentis[prioridade][nome], q) < 0.005, (prioridade, nome)
+
+@pytest.mark.parametrize('distintos', [1, 50, 1000, 20000, 200000])
+def test_distintos_do_hyperloglog(distintos):
+    emails = [f"pessoa{i}@mavi.com" for i in range(distintos)]
+    sketch = HyperLogLog.de_valores(emails * 2)
+    assert sketch.total == 2 * distintos
+    # Erro típico de 1,6% com a precisão padrão; pequenas cardinalidades são quase exatas
+    assert sketch.estimativa() == pytest.approx(distintos, rel=0.05, abs=1)
+
+def test_mescla_dos_sketches_diarios():
+    rng = np.random.default_rng(9)
+    pedidos = rng.integers(0, 30000, 120000)
+    diarios = [HyperLogLog.de_valores([f"p{i}@mavi.com" for i in dia]) for dia in np.array_split(pedidos, 90)]
+    mesclado = HyperLogLog.combinar(diarios)
+    assert mesclado.total == len(pedidos)
+    assert mesclado.estimativa() == pytest.approx(len(np.unique(pedidos)), rel=0.05)
+    # A mescla é a união: repetir um dia não muda a estimativa
+    assert HyperLogLog.combinar(diarios + diarios[:1]).estimativa() == mesclado.estimativa()
+    assert diarios[0].mesclar(diarios[1]).estimativa() == diarios[1].mesclar(diarios[0]).estimativa()
+
+def test_hash_estavel_entre_processos():
+    codigo = "from sketches import HyperLogLog; print(HyperLogLog.de_valores(['ana@mavi.com', 'bruno@mavi.com']).para_lista())"
+    saidas = {subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, check=True,
+                             cwd=os.path.join(os.path.dirname(__file__), '..', 'src'),
+                             env={**os.environ, 'PYTHONHASHSEED': semente}).stdout
+              for semente in ('1', '2')}
+    assert len(saidas) == 1
+
+def test_estado_serializado_do_hyperloglog():
+    sketch = HyperLogLog.de_valores([f"p{i}" for i in range(5000)])
+    copia = HyperLogLog.de_lista(json.loads(json.dumps(sketch.para_lista())))
+    assert copia.total == sketch.total
+    assert np.array_equal(copia.registradores, sketch.registradores)
+
+def test_recorrencia_dos_solicitantes(tmp_path):
+    rng = np.random.default_rng(13)
+    inicio = datetime(2024, 1, 1)
+    linhas = [{**dict.fromkeys(COLUNAS_FILA, ''), 'id': f"S{i:05d}", 'status': 'Pendente', 'prioridade': 'Normal',
+               'email': f"Pessoa{rng.integers(0, 800)}@Mavi.com ", 'squad_leader': ['Ana', 'Bruno'][i % 2],
+               'data_criacao': (inicio + timedelta(hours=int(rng.integers(0, 60 * 24)))).strftime('%Y-%m-%d %H:%M:%S')}
+              for i in range(5000)]
+    storage = CSVStorage(str(tmp_path / 'fila.csv'))
+    storage.anexar(linhas)
+    rollup = RollupDiario(storage)
+    rollup.sincronizar()
+    
+    df = pd.DataFrame(linhas)
+    df['email'] = df['email'].str.strip().str.lower()
+    geral = rollup.agregados().metricas_solicitantes()['']
+    assert geral['pedidos'] == 5000
+    assert geral['unicos'] == pytest.approx(df['email'].nunique(), rel=0.05)
+    assert geral['recorrencia'] == pytest.approx(1 - df['email'].nunique() / 5000, abs=0.01)
+    por_squad = rollup.agregados().metricas_solicitantes('squad_leader')
+    for squad, grupo in df.groupby('squad_leader'):
+        assert por_squad[squad]['unicos'] == pytest.approx(grupo['email'].nunique(), rel=0.05)
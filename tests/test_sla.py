@@ -0,0 +1,84 @@
+"""
+Horas úteis do SLA: expediente, fins de semana, feriados e Páscoa
+"""
+from datetime import date
+
+import numpy as np
+import pytest
+
+from sla import CalendarioUteis, feriados_nacionais, pascoa
+
+def horas(inicio, fim, calendario=None):
+    return float((calendario or CalendarioUteis()).horas_uteis([inicio], [fim])[0])
+
+@pytest.mark.parametrize('ano, domingo', [
+    (1818, date(1818, 3, 22)),
+    (2000, date(2000, 4, 23)),
+    (2019, date(2019, 4, 21)),
+    (2024, date(2024, 3, 31)),
+    (2025, date(2025, 4, 20)),
+    (2038, date(2038, 4, 25))
+])
+def test_pascoa(ano, domingo):
+    assert pascoa(ano) == domingo
+
+def test_feriados_moveis_de_2024():
+    feriados = feriados_nacionais(2024)
+    assert feriados[date(2024, 3, 29)] == 'Sexta-feira Santa'
+    assert feriados[date(2024, 2, 12)] == feriados[date(2024, 2, 13)] == 'Carnaval'
+    assert feriados[date(2024, 5, 30)] == 'Corpus Christi'
+    assert date(2024, 2, 12) not in feriados_nacionais(2024, pontos_facultativos=False)
+
+def test_consciencia_negra_a_partir_de_2024():
+    assert date(2024, 11, 20) in feriados_nacionais(2024)
+    assert date(2023, 11, 20) not in feriados_nacionais(2023)
+
+@pytest.mark.parametrize('inicio, fim, esperado', [
+    # Mesmo dia, dentro do expediente
+    ('2024-03-04 10:00', '2024-03-04 12:30', 2.5),
+    # Antes e depois do expediente contam só as 9h da jornada
+    ('2024-03-04 07:00', '2024-03-04 20:00', 9.0),
+    # Fora do expediente no mesmo dia
+    ('2024-03-04 18:30', '2024-03-04 23:00', 0.0),
+    # Sexta 17h a segunda 10h: o fim de semana não conta
+    ('2024-03-08 17:00', '2024-03-11 10:00', 2.0),
+    # Aberto no sábado: começa a contar na segunda às 9h
+    ('2024-03-09 12:00', '2024-03-11 11:00', 2.0),
+    # Natal no meio do intervalo
+    ('2024-12-24 17:00', '2024-12-26 10:00', 2.0),
+    # Virada do ano com o feriado de 1º de janeiro
+    ('2024-12-31 17:00', '2025-01-02 10:00', 2.0),
+    # Sexta-feira Santa (29/03/2024)
+    ('2024-03-28 17:00', '2024-04-01 10:00', 2.0),
+    # Carnaval (12 e 13/02/2024)
+    ('2024-02-09 17:00', '2024-02-14 10:00', 2.0),
+    # Semana inteira
+    ('2024-03-04 09:00', '2024-03-08 18:00', 45.0)
+])
+def test_horas_uteis(inicio, fim, esperado):
+    assert horas(inicio, fim) == pytest.approx(esperado)
+
+def test_carnaval_conta_sem_pontos_facultativos():
+    calendario = CalendarioUteis(pontos_facultativos=False)
+    assert horas('2024-02-09 17:00', '2024-02-14 10:00', calendario) == pytest.approx(20.0)
+
+def test_feriado_da_empresa():
+    calendario = CalendarioUteis.de_texto(feriados_empresa='2024-03-06')
+    assert horas('2024-03-05 17:00', '2024-03-07 10:00', calendario) == pytest.approx(2.0)
+
+def test_expediente_personalizado():
+    calendario = CalendarioUteis.de_texto(expediente='08:30-12:00', dias_semana='1111110')
+    assert horas('2024-03-09 08:00', '2024-03-09 18:00', calendario) == pytest.approx(3.5)
+
+def test_conclusao_anterior_a_criacao_e_datas_faltantes():
+    calendario = CalendarioUteis()
+    resultado = calendario.horas_uteis(['2024-03-04 12:00', None, '2024-03-04 10:00'],
+                                       ['2024-03-04 10:00', '2024-03-04 10:00', 'data inválida'])
+    assert resultado[0] == pytest.approx(-2.0)
+    assert np.isnan(resultado[1:]).all()
+
+def test_calendario_invalido():
+    with pytest.raises(ValueError):
+        CalendarioUteis.de_texto(expediente='18:00-09:00')
+    with pytest.raises(ValueError):
+        CalendarioUteis(dias_semana='0000000')
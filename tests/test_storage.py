@@ -0,0 +1,100 @@
+"""
+Armazenamento CSV e SQLite: mesmas operações, revisão e réplicas compartilhando o banco
+"""
+import pandas as pd
+import pytest
+
+from storage import COLUNAS_FILA, CSVStorage, Predicado, SQLiteStorage, criar_storage
+
+def linha(ticket_id, data_criacao='2024-03-04 10:00:00', **campos):
+    return {**dict.fromkeys(COLUNAS_FILA, ''), 'id': ticket_id, 'data_criacao': data_criacao,
+            'status': 'Pendente', 'prioridade': 'Normal', 'dispositivos': 'Notebook', **campos}
+
+@pytest.fixture(params=['csv', 'sqlite'])
+def storage(request, tmp_path):
+    if request.param == 'csv':
+        return CSVStorage(str(tmp_path / 'fila.csv'), str(tmp_path / 'fila_espera.csv'))
+    return SQLiteStorage(str(tmp_path / 'fila.db'))
+
+def test_operacoes_basicas(storage):
+    storage.anexar([linha('A'), linha('B', prioridade='Urgente')])
+    storage.anexar([linha('C')], 'espera')
+    assert storage.ids() == {'A', 'B'}
+    assert storage.ids('espera') == {'C'}
+    assert storage.obter('B')['prioridade'] == 'Urgente'
+    assert storage.obter('X') is None
+    
+    assert storage.atualizar('A', {'status': 'Concluída', 'observacoes': 'ok'})
+    assert storage.obter('A')['status'] == 'Concluída'
+    assert not storage.atualizar('X', {'status': 'Concluída'})
+    
+    storage.remover(['B'])
+    assert list(storage.ler()['id'].astype(str)) == ['A']
+
+def test_ids_numericos_continuam_texto(storage):
+    storage.anexar([linha('00596355'), linha('44225E26')])
+    assert storage.ids() == {'00596355', '44225E26'}
+    assert set(storage.ler()['id']) == {'00596355', '44225E26'}
+    assert storage.obter('44225E26') is not None
+    assert storage.atualizar('00596355', {'status': 'Concluída'})
+    storage.remover(['44225E26'])
+    assert storage.ids() == {'00596355'}
+    assert storage.obter('00596355')['status'] == 'Concluída'
+
+def test_revisao_muda_so_com_escritas(storage):
+    storage.anexar([linha('A')])
+    revisao = storage.revisao()
+    storage.ler()
+    storage.obter('A')
+    assert storage.revisao() == revisao
+    storage.atualizar('A', {'status': 'Em andamento'})
+    assert storage.revisao() != revisao
+
+def test_predicado_empurrado_para_o_armazenamento(storage):
+    storage.anexar([linha(f"T{i}", f"2024-03-{i + 1:02d} 12:00:00", status=['Pendente', 'Concluída'][i % 2])
+                    for i in range(10)])
+    predicado = Predicado(inicio='2024-03-03', fim='2024-03-08', valores=(('status', ('Pendente',)),))
+    blocos = list(storage.ler_blocos(tamanho=2, predicado=predicado))
+    assert all(len(bloco) <= 2 for bloco in blocos)
+    assert sorted(pd.concat(blocos)['id']) == ['T2', 'T4', 'T6']
+
+def test_predicado_rejeita_coluna_desconhecida():
+    with pytest.raises(ValueError):
+        Predicado(valores=(('status; DROP TABLE fila', ('x',)),)).sql()
+
+def test_sqlite_compartilhado_entre_replicas(tmp_path):
+    caminho = str(tmp_path / 'fila.db')
+    replica_a, replica_b = SQLiteStorage(caminho), SQLiteStorage(caminho)
+    versao_b = replica_b.versao()
+    with replica_a.transacao():
+        replica_a.anexar([linha('A')])
+        replica_a.atualizar('A', {'status': 'Em andamento'})
+    assert replica_b.versao() != versao_b
+    assert replica_b.revisao() == replica_a.revisao() == 2
+    assert replica_b.obter('A')['status'] == 'Em andamento'
+
+def test_sqlite_transacao_desfeita_em_erro(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / 'fila.db'))
+    storage.anexar([linha('A')])
+    revisao = storage.revisao()
+    with pytest.raises(RuntimeError):
+        with storage.transacao():
+            storage.anexar([linha('B')])
+            raise RuntimeError('falha no meio da escrita')
+    assert storage.ids() == {'A'}
+    assert storage.revisao() == revisao
+
+def test_revisao_sqlite_sobrevive_a_reinicio(tmp_path):
+    caminho = str(tmp_path / 'fila.db')
+    storage = SQLiteStorage(caminho)
+    storage.anexar([linha('A')])
+    storage.atualizar('A', {'status': 'Concluída'})
+    assert SQLiteStorage(caminho).revisao() == storage.revisao()
+
+def test_criar_storage_migra_o_csv(tmp_path):
+    fila_csv = str(tmp_path / 'fila.csv')
+    CSVStorage(fila_csv).anexar([linha('A'), linha('B')])
+    storage = criar_storage('sqlite', fila_csv, sqlite_file=str(tmp_path / 'fila.db'))
+    assert storage.ids() == {'A', 'B'}
+    with pytest.raises(ValueError):
+        criar_storage('redis', fila_csv)